@@ -0,0 +1,202 @@
+# alert_dispatcher.py
+# One Telegram path for the monitor. Rules call alert(key, message) while a
+# tick is computed; that only records the alert. flush() at the end of the
+# tick coalesces everything into one message and hands it to a background
+# sender thread with a persistent HTTP session, so the data path never waits
+# on Telegram.
+#
+# - Dedup: a condition key ("ivp:nifty_curr:high") that alerted less than
+#   `cooldown` seconds ago is suppressed. The last-sent times are kept in a
+#   small JSON file so one-shot runs share the cooldown.
+# - Rate limits: at most one message per `min_interval` seconds and
+#   `per_minute` per rolling minute; a 429 waits for Telegram's retry_after.
+#
+#   python telegram_stub_server.py --port 8766
+#   TELEGRAM_API_URL=http://127.0.0.1:8766 python nifty_master_runner.py
+
+import os
+import json
+import time
+import queue
+import threading
+from collections import deque
+import requests
+from metrics import metrics
+
+TELEGRAM_API_URL = "https://api.telegram.org"
+MAX_MESSAGE_LENGTH = 4096
+
+
+def split_message(text, limit=MAX_MESSAGE_LENGTH):
+    chunks, current = [], ""
+    for line in text.split("\n"):
+        while len(line) > limit:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(line[:limit])
+            line = line[limit:]
+        candidate = f"{current}\n{line}" if current else line
+        if len(candidate) > limit:
+            chunks.append(current)
+            candidate = line
+        current = candidate
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class AlertDispatcher:
+    def __init__(self, token, chat_id, api_url=TELEGRAM_API_URL, cooldown=900, min_interval=1.0,
+                 per_minute=20, state_path=None, timeout=10, max_retries=3, on_alert=None):
+        self.token = token
+        self.chat_id = chat_id
+        self.api_url = api_url.rstrip("/")
+        self.cooldown = cooldown
+        self.min_interval = min_interval
+        self.per_minute = per_minute
+        self.state_path = state_path
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.on_alert = on_alert  # on_alert(key, message) for every alert that passes the cooldown
+
+        self.pending = []
+        self.last_alerted = self._load_state()
+        self.stats = {"queued": 0, "suppressed": 0, "sent": 0, "failed": 0, "rate_limited": 0}
+
+        self.session = requests.Session()
+        self.outbox = queue.Queue()
+        self.sent_at = deque(maxlen=max(per_minute, 1))
+        self.stopping = threading.Event()
+        self.thread = None
+
+    @property
+    def enabled(self):
+        return bool(self.token and self.chat_id)
+
+    def _count(self, outcome):
+        self.stats[outcome] += 1
+        metrics.inc("alerts", outcome)
+
+    # -----------------------------------------
+    # ✅ COOLDOWN STATE
+    # -----------------------------------------
+    def _load_state(self):
+        if not self.state_path or not os.path.exists(self.state_path):
+            return {}
+        try:
+            with open(self.state_path) as f:
+                return {key: float(ts) for key, ts in json.load(f).items()}
+        except (OSError, ValueError, AttributeError):
+            return {}
+
+    def _save_state(self):
+        if not self.state_path:
+            return
+        now = time.time()
+        state = {key: ts for key, ts in self.last_alerted.items() if now - ts < self.cooldown}
+        try:
+            os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+            tmp_path = f"{self.state_path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.state_path)
+        except OSError as e:
+            print(f"⚠️ Could not save alert state: {e}")
+
+    # -----------------------------------------
+    # ✅ DATA-PATH API (never blocks)
+    # -----------------------------------------
+    def alert(self, key, message):
+        now = time.time()
+        last = self.last_alerted.get(key)
+        if last is not None and now - last < self.cooldown:
+            self._count("suppressed")
+            print(f"🔕 Suppressed repeat alert {key} ({now - last:.0f}s < {self.cooldown}s cooldown)")
+            return False
+        self.last_alerted[key] = now
+        self.pending.append(message)
+        metrics.inc("alerts", "raised")
+        print(f"⚡️ TRIGGERING ALERT: {message}")
+        if self.on_alert is not None:
+            self.on_alert(key, message)
+        return True
+
+    def flush(self, header=None):
+        # Coalesces this tick's alerts into one message and queues it.
+        if not self.pending:
+            return 0
+        lines, self.pending = self.pending, []
+        self._save_state()
+        if not self.enabled:
+            print(f"⚠️ Telegram credentials not set. Skipping {len(lines)} alert(s).")
+            return 0
+        text = "\n".join(([header] if header and len(lines) > 1 else []) + lines)
+        for chunk in split_message(text):
+            self.outbox.put(chunk)
+            self._count("queued")
+        self._ensure_worker()
+        return len(lines)
+
+    def close(self, timeout=15):
+        # Sends whatever is still queued (one-shot runs exit right after).
+        self.flush()
+        if self.thread is None:
+            return
+        self.outbox.put(None)
+        self.thread.join(timeout)
+        if self.thread.is_alive():
+            print(f"⚠️ Telegram sender still busy after {timeout}s, {self.outbox.qsize()} message(s) dropped")
+            self.stopping.set()
+        self.thread = None
+
+    # -----------------------------------------
+    # ✅ SENDER THREAD
+    # -----------------------------------------
+    def _ensure_worker(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.stopping.clear()
+            self.thread = threading.Thread(target=self._run, name="telegram-sender", daemon=True)
+            self.thread.start()
+
+    def _run(self):
+        while not self.stopping.is_set():
+            text = self.outbox.get()
+            if text is None:
+                return
+            self._send(text)
+
+    def _wait_for_slot(self):
+        now = time.monotonic()
+        wait = 0.0
+        if self.sent_at:
+            wait = max(wait, self.sent_at[-1] + self.min_interval - now)
+        if len(self.sent_at) == self.sent_at.maxlen:
+            wait = max(wait, self.sent_at[0] + 60 - now)
+        if wait > 0:
+            self.stopping.wait(wait)
+
+    def _send(self, text):
+        url = f"{self.api_url}/bot{self.token}/sendMessage"
+        for attempt in range(1, self.max_retries + 1):
+            self._wait_for_slot()
+            if self.stopping.is_set():
+                return False
+            try:
+                response = self.session.post(url, data={"chat_id": self.chat_id, "text": text}, timeout=self.timeout)
+                self.sent_at.append(time.monotonic())
+                if response.status_code == 429:
+                    self._count("rate_limited")
+                    retry_after = response.json().get("parameters", {}).get("retry_after", 1)
+                    print(f"⏳ Telegram rate limit, retrying in {retry_after}s")
+                    self.stopping.wait(retry_after)
+                    continue
+                response.raise_for_status()
+                self._count("sent")
+                print(f"✅ Telegram alert sent ({len(text)} chars)")
+                return True
+            except (requests.RequestException, ValueError) as e:
+                print(f"❗️ Telegram alert failed (attempt {attempt}/{self.max_retries}): {e}")
+                self.stopping.wait(min(2 ** attempt, 10))
+        self._count("failed")
+        return False
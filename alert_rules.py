@@ -0,0 +1,17 @@
+# alert_rules.py
+# The alert conditions, written so the same expression works on one live
+# value (prepare_combined_row / run_cycle) and on numpy arrays broadcast over
+# a threshold grid (backtest.py). NaN compares False, so missing values never
+# alert.
+
+
+def ivp_breach(ivp, low, high):
+    return (ivp > high) | (ivp < low)
+
+
+def vwap_breach(straddle, vwap, factor_low, factor_high):
+    return (vwap != 0) & ((straddle > factor_high * vwap) | (straddle < factor_low * vwap))
+
+
+def vix_breach(vix, low, high):
+    return (vix >= high) | (vix <= low)
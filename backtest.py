@@ -0,0 +1,183 @@
+# backtest.py
+# Replays the alert rules over the stored snapshots for a grid of
+# thresholds, so they can be tuned on history instead of on Telegram.
+#
+#   python backtest.py                                  # default grids
+#   python backtest.py --ivp-low 5:20:5 --ivp-high 85,90,95 --rule ivp
+#   python backtest.py --out static/backtest.csv         # full table
+#   python backtest.py --group reliance                  # another symbol table
+#
+# Each rule is evaluated for every (low, high) pair at once: the stored
+# values are broadcast against the threshold vectors into a
+# (rows x settings) boolean matrix per label, and counts, episodes (runs of
+# consecutive alerting ticks), per-session peaks and the time-of-day
+# histogram are reductions over that matrix.
+
+import time
+import argparse
+import itertools
+import numpy as np
+import pandas as pd
+
+from alert_rules import ivp_breach, vwap_breach, vix_breach
+from config import (STORE_DIR, STORAGE_BACKEND, VIX_HIGH, VIX_LOW, IVP_HIGH, IVP_LOW,
+                    VWAP_FACTOR_HIGH, VWAP_FACTOR_LOW)
+from storage import open_store
+from symbols import group_paths
+
+SLOT_MINUTES = 30  # time-of-day histogram buckets, starting at the 09:15 open
+SESSION_START_MINUTE = 9 * 60 + 15
+CHUNK_CELLS = 20_000_000  # rows x settings evaluated per block
+
+DEFAULT_GRIDS = {
+    "ivp": ("0:30:2.5", "70:100:2.5"),
+    "vwap": ("0.3:0.9:0.05", "1.1:2.0:0.05"),
+    "vix": ("8:13:0.5", "14:25:0.5"),
+}
+LIVE_SETTINGS = {
+    "ivp": (IVP_LOW, IVP_HIGH),
+    "vwap": (VWAP_FACTOR_LOW, VWAP_FACTOR_HIGH),
+    "vix": (VIX_LOW, VIX_HIGH),
+}
+
+
+def parse_grid(text):
+    # "5,10,15" or "start:stop:step" (stop included)
+    if ":" in text:
+        start, stop, step = (float(x) for x in text.split(":"))
+        return np.round(np.arange(start, stop + step / 2, step), 6)
+    return np.array([float(x) for x in text.split(",")])
+
+
+def settings_grid(rule, low_text, high_text):
+    lows, highs = parse_grid(low_text), parse_grid(high_text)
+    pairs = set(itertools.product(lows.tolist(), highs.tolist()))
+    pairs.add(tuple(float(x) for x in LIVE_SETTINGS[rule]))
+    pairs = sorted(p for p in pairs if p[0] < p[1])
+    return np.array([p[0] for p in pairs]), np.array([p[1] for p in pairs])
+
+
+# -----------------------------------------
+# ✅ RULE SIGNALS (one row per live alert check)
+# -----------------------------------------
+def rule_series(df, rule):
+    # [(series name, callable(low, high) -> rows x settings bool)] where low
+    # and high are broadcast as 1 x settings rows.
+    labels = [c[:-len("_straddle_iv")] for c in df.columns if c.endswith("_straddle_iv")]
+    series = []
+    if rule == "vix" and "india_vix" in df.columns:
+        vix = df["india_vix"].to_numpy(dtype=float)[:, None]
+        series.append(("india_vix", lambda low, high, vix=vix: vix_breach(vix, low, high)))
+    for label in labels:
+        if rule == "ivp" and f"{label}_ivp" in df.columns:
+            ivp = df[f"{label}_ivp"].to_numpy(dtype=float)[:, None]
+            series.append((label, lambda low, high, ivp=ivp: ivp_breach(ivp, low, high)))
+        if rule == "vwap" and f"{label}_vwap" in df.columns:
+            straddle = df[f"{label}_straddle"].to_numpy(dtype=float)[:, None]
+            vwap = df[f"{label}_vwap"].to_numpy(dtype=float)[:, None]
+            series.append((label, lambda low, high, straddle=straddle, vwap=vwap:
+                           vwap_breach(straddle, vwap, low, high)))
+    return series
+
+
+# -----------------------------------------
+# ✅ GRID EVALUATION
+# -----------------------------------------
+def evaluate(df, rule, lows, highs):
+    n = len(df)
+    minutes = (df["timestamp"].dt.hour * 60 + df["timestamp"].dt.minute).to_numpy()
+    slot = np.clip((minutes - SESSION_START_MINUTE) // SLOT_MINUTES, 0, None)
+    slot_names = [f"{(SESSION_START_MINUTE + s * SLOT_MINUTES) // 60:02d}:{(SESSION_START_MINUTE + s * SLOT_MINUTES) % 60:02d}"
+                  for s in range(int(slot.max()) + 1 if n else 0)]
+    session_codes, sessions = pd.factorize(df["timestamp"].dt.strftime("%Y-%m-%d"))
+    slot_onehot = np.zeros((len(slot_names), n), dtype=np.float32)
+    slot_onehot[slot, np.arange(n)] = 1
+    session_onehot = np.zeros((len(sessions), n), dtype=np.float32)
+    session_onehot[session_codes, np.arange(n)] = 1
+
+    settings = len(lows)
+    alerts = np.zeros(settings, dtype=np.int64)
+    episodes = np.zeros(settings, dtype=np.int64)
+    by_slot = np.zeros((len(slot_names), settings), dtype=np.int64)
+    by_session = np.zeros((len(sessions), settings), dtype=np.int64)
+    step = max(1, CHUNK_CELLS // max(n, 1))
+    for _, signal in rule_series(df, rule):
+        for start in range(0, settings, step):
+            cols = slice(start, start + step)
+            fired = signal(lows[None, cols], highs[None, cols])
+            # An episode starts on a firing tick whose previous row did not fire.
+            previous = np.vstack([np.zeros((1, fired.shape[1]), dtype=bool), fired[:-1]])
+            alerts[cols] += fired.sum(axis=0)
+            episodes[cols] += (fired & ~previous).sum(axis=0)
+            as_float = fired.astype(np.float32)
+            by_slot[:, cols] += np.rint(slot_onehot @ as_float).astype(np.int64)
+            by_session[:, cols] += np.rint(session_onehot @ as_float).astype(np.int64)
+
+    result = pd.DataFrame({
+        "rule": rule,
+        "low": lows,
+        "high": highs,
+        "alerts": alerts,
+        "per_session": np.round(alerts / max(len(sessions), 1), 2),
+        "max_session": by_session.max(axis=0) if len(sessions) else 0,
+        "episodes": episodes,
+        "mean_episode": np.round(np.divide(alerts, episodes, out=np.zeros(settings), where=episodes > 0), 2),
+    })
+    result["live"] = [(lo, hi) == tuple(float(x) for x in LIVE_SETTINGS[rule]) for lo, hi in zip(lows, highs)]
+    for i, name in enumerate(slot_names):
+        result[name] = by_slot[i]
+    return result
+
+
+def print_report(result, top):
+    rule = result["rule"].iloc[0]
+    slot_cols = [c for c in result.columns if ":" in c]
+    live = result[result["live"]]
+    print(f"\n📊 {rule.upper()} rule: {len(result)} settings")
+    if not live.empty:
+        row = live.iloc[0]
+        print(f"   live ({row['low']:g}, {row['high']:g}): {row['alerts']} alerts, "
+              f"{row['per_session']}/session (max {row['max_session']}), "
+              f"{row['episodes']} episodes x {row['mean_episode']} ticks")
+        if row["alerts"]:
+            peak = max(slot_cols, key=lambda c: row[c])
+            print(f"   busiest {SLOT_MINUTES}-min slot: {peak} ({row[peak]} alerts)")
+    quiet = result[result["alerts"] > 0].sort_values(["per_session", "episodes"]).head(top)
+    columns = ["low", "high", "alerts", "per_session", "max_session", "episodes", "mean_episode"] + slot_cols
+    if not quiet.empty:
+        print(quiet[columns].to_string(index=False))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest alert thresholds over stored snapshots")
+    parser.add_argument("--backend", default=STORAGE_BACKEND)
+    parser.add_argument("--root", default=STORE_DIR)
+    parser.add_argument("--group", help="symbol table from symbols.py (sets the store root)")
+    parser.add_argument("--start", help="first timestamp/date to include")
+    parser.add_argument("--end", help="last timestamp/date to include")
+    parser.add_argument("--rule", choices=list(DEFAULT_GRIDS), action="append", help="default: all rules")
+    for rule, (low, high) in DEFAULT_GRIDS.items():
+        parser.add_argument(f"--{rule}-low", default=low, help=f"grid for the lower {rule} threshold")
+        parser.add_argument(f"--{rule}-high", default=high, help=f"grid for the upper {rule} threshold")
+    parser.add_argument("--top", type=int, default=10, help="quietest settings to print per rule")
+    parser.add_argument("--out", help="write the full result table as CSV")
+    args = parser.parse_args()
+
+    store = open_store(args.backend, group_paths(args.group)[0] if args.group else args.root)
+    df = store.read(args.start, args.end)
+    print(f"✅ Loaded {len(df)} rows from the {store.name} snapshot store")
+    if df.empty:
+        raise SystemExit(0)
+
+    results = []
+    for rule in args.rule or list(DEFAULT_GRIDS):
+        lows, highs = settings_grid(rule, getattr(args, f"{rule}_low"), getattr(args, f"{rule}_high"))
+        started = time.perf_counter()
+        result = evaluate(df, rule, lows, highs)
+        print(f"⏱️ {rule}: {len(df)} rows x {len(lows)} settings in {time.perf_counter() - started:.2f}s")
+        print_report(result, args.top)
+        results.append(result)
+
+    if args.out:
+        pd.concat(results, ignore_index=True).to_csv(args.out, index=False)
+        print(f"✅ Wrote {args.out}")
@@ -0,0 +1,623 @@
+# benchmarks.py
+# Timing comparisons for the monitor's hot paths.
+#
+#   python benchmarks.py parser                       # synthetic full chain
+#   python benchmarks.py parser --payload chain.json  # a recorded NSE payload
+#   python benchmarks.py recompute --days 60          # synthetic minute history
+#   python benchmarks.py plots                        # dashboard PNG rendering
+#   python benchmarks.py report --symbols 40          # end-of-day PDF: downsampled, parallel pages
+#   python benchmarks.py greeks                       # batched IV solver vs per-contract
+#   python benchmarks.py api --clients 200            # load test a running server.py
+#   python benchmarks.py imports                      # runner cold-start import budget (exit 1 if over)
+#   python benchmarks.py suite                        # replayed pipeline per fixture vs the baseline (exit 1 if slower)
+#   python benchmarks.py suite --save-baseline        # record this machine's numbers as the new baseline
+#
+# The suite's baseline timings are scaled by a calibration loop run around
+# each fixture, so a faster or slower CPU is not a regression, and a measure
+# over tolerance has to be over again on a re-run to count. A baseline
+# from a machine with another core count (the plot workers scale with it) or
+# without a calibration is reported on but never fails the run: regenerate
+# it there with --save-baseline.
+
+import os
+import sys
+import json
+import time
+import tempfile
+import subprocess
+import argparse
+import threading
+from datetime import datetime, timedelta
+from statistics import median
+import numpy as np
+import pandas as pd
+
+from chain_parser import parse_option_chain, parse_expiry
+from nse_stub_server import synthetic_option_chain, synthetic_all_indices
+from recorder import write_recording
+from storage import open_store
+from config import STORE_DIR, STORAGE_BACKEND
+from recompute import check, recompute
+from plot_renderer import PlotRenderer
+from greeks import bs_price, price_bounds, implied_vol, chain_greeks, atm_straddles, years_to_expiry
+
+
+def timeit(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return median(samples)
+
+
+def print_comparison(title, rows):
+    print(f"\n📊 {title}")
+    baseline = rows[0][1]
+    for name, seconds in rows:
+        print(f"   {name:<28} {seconds * 1000:10.3f} ms   x{baseline / seconds:7.1f}")
+
+
+# -----------------------------------------
+# ✅ OPTION-CHAIN PARSER
+# -----------------------------------------
+def legacy_atm_rows(data, count=2):
+    # The list scans prepare_combined_row used before chain_parser.
+    spot_price = data['records']['underlyingValue']
+    expiry_dates = sorted(
+        data['records']['expiryDates'],
+        key=lambda x: datetime.strptime(x, "%d-%b-%Y").date()
+    )
+    rows = []
+    for expiry in expiry_dates[:count]:
+        all_strikes = [
+            item['strikePrice'] for item in data['records']['data']
+            if item['expiryDate'] == expiry
+        ]
+        atm_strike = min(all_strikes, key=lambda x: abs(x - spot_price))
+        ce_data = next((
+            item.get('CE') for item in data['records']['data']
+            if item['expiryDate'] == expiry and item['strikePrice'] == atm_strike and 'CE' in item
+        ), {})
+        pe_data = next((
+            item.get('PE') for item in data['records']['data']
+            if item['expiryDate'] == expiry and item['strikePrice'] == atm_strike and 'PE' in item
+        ), {})
+        rows.append((expiry, atm_strike, ce_data.get('lastPrice', 0), pe_data.get('lastPrice', 0),
+                     ce_data.get('totalTradedVolume', 0), pe_data.get('totalTradedVolume', 0),
+                     ce_data.get('impliedVolatility', 0), pe_data.get('impliedVolatility', 0)))
+    return rows
+
+
+def parser_atm_rows(data, count=2):
+    chain = parse_option_chain(data)
+    rows = []
+    for expiry in chain.nearest_expiries(count):
+        atm = chain.atm(expiry)
+        rows.append((expiry, atm['strike'], atm['ce_ltp'], atm['pe_ltp'],
+                     atm['ce_vol'], atm['pe_vol'], atm['ce_iv'], atm['pe_iv']))
+    return rows
+
+
+def bench_parser(payload=None, repeat=20, expiries=(2, 6, 18)):
+    if payload:
+        with open(payload) as f:
+            data = json.load(f)
+        label = payload
+    else:
+        data = synthetic_option_chain("NIFTY", strikes_per_side=100, n_expiries=18, seed=7)
+        label = "synthetic NIFTY, 18 expiries x 201 strikes"
+    print(f"🔬 Parser benchmark on {label} ({len(data['records']['data'])} records)")
+
+    for count in expiries:
+        count = min(count, len(data['records']['expiryDates']))
+        legacy = legacy_atm_rows(data, count)
+        parsed = parser_atm_rows(data, count)
+        if legacy != parsed:
+            raise SystemExit(f"❌ Parser disagrees with the legacy scan for {count} expiries:\n{legacy}\n{parsed}")
+        parse_expiry.cache_clear()
+        print_comparison(f"ATM rows for {count} expiries", [
+            ("legacy list scans", timeit(lambda: legacy_atm_rows(data, count), repeat)),
+            ("single-pass parser", timeit(lambda: parser_atm_rows(data, count), repeat)),
+        ])
+
+
+# -----------------------------------------
+# ✅ RECOMPUTE VS LIVE ENGINE
+# -----------------------------------------
+def synthetic_history(days=60, ticks_per_day=375, seed=7):
+    # Minute snapshots for the four live labels with weekly curr/next expiry
+    # rolls, occasional missing chains and NaN IVs.
+    rng = np.random.default_rng(seed)
+    sessions = pd.bdate_range("2025-01-01", periods=days)
+    minutes = pd.timedelta_range("09:15:00", periods=ticks_per_day, freq="1min")
+    timestamps = (sessions.values[:, None] + minutes.values[None, :]).ravel()
+    n = len(timestamps)
+    df = pd.DataFrame({"timestamp": pd.to_datetime(timestamps)})
+    week = np.arange(n) // (ticks_per_day * 5)
+    expiries = np.array([(sessions[0] + pd.Timedelta(days=7 * k + 3)).strftime("%d-%b-%Y")
+                         for k in range(week.max() + 2)])
+    df["india_vix"] = np.round(13 + rng.normal(0, 0.02, n).cumsum(), 2)
+    for symbol, premium, spot in (("nifty", 250.0, 24850.0), ("banknifty", 650.0, 56850.0)):
+        missing = rng.random(n) < 0.01
+        df[f"{symbol}_curr_spot"] = np.round(spot * np.exp(rng.normal(0, 0.0005, n).cumsum()), 1)
+        for slot, offset in (("curr", 0), ("next", 1)):
+            label = f"{symbol}_{slot}"
+            df[f"{label}_expiry"] = pd.Series(expiries[week + offset]).where(~missing)
+            df[f"{label}_straddle"] = np.round(premium * np.exp(rng.normal(0, 0.002, n).cumsum()), 2)
+            df[f"{label}_total_vol"] = rng.integers(0, 2_000_000, n)
+            iv = np.round(rng.uniform(8, 30, n), 1)
+            df[f"{label}_straddle_iv"] = np.where(rng.random(n) < 0.005, np.nan, iv)
+    return df
+
+
+def bench_recompute(days=60, windows=None):
+    windows = windows or {"": 30, "1d": "1d", "5d": "5d"}
+    df = synthetic_history(days)
+    print(f"🔬 Recompute benchmark on {days} synthetic sessions ({len(df)} rows, windows {windows})")
+    if not check(df, windows):
+        raise SystemExit("❌ Recompute disagrees with the live engine")
+
+
+# -----------------------------------------
+# ✅ PLOT RENDERING
+# -----------------------------------------
+def legacy_render(df, out_dir):
+    # generate_ivp_plots before plot_renderer: fresh figures, tight_layout,
+    # both symbols in turn (PdfPages left out, it only added a file open).
+    import matplotlib.pyplot as plt
+    import matplotlib.dates as mdates
+
+    def format_axes(ax):
+        ax.xaxis.set_major_formatter(mdates.DateFormatter("%H:%M"))
+        ax.tick_params(axis='x', rotation=45)
+
+    for prefix in ("nifty", "banknifty"):
+        df_sym = df
+        fig, axes = plt.subplots(3, 1, figsize=(14, 14), sharex=True)
+        plt.subplots_adjust(hspace=0.5)
+        ax1 = axes[0]
+        ax1.plot(df_sym['timestamp'], df_sym['india_vix'], label='India VIX', color='red', linestyle='--', linewidth=2)
+        ax1b = ax1.twinx()
+        ax1b.plot(df_sym['timestamp'], df_sym[f'{prefix}_curr_straddle_iv'], label='Curr IV', color='blue', linewidth=2)
+        ax1b.plot(df_sym['timestamp'], df_sym[f'{prefix}_next_straddle_iv'], label='Next IV', color='orange', linewidth=2)
+        ax1b.legend(loc='upper left')
+        ax1.legend(loc='lower left')
+        ax2 = axes[1]
+        ax2.plot(df_sym['timestamp'], df_sym[f'{prefix}_curr_spot'], label='Spot', color='black', linewidth=2)
+        ax2b = ax2.twinx()
+        for column, label, color, style in ((f'{prefix}_curr_straddle', 'Curr Premium', 'blue', '-'),
+                                            (f'{prefix}_curr_vwap', 'Curr VWAP', 'blue', '--'),
+                                            (f'{prefix}_next_straddle', 'Next Premium', 'orange', '-'),
+                                            (f'{prefix}_next_vwap', 'Next VWAP', 'orange', '--')):
+            ax2b.plot(df_sym['timestamp'], df_sym[column], label=label, color=color, linestyle=style, linewidth=2)
+        ax2.legend(loc='lower left')
+        ax2b.legend(loc='upper left')
+        ax3 = axes[2]
+        ax3.plot(df_sym['timestamp'], df_sym[f'{prefix}_curr_spot'], label='Spot Price', color='black', linewidth=2)
+        ax3b = ax3.twinx()
+        ax3b.plot(df_sym['timestamp'], df_sym[f'{prefix}_curr_ivp'], label='Curr IVP%', color='green', linewidth=2)
+        ax3b.plot(df_sym['timestamp'], df_sym[f'{prefix}_next_ivp'], label='Next IVP%', color='darkorange', linewidth=2)
+        ax3.legend(loc='lower left')
+        ax3b.legend(loc='upper left')
+        for ax in (ax1, ax2, ax3):
+            format_axes(ax)
+        plt.tight_layout()
+        fig.savefig(os.path.join(out_dir, f"legacy_{prefix}.png"))
+        plt.close(fig)
+
+
+def bench_plots(days=1, repeat=3):
+    history = recompute(synthetic_history(days + 1))
+    history["timestamp"] = pd.to_datetime(history["timestamp"])
+    split = len(history) - 375
+    print(f"🔬 Plot benchmark: {split} rows per render, then one new row per tick")
+    with tempfile.TemporaryDirectory() as out_dir:
+        targets = {p: (p.upper(), os.path.join(out_dir, f"{p}.png")) for p in ("nifty", "banknifty")}
+        legacy = timeit(lambda: legacy_render(history.iloc[:split], out_dir), repeat)
+
+        def cold():
+            renderer = PlotRenderer(targets)
+            renderer.render(history.iloc[:split])
+            renderer.close()
+
+        cold_seconds = timeit(cold, repeat)
+        renderer = PlotRenderer(targets)
+        renderer.render(history.iloc[:split])
+        tick = iter(range(split + 1, len(history)))
+        warm = timeit(lambda: renderer.render(history.iloc[:next(tick)]), repeat)
+        renderer.render(history.iloc[:split])
+        unchanged = timeit(lambda: renderer.render(history.iloc[:split]), repeat)
+        renderer.close()
+
+        serial = PlotRenderer(targets, parallel=False)
+        serial.render(history.iloc[:split])
+        tick = iter(range(split + 1, len(history)))
+        serial_warm = timeit(lambda: serial.render(history.iloc[:next(tick)]), repeat)
+
+    print_comparison("Two dashboard PNGs per tick", [
+        ("legacy generate_ivp_plots", legacy),
+        ("renderer, cold (new pool)", cold_seconds),
+        ("renderer, warm, serial", serial_warm),
+        ("renderer, warm, parallel", warm),
+        ("renderer, data unchanged", unchanged),
+    ])
+
+
+# -----------------------------------------
+# ✅ END-OF-DAY REPORT
+# -----------------------------------------
+def bench_report(symbols=40, ticks_per_day=3750, workers=None):
+    # One session per symbol (NIFTY's synthetic columns under new prefixes),
+    # every build writes the full PDF.
+    from eod_report import REPORT_WORKERS, REPORT_POINTS, build_report
+    workers = workers or REPORT_WORKERS
+    day = recompute(synthetic_history(1, ticks_per_day))
+    day["timestamp"] = pd.to_datetime(day["timestamp"])
+    day = day[["timestamp", "india_vix"] + [c for c in day.columns if c.startswith("nifty_")]]
+    frames = {f"s{i}": day.rename(columns=lambda c: f"s{i}_{c[6:]}" if c.startswith("nifty_") else c)
+              for i in range(symbols)}
+    titles = {prefix: prefix.upper() for prefix in frames}
+    print(f"🔬 Report benchmark: {symbols} symbols x {len(day)} rows, {workers} workers")
+    with tempfile.TemporaryDirectory() as out_dir:
+        pdf_path = os.path.join(out_dir, "report.pdf")
+        build = lambda w, points: build_report(frames, titles, {}, pdf_path, w, points)
+        rows = [
+            ("every row, serial", timeit(lambda: build(1, len(day)), 1)),
+            (f"{REPORT_POINTS} points, serial", timeit(lambda: build(1, REPORT_POINTS), 1)),
+            (f"{REPORT_POINTS} points, {workers} workers", timeit(lambda: build(workers, REPORT_POINTS), 1)),
+        ]
+        size = os.path.getsize(pdf_path)
+    print_comparison(f"{symbols}-page end-of-day PDF ({size / 1e6:.1f} MB)", rows)
+
+
+# -----------------------------------------
+# ✅ IMPLIED VOLATILITY / GREEKS
+# -----------------------------------------
+def bench_greeks(repeat=5):
+    # The stub prices with Black-Scholes at r=0 from a known smile, rounded to
+    # the 0.05 tick, so solving at r=0 must give back NSE's impliedVolatility.
+    now = datetime(2025, 7, 24, 10, 0)
+    data = synthetic_option_chain("NIFTY", now=now, strikes_per_side=100, n_expiries=18, seed=7)
+    chain = parse_option_chain(data)
+    spot = chain.spot
+    strike, t, price, kind, quoted = [], [], [], [], []
+    for item in data["records"]["data"]:
+        for side, k in (("CE", 1), ("PE", -1)):
+            strike.append(item["strikePrice"])
+            t.append(years_to_expiry(item["expiryDate"], now))
+            price.append(item[side]["lastPrice"])
+            kind.append(k)
+            quoted.append(item[side]["impliedVolatility"])
+    strike, t, price, kind, quoted = (np.array(a, dtype=np.float64) for a in (strike, t, price, kind, quoted))
+    print(f"🔬 IV solver benchmark on a synthetic NIFTY chain ({len(price)} contracts, 18 expiries)")
+
+    def per_contract():
+        return [implied_vol(price[i], spot, strike[i], t[i], kind[i], rate=0.0) for i in range(len(price))]
+
+    vol = implied_vol(price, spot, strike, t, kind, rate=0.0)
+    print_comparison("IV for every contract", [
+        ("per-contract solver calls", timeit(per_contract, 1)),
+        ("one batched solve", timeit(lambda: implied_vol(price, spot, strike, t, kind, rate=0.0), repeat)),
+        ("chain_greeks (IV + Greeks)", timeit(lambda: chain_greeks(chain, now, rate=0.0), repeat)),
+    ])
+
+    solved = np.isfinite(vol)
+    repriced = bs_price(spot, strike[solved], t[solved], vol[solved], kind[solved], rate=0.0)
+    print(f"   solved {solved.mean():.2%} (the rest are ticks at/below intrinsic), "
+          f"max reprice error {np.abs(repriced - price[solved]).max():.4f}")
+    # With enough time value that the 0.05 tick rounding does not matter,
+    # the solved IV should match the quote.
+    time_value = price - price_bounds(spot, strike, t, kind, rate=0.0)[0]
+    liquid = solved & (time_value > 5) & (quoted > 0)
+    error = np.abs(vol[liquid] * 100 - quoted[liquid])
+    print(f"   vs quoted IV where time value > 5: median {np.median(error):.3f}, p99 {np.quantile(error, 0.99):.3f} vol points")
+
+    straddles = atm_straddles(chain, now, chain.expiries, rate=0.0)
+    print(f"   ATM straddles: {timeit(lambda: atm_straddles(chain, now, chain.expiries), repeat) * 1000:.3f} ms "
+          f"for {len(straddles)} expiries, nearest IV {next(iter(straddles.values()))['iv']:.2f}%")
+
+
+# -----------------------------------------
+# ✅ DASHBOARD API LOAD TEST
+# -----------------------------------------
+def bench_api(url="http://127.0.0.1:8000", clients=200, seconds=10, paths=None):
+    # Each client is a keep-alive session polling like the dashboard does:
+    # conditional GETs with the last ETag, gzip accepted.
+    import requests
+    paths = paths or ["/api/latest", "/api/series?symbol=NIFTY", "/static/nifty_ivp_live_plot.png"]
+    latencies, statuses, errors = [], {}, []
+    lock = threading.Lock()
+    stop = time.monotonic() + seconds
+
+    def client(i):
+        session = requests.Session()
+        etags = {}
+        while time.monotonic() < stop:
+            path = paths[i % len(paths)]
+            i += 1
+            headers = {"Accept-Encoding": "gzip"}
+            if path in etags:
+                headers["If-None-Match"] = etags[path]
+            started = time.perf_counter()
+            try:
+                response = session.get(url + path, headers=headers, timeout=30)
+            except requests.RequestException as e:
+                with lock:
+                    errors.append(str(e))
+                continue
+            elapsed = time.perf_counter() - started
+            if "ETag" in response.headers:
+                etags[path] = response.headers["ETag"]
+            with lock:
+                latencies.append(elapsed)
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    threads = [threading.Thread(target=client, args=(i,), daemon=True) for i in range(clients)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.monotonic() - started
+    if not latencies:
+        raise SystemExit(f"❌ No successful requests against {url}: {errors[:3]}")
+    p50, p99 = np.quantile(latencies, [0.5, 0.99]) * 1000
+    print(f"📊 {clients} clients x {seconds}s against {url}")
+    print(f"   {len(latencies) / wall:8.0f} req/s   p50 {p50:.1f} ms   p99 {p99:.1f} ms   "
+          f"statuses {dict(sorted(statuses.items()))}   errors {len(errors)}")
+
+
+
+# -----------------------------------------
+# ✅ RUNNER COLD-START IMPORT BUDGET
+# -----------------------------------------
+# What each entry-point path imports before it does anything, and the most it
+# may cost (seconds, python -X importtime cumulative, median of fresh
+# interpreters). None of HEAVY_MODULES may load on these paths at all.
+# tests/test_cold_start.py holds a real market-closed run to the first budget.
+IMPORT_PATHS = {
+    "no-op (market closed)": ("import nifty_master_runner", 0.15),
+    "fetch-only": ("import nifty_master_runner, monitor_cycle", 0.4),
+}
+HEAVY_MODULES = ("pandas", "numpy", "matplotlib", "pyarrow", "selenium", "webdriver_manager", "bs4", "telegram")
+
+
+def import_profile(statement, cwd=None, env=None):
+    # {module: cumulative seconds} for one fresh interpreter, as -X importtime reports it.
+    # statement: code for -c, or an argv list (a script and its arguments).
+    args = statement if isinstance(statement, list) else ["-c", statement]
+    result = subprocess.run([sys.executable, "-X", "importtime"] + args, capture_output=True, text=True,
+                            cwd=cwd or os.path.dirname(os.path.abspath(__file__)), env=env)
+    if result.returncode:
+        raise SystemExit(f"❌ {statement!r} failed:\n{result.stderr[-2000:]}")
+    modules, total = {}, 0.0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue  # header line
+        seconds = int(cumulative) / 1e6
+        modules[name.strip()] = seconds
+        if not name.startswith("  "):  # top level: its cumulative covers the children
+            total += seconds
+    return modules, total
+
+
+def bench_imports(repeat=5, shown=5):
+    over = False
+    for path, (statement, budget) in IMPORT_PATHS.items():
+        import_profile(statement)  # warm the bytecode cache
+        runs = [import_profile(statement) for _ in range(repeat)]
+        modules, _ = runs[-1]
+        total = median(run[1] for run in runs)
+        heavy = sorted({name.split(".")[0] for name in modules} & set(HEAVY_MODULES))
+        ok = total <= budget and not heavy
+        over |= not ok
+        print(f"\n{'✅' if ok else '❌'} {path}: {total * 1000:.0f} ms of imports (budget {budget * 1000:.0f} ms), "
+              f"{len(modules)} modules")
+        if heavy:
+            print(f"   heavy modules loaded: {', '.join(heavy)}")
+        top = sorted(((s, n) for n, s in modules.items() if "." not in n), reverse=True)[:shown]
+        print("   slowest: " + ", ".join(f"{n} {s * 1000:.0f} ms" for s, n in top))
+    if over:
+        raise SystemExit(1)
+
+# -----------------------------------------
+# ✅ REPLAYED PIPELINE SUITE (replay.py, baseline regressions)
+# -----------------------------------------
+SUITE_FIXTURES = {
+    # name: (strikes each side of ATM, expiries, sessions of history already in the store)
+    "small-chain/short-history": (20, 4, 1),
+    "large-chain/short-history": (100, 18, 1),  # about a full NIFTY chain, ~3 MB of JSON
+    "small-chain/long-history": (20, 4, 60),
+    "large-chain/long-history": (100, 18, 60),
+}
+SUITE_SYMBOLS = ("NIFTY", "BANKNIFTY")  # the main table, the one synthetic_history fills
+SUITE_BASELINE_PATH = "benchmarks_baseline.json"
+SUITE_TOLERANCE = 0.25  # slower / bigger than the baseline by more than this is a regression
+SUITE_MIN_MS = 5  # stages under this in the baseline are too noisy to flag
+SUITE_CONFIRM_RUNS = 1  # re-runs of a fixture with measures over tolerance before they count
+CALIBRATION_REPEAT = 9
+
+
+def synthetic_recording(start, ticks, strikes_per_side, n_expiries):
+    # recorder.py ticks one minute apart, as the live monitor would record them.
+    for i in range(ticks):
+        now = start + timedelta(minutes=i)
+        sources = {symbol: synthetic_option_chain(symbol, now=now, strikes_per_side=strikes_per_side,
+                                                  n_expiries=n_expiries) for symbol in SUITE_SYMBOLS}
+        sources["INDIA_VIX"] = synthetic_all_indices(now=now)
+        yield {"time": now.strftime("%Y-%m-%d %H:%M:%S"), "sources": sources, "pages": {}}
+
+
+def run_fixture(name, workdir, ticks, plot_every):
+    strikes_per_side, n_expiries, history_days = SUITE_FIXTURES[name]
+    history = recompute(synthetic_history(history_days))
+    open_store(STORAGE_BACKEND, os.path.join(workdir, STORE_DIR)).replace_all(history)
+    start = (pd.Timestamp(history["timestamp"].max()).normalize() + pd.offsets.BDay(1)).to_pydatetime()
+    recording = os.path.join(workdir, "recording.jsonl.gz")
+    write_recording(recording, synthetic_recording(start + timedelta(hours=9, minutes=15), ticks,
+                                                   strikes_per_side, n_expiries))
+
+    # A fresh interpreter per fixture: cold imports count, and peak RSS is this fixture's own.
+    result = subprocess.run([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "replay.py"),
+                             recording, "--workdir", workdir, "--plot-every", str(plot_every), "--quiet", "--json"],
+                            capture_output=True, text=True, env={**os.environ, "NSE_SYMBOLS": ",".join(SUITE_SYMBOLS)})
+    if result.returncode:
+        raise SystemExit(f"❌ Replay of {name} failed:\n{result.stderr[-2000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def calibrate(repeat=CALIBRATION_REPEAT):
+    # ms for a fixed mix of interpreter (JSON round trip of a full chain) and
+    # numpy work, the two things the pipeline's stages spend their time on.
+    chain = synthetic_option_chain("NIFTY", now=datetime(2025, 7, 24, 10, 0), strikes_per_side=100,
+                                   n_expiries=18, seed=7)
+    values = np.random.default_rng(0).random(1_000_000)
+
+    def work():
+        parse_option_chain(json.loads(json.dumps(chain)))
+        np.sort(values)
+
+    return round(timeit(work, repeat) * 1000, 2)
+
+
+def suite_regressions(name, current, baseline, tolerance, speed=1.0):
+    # {measure: human-readable line} for every measure worse than the baseline by more than tolerance.
+    # speed: this machine's calibration / the baseline's, applied to timings (not RSS).
+    found = {}
+
+    def check(label, now, before, higher_is_worse=True):
+        if not before or now is None:
+            return
+        change = (now - before) / before if higher_is_worse else (before - now) / before
+        if change > tolerance:
+            found[label] = f"{name}: {label} {now:g} vs {before:g} ({change:+.0%})"
+
+    check("ticks/sec", current["ticks_per_sec"], baseline["ticks_per_sec"] / speed, higher_is_worse=False)
+    check("tick p50 ms", current["tick_ms"]["p50"], baseline["tick_ms"]["p50"] * speed)
+    for stage, before in baseline["stages"].items():
+        if before["p50"] >= SUITE_MIN_MS and stage in current["stages"]:
+            check(f"{stage} p50 ms", current["stages"][stage]["p50"], before["p50"] * speed)
+    check("peak RSS MB", current["peak_rss_mb"], baseline.get("peak_rss_mb"))
+    check("plot worker peak RSS MB", current["peak_rss_workers_mb"], baseline.get("peak_rss_workers_mb"))
+    return found
+
+
+def measure_fixture(name, ticks, plot_every, shown):
+    strikes_per_side, n_expiries, history_days = SUITE_FIXTURES[name]
+    print(f"🔬 {name}: {2 * strikes_per_side + 1} strikes x {n_expiries} expiries per chain, "
+          f"{history_days} session(s) of history, {ticks} ticks")
+    calibration = calibrate()
+    with tempfile.TemporaryDirectory(prefix="nse-suite-") as workdir:
+        summary = run_fixture(name, workdir, ticks, plot_every)
+    # Right before and after the fixture: a shared machine's speed drifts over a whole suite.
+    summary["calibration_ms"] = round((calibration + calibrate()) / 2, 2)
+    slowest = sorted(summary["stages"].items(), key=lambda item: item[1]["p50"], reverse=True)[:shown]
+    print(f"   {summary['ticks_per_sec']:.2f} ticks/s, tick p50 {summary['tick_ms']['p50']:.0f} ms / "
+          f"p95 {summary['tick_ms']['p95']:.0f} ms, peak RSS {summary['peak_rss_mb']} MB "
+          f"(plot workers {summary['peak_rss_workers_mb']} MB), calibration {summary['calibration_ms']:.1f} ms")
+    print("   slowest stages (p50): " + ", ".join(f"{stage} {ms['p50']:.0f} ms" for stage, ms in slowest))
+    return summary
+
+
+def bench_suite(fixtures=None, ticks=30, plot_every=1, baseline_path=SUITE_BASELINE_PATH,
+                tolerance=SUITE_TOLERANCE, save_baseline=False, shown=4):
+    results = {name: measure_fixture(name, ticks, plot_every, shown) for name in fixtures or SUITE_FIXTURES}
+    if save_baseline:
+        with open(baseline_path, "w") as f:
+            json.dump({"ticks": ticks, "plot_every": plot_every, "cpus": os.cpu_count(), "fixtures": results},
+                      f, indent=1, sort_keys=True)
+        print(f"\n💾 Baseline saved to {baseline_path}")
+        return
+    if not os.path.exists(baseline_path):
+        print(f"\n⚠️ No baseline at {baseline_path}; run with --save-baseline to record one")
+        return
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    if (baseline.get("ticks"), baseline.get("plot_every")) != (ticks, plot_every):
+        print(f"⚠️ Baseline was recorded with --ticks {baseline.get('ticks')} --plot-every {baseline.get('plot_every')}")
+    recorded = {name: baseline["fixtures"][name] for name in results if name in baseline["fixtures"]}
+    comparable = (baseline.get("cpus") == os.cpu_count()
+                  and all(before.get("calibration_ms") for before in recorded.values()))
+    if not comparable:
+        print(f"⚠️ {baseline_path} was recorded without a calibration or on {baseline.get('cpus', '?')} CPU(s): "
+              f"differences are reported, not failed; regenerate it here with --save-baseline")
+
+    def compare(name):
+        before = recorded[name]
+        speed = results[name]["calibration_ms"] / before["calibration_ms"] if before.get("calibration_ms") else 1.0
+        return suite_regressions(name, results[name], before, tolerance, speed)
+
+    regressions = []
+    for name in recorded:
+        found = compare(name)
+        for _ in range(SUITE_CONFIRM_RUNS if comparable else 0):
+            if not found:
+                break
+            # A measure fails only if it is over again on a fresh run.
+            print(f"🔁 {name}: {len(found)} measure(s) over tolerance, re-running to confirm")
+            results[name] = measure_fixture(name, ticks, plot_every, shown)
+            found = {label: line for label, line in compare(name).items() if label in found}
+        regressions += found.values()
+    if regressions:
+        print(f"\n{'❌' if comparable else '⚠️'} {len(regressions)} regression(s) against {baseline_path} "
+              f"(tolerance {tolerance:.0%}):")
+        for line in regressions:
+            print(f"   {line}")
+        if comparable:
+            raise SystemExit(1)
+        return
+    print(f"\n✅ Within {tolerance:.0%} of {baseline_path} on every fixture")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="NSE IVP monitor benchmarks")
+    sub = parser.add_subparsers(dest="bench", required=True)
+    p = sub.add_parser("parser", help="option-chain parser vs the legacy list scans")
+    p.add_argument("--payload", help="recorded option-chain-indices JSON")
+    p.add_argument("--repeat", type=int, default=20)
+    p = sub.add_parser("recompute", help="vectorised recompute vs a tick-by-tick engine replay")
+    p.add_argument("--days", type=int, default=60)
+    p = sub.add_parser("plots", help="dashboard PNGs: legacy vs reusable figures / parallel / skip")
+    p.add_argument("--days", type=int, default=1, help="sessions of history in each plot")
+    p.add_argument("--repeat", type=int, default=3)
+    p = sub.add_parser("report", help="end-of-day PDF: every row vs downsampled, serial vs worker processes")
+    p.add_argument("--symbols", type=int, default=40)
+    p.add_argument("--ticks-per-day", type=int, default=3750, help="rows per symbol (375 = one a minute)")
+    p.add_argument("--workers", type=int)
+    p = sub.add_parser("greeks", help="batched Black-Scholes IV solver vs per-contract calls")
+    p.add_argument("--repeat", type=int, default=5)
+    p = sub.add_parser("api", help="concurrent dashboard clients against a running server.py")
+    p.add_argument("--url", default="http://127.0.0.1:8000")
+    p.add_argument("--clients", type=int, default=200)
+    p.add_argument("--seconds", type=int, default=10)
+    p = sub.add_parser("imports", help="runner cold-start import time and heavy modules per entry path")
+    p.add_argument("--repeat", type=int, default=5)
+    p = sub.add_parser("suite", help="recorded-tick replay of the whole pipeline per fixture, checked against a baseline")
+    p.add_argument("--fixture", action="append", choices=list(SUITE_FIXTURES), help="run only these (repeatable)")
+    p.add_argument("--ticks", type=int, default=30, help="replayed ticks per fixture")
+    p.add_argument("--plot-every", type=int, default=1, help="render the dashboards every N ticks")
+    p.add_argument("--baseline", default=SUITE_BASELINE_PATH)
+    p.add_argument("--tolerance", type=float, default=SUITE_TOLERANCE)
+    p.add_argument("--save-baseline", action="store_true", help="write this run as the baseline instead of comparing")
+    args = parser.parse_args()
+
+    if args.bench == "parser":
+        bench_parser(args.payload, args.repeat)
+    elif args.bench == "recompute":
+        bench_recompute(args.days)
+    elif args.bench == "plots":
+        bench_plots(args.days, args.repeat)
+    elif args.bench == "report":
+        bench_report(args.symbols, args.ticks_per_day, args.workers)
+    elif args.bench == "greeks":
+        bench_greeks(args.repeat)
+    elif args.bench == "api":
+        bench_api(args.url, args.clients, args.seconds)
+    elif args.bench == "imports":
+        bench_imports(args.repeat)
+    elif args.bench == "suite":
+        bench_suite(args.fixture, args.ticks, max(args.plot_every, 1), args.baseline, args.tolerance, args.save_baseline)
@@ -0,0 +1,302 @@
+# chain_capture.py
+# Optional full option-chain capture (CAPTURE_CHAINS): every strike of every
+# expiry, both sides, as typed columns in per-(symbol, day) files:
+#
+#   data/chains/NIFTY/2025-07-25.chain           zlib blocks, one per (snapshot, expiry)
+#   data/chains/NIFTY/2025-07-25.idx             fixed-size block records (np.memmap-able)
+#   data/chains/NIFTY/2025-07-25.expiries.json   expiry dictionary (code -> "31-Jul-2025")
+#
+# A block holds one expiry of one snapshot, rows in strike order. Columns
+# are int32 (strike in paise, OI, volumes, quantities) or float32 (prices,
+# IV); each column is byte-shuffled before compression, which is what makes
+# slowly-moving float32 columns compress well. Files are append-only: the
+# data block is written before its index record, so a crash mid-write only
+# leaves unreferenced bytes.
+#
+# Reading maps both files and decompresses only the blocks of the requested
+# expiry / time range:
+#
+#   reader = ChainReader("data/chains", "NIFTY", "2025-07-25")
+#   frame = reader.read("31-Jul-2025")            # one row per (snapshot, strike)
+#   for ts, spot, chain in reader.replay(): ...   # snapshot by snapshot
+#
+#   python chain_capture.py stats --symbol NIFTY --day 2025-07-25
+
+import os
+import json
+import mmap
+import zlib
+import calendar
+import argparse
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+from chain_parser import parse_option_chain
+
+STRIKE_SCALE = 100  # strikes stored as int32 paise, so 1247.5 survives
+COMPRESSION_LEVEL = 6
+INT32_MAX = np.iinfo(np.int32).max
+
+# column -> (side, NSE field, dtype)
+CAPTURE_FIELDS = {}
+for _side in ("CE", "PE"):
+    for _column, _field, _dtype in (
+        ("ltp", "lastPrice", np.float32),
+        ("change", "change", np.float32),
+        ("iv", "impliedVolatility", np.float32),
+        ("bid", "bidprice", np.float32),
+        ("ask", "askPrice", np.float32),
+        ("oi", "openInterest", np.int32),
+        ("chg_oi", "changeinOpenInterest", np.int32),
+        ("vol", "totalTradedVolume", np.int32),
+        ("bid_qty", "bidQty", np.int32),
+        ("ask_qty", "askQty", np.int32),
+        ("buy_qty", "totalBuyQuantity", np.int32),
+        ("sell_qty", "totalSellQuantity", np.int32),
+    ):
+        CAPTURE_FIELDS[f"{_side.lower()}_{_column}"] = (_side, _field, _dtype)
+COLUMNS = [("strike", np.int32)] + [(column, dtype) for column, (_, _, dtype) in CAPTURE_FIELDS.items()]
+
+INDEX_DTYPE = np.dtype([
+    ("ts", "<i8"),       # capture time, epoch seconds
+    ("nse_ts", "<i8"),   # records.timestamp, epoch seconds (0 if missing)
+    ("spot", "<f8"),
+    ("expiry", "<i2"),   # code in the expiries dictionary
+    ("rows", "<i4"),
+    ("offset", "<i8"),
+    ("length", "<i4"),
+])
+
+
+def _epoch(value, fmt):
+    # Wall-clock IST strings stored as naive epoch seconds (no tz shift), so
+    # pd.to_datetime(..., unit="s") gives the same wall-clock time back.
+    try:
+        return calendar.timegm(datetime.strptime(value, fmt).timetuple())
+    except (TypeError, ValueError):
+        return 0
+
+
+def shuffle(array):
+    # Byte-transposes a column: all first bytes, then all second bytes, ...
+    return np.ascontiguousarray(array.view(np.uint8).reshape(-1, array.itemsize).T).tobytes()
+
+
+def unshuffle(buffer, dtype, rows):
+    itemsize = np.dtype(dtype).itemsize
+    planes = np.frombuffer(buffer, dtype=np.uint8, count=rows * itemsize).reshape(itemsize, rows)
+    return np.ascontiguousarray(planes.T).view(dtype).reshape(rows)
+
+
+def chain_columns(expiry_chain):
+    # Typed columns for one expiry of a ParsedChain, in strike order.
+    items = expiry_chain.items
+    rows = len(items)
+    columns = {"strike": np.rint(np.asarray(expiry_chain.strike, dtype=np.float64) * STRIKE_SCALE).astype(np.int32)}
+    for column, (side, field, dtype) in CAPTURE_FIELDS.items():
+        if dtype is np.float32:
+            values = np.fromiter(((item.get(side) or {}).get(field, np.nan) for item in items),
+                                 dtype=np.float64, count=rows)
+            # A missing side is NaN rather than NSE's 0, so it can't be mistaken for a quote.
+            missing = np.fromiter((side not in item for item in items), dtype=bool, count=rows)
+            values[missing] = np.nan
+            columns[column] = values.astype(np.float32)
+        else:
+            values = np.fromiter(((item.get(side) or {}).get(field, 0) or 0 for item in items),
+                                 dtype=np.int64, count=rows)
+            columns[column] = np.clip(values, -INT32_MAX, INT32_MAX).astype(np.int32)
+    return columns
+
+
+def encode_block(columns):
+    return zlib.compress(b"".join(shuffle(columns[name]) for name, _ in COLUMNS), COMPRESSION_LEVEL)
+
+
+def decode_block(buffer, rows):
+    raw = zlib.decompress(buffer)
+    columns, position = {}, 0
+    for name, dtype in COLUMNS:
+        size = rows * np.dtype(dtype).itemsize
+        columns[name] = unshuffle(raw[position:position + size], dtype, rows)
+        position += size
+    return columns
+
+
+def _load_json(path, default):
+    if not os.path.exists(path):
+        return default
+    with open(path) as f:
+        return json.load(f)
+
+
+def day_paths(root, symbol, day):
+    base = os.path.join(root, symbol.upper(), day)
+    return f"{base}.chain", f"{base}.idx", f"{base}.expiries.json"
+
+
+# -----------------------------------------
+# ✅ WRITER
+# -----------------------------------------
+class ChainCapture:
+    def __init__(self, root):
+        self.root = root
+        self._expiries = {}  # (symbol, day) -> [expiry, ...]
+
+    def _dictionary(self, symbol, day, path):
+        key = (symbol, day)
+        if key not in self._expiries:
+            self._expiries[key] = _load_json(path, [])
+        return self._expiries[key]
+
+    def write(self, symbol, timestamp, data):
+        # timestamp: the row's "%Y-%m-%d %H:%M:%S" IST string. Returns bytes written.
+        chain = parse_option_chain(data)
+        day = timestamp[:10]
+        data_path, index_path, dict_path = day_paths(self.root, symbol, day)
+        os.makedirs(os.path.dirname(data_path), exist_ok=True)
+        expiries = self._dictionary(symbol, day, dict_path)
+        new_expiry = False
+
+        blocks, records = [], []
+        offset = os.path.getsize(data_path) if os.path.exists(data_path) else 0
+        ts = _epoch(timestamp, "%Y-%m-%d %H:%M:%S")
+        nse_ts = _epoch(chain.timestamp, "%d-%b-%Y %H:%M:%S")
+        for expiry in chain.expiries:
+            expiry_chain = chain.chains.get(expiry)
+            if expiry_chain is None or not len(expiry_chain):
+                continue
+            if expiry not in expiries:
+                expiries.append(expiry)
+                new_expiry = True
+            block = encode_block(chain_columns(expiry_chain))
+            records.append((ts, nse_ts, chain.spot or np.nan, expiries.index(expiry), len(expiry_chain),
+                            offset, len(block)))
+            blocks.append(block)
+            offset += len(block)
+        if not blocks:
+            return 0
+
+        if new_expiry:
+            tmp_path = f"{dict_path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(expiries, f)
+            os.replace(tmp_path, dict_path)
+        with open(data_path, "ab") as f:
+            f.write(b"".join(blocks))
+        with open(index_path, "ab") as f:
+            f.write(np.array(records, dtype=INDEX_DTYPE).tobytes())
+        return sum(len(b) for b in blocks) + len(records) * INDEX_DTYPE.itemsize
+
+
+# -----------------------------------------
+# ✅ READER
+# -----------------------------------------
+class ChainReader:
+    def __init__(self, root, symbol, day):
+        self.symbol = symbol.upper()
+        self.day = day
+        data_path, index_path, dict_path = day_paths(root, symbol, day)
+        self.expiry_names = _load_json(dict_path, [])
+        if os.path.exists(index_path) and os.path.getsize(index_path) >= INDEX_DTYPE.itemsize:
+            count = os.path.getsize(index_path) // INDEX_DTYPE.itemsize
+            self.index = np.memmap(index_path, dtype=INDEX_DTYPE, mode="r", shape=(count,))
+        else:
+            self.index = np.zeros(0, dtype=INDEX_DTYPE)
+        self._file = open(data_path, "rb") if len(self.index) else None
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self._file else None
+
+    def close(self):
+        if self._data is not None:
+            self._data.close()
+            self._file.close()
+            self._data = self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def expiries(self):
+        return list(self.expiry_names)
+
+    def snapshots(self):
+        ts, first = np.unique(self.index["ts"], return_index=True)
+        return pd.DataFrame({
+            "timestamp": pd.to_datetime(ts, unit="s"),
+            "nse_timestamp": pd.to_datetime(self.index["nse_ts"][first], unit="s"),
+            "spot": self.index["spot"][first],
+        })
+
+    def _blocks(self, expiry=None, start=None, end=None):
+        mask = np.ones(len(self.index), dtype=bool)
+        if expiry is not None:
+            if expiry not in self.expiry_names:
+                return np.zeros(0, dtype=INDEX_DTYPE)
+            mask &= self.index["expiry"] == self.expiry_names.index(expiry)
+        if start is not None:
+            mask &= self.index["ts"] >= int(pd.Timestamp(start).timestamp())
+        if end is not None:
+            mask &= self.index["ts"] <= int(pd.Timestamp(end).timestamp())
+        return self.index[mask]
+
+    def _decode(self, record):
+        start = int(record["offset"])
+        return decode_block(self._data[start:start + int(record["length"])], int(record["rows"]))
+
+    def read(self, expiry, start=None, end=None):
+        # One row per (snapshot, strike) of a single expiry; strike in rupees.
+        blocks = self._blocks(expiry, start, end)
+        if not len(blocks):
+            return pd.DataFrame(columns=["timestamp", "spot"] + [name for name, _ in COLUMNS])
+        parts = [self._decode(record) for record in blocks]
+        rows = blocks["rows"].astype(np.int64)
+        frame = pd.DataFrame({name: np.concatenate([p[name] for p in parts]) for name, _ in COLUMNS})
+        frame["strike"] = frame["strike"] / STRIKE_SCALE
+        frame.insert(0, "spot", np.repeat(blocks["spot"], rows))
+        frame.insert(0, "timestamp", pd.to_datetime(np.repeat(blocks["ts"], rows), unit="s"))
+        return frame
+
+    def replay(self, expiry=None, start=None, end=None):
+        # Yields (timestamp, spot, {expiry: columns}) per snapshot, in capture order.
+        blocks = self._blocks(expiry, start, end)
+        if not len(blocks):
+            return
+        boundaries = np.flatnonzero(np.diff(blocks["ts"])) + 1
+        for group in np.split(np.arange(len(blocks)), boundaries):
+            first = blocks[group[0]]
+            chain = {}
+            for i in group:
+                columns = self._decode(blocks[i])
+                columns["strike"] = columns["strike"] / STRIKE_SCALE
+                chain[self.expiry_names[int(blocks[i]["expiry"])]] = columns
+            yield pd.Timestamp(int(first["ts"]), unit="s"), float(first["spot"]), chain
+
+
+def captured_days(root, symbol):
+    folder = os.path.join(root, symbol.upper())
+    if not os.path.isdir(folder):
+        return []
+    return sorted(name[:-len(".idx")] for name in os.listdir(folder) if name.endswith(".idx"))
+
+
+if __name__ == "__main__":
+    from config import CHAIN_DIR
+
+    parser = argparse.ArgumentParser(description="Full option-chain capture files")
+    parser.add_argument("--root", default=CHAIN_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("stats", help="snapshots, expiries and bytes per captured day")
+    p.add_argument("--symbol", default="NIFTY")
+    p.add_argument("--day", help="default: every captured day")
+    args = parser.parse_args()
+
+    for day in [args.day] if args.day else captured_days(args.root, args.symbol):
+        data_path, index_path, _ = day_paths(args.root, args.symbol, day)
+        with ChainReader(args.root, args.symbol, day) as reader:
+            size = sum(os.path.getsize(p) for p in (data_path, index_path) if os.path.exists(p))
+            raw = int(reader.index["rows"].sum()) * sum(np.dtype(d).itemsize for _, d in COLUMNS)
+            print(f"📦 {args.symbol.upper()} {day}: {len(reader.snapshots())} snapshots, "
+                  f"{len(reader.expiries())} expiries, {int(reader.index['rows'].sum())} rows, "
+                  f"{size / 1e6:.2f} MB on disk ({raw / max(size, 1):.1f}x vs raw arrays)")
@@ -0,0 +1,141 @@
+# chain_parser.py
+# One pass over an option-chain-indices payload, grouped per expiry. Each
+# expiry lazily gets a sorted strike array (and numpy field columns when
+# asked), so ATM lookup is a binary search and any (expiry, strike) cell is
+# an index instead of a scan of records.data.
+
+from datetime import datetime
+from functools import lru_cache
+import numpy as np
+
+# Output column -> (side, NSE field). Prices/IV are float64, counts int64.
+FIELDS = {
+    "ce_ltp": ("CE", "lastPrice"),
+    "pe_ltp": ("PE", "lastPrice"),
+    "ce_vol": ("CE", "totalTradedVolume"),
+    "pe_vol": ("PE", "totalTradedVolume"),
+    "ce_iv": ("CE", "impliedVolatility"),
+    "pe_iv": ("PE", "impliedVolatility"),
+    "ce_oi": ("CE", "openInterest"),
+    "pe_oi": ("PE", "openInterest"),
+}
+INT_FIELDS = {"ce_vol", "pe_vol", "ce_oi", "pe_oi"}
+
+
+@lru_cache(maxsize=512)
+def parse_expiry(expiry):
+    return datetime.strptime(expiry, "%d-%b-%Y").date()
+
+
+class ExpiryChain:
+    __slots__ = ("expiry", "_items", "_strike", "_columns")
+
+    def __init__(self, expiry, items):
+        self.expiry = expiry
+        self._items = items
+        self._strike = None
+        self._columns = None
+
+    def __len__(self):
+        return len(self._items)
+
+    def _index(self):
+        strike = np.array([item['strikePrice'] for item in self._items])
+        if len(strike) > 1 and not np.all(strike[1:] >= strike[:-1]):
+            order = np.argsort(strike, kind="stable")
+            strike = strike[order]
+            self._items = [self._items[i] for i in order]
+        self._strike = strike
+
+    @property
+    def strike(self):
+        # Ascending strike array, built the first time this expiry is used.
+        if self._strike is None:
+            self._index()
+        return self._strike
+
+    @property
+    def items(self):
+        # NSE records in strike order: row i <-> strike[i].
+        if self._strike is None:
+            self._index()
+        return self._items
+
+    @property
+    def columns(self):
+        # Field arrays are only materialised for expiries that need them
+        # (IV solving, capture); ATM rows read straight from the records.
+        if self._columns is None:
+            columns = {}
+            for column, (side, key) in FIELDS.items():
+                dtype = np.int64 if column in INT_FIELDS else np.float64
+                columns[column] = np.fromiter(
+                    ((item.get(side) or {}).get(key, 0) or 0 for item in self.items), dtype=dtype, count=len(self.items)
+                )
+            self._columns = columns
+        return self._columns
+
+    def __getitem__(self, column):
+        return self.columns[column]
+
+    def atm_index(self, spot):
+        # Nearest strike to spot; on an exact tie the lower strike wins, as
+        # min(strikes, key=abs distance) did over NSE's ascending strike list.
+        i = int(np.searchsorted(self.strike, spot))
+        if i == 0:
+            return 0
+        if i == len(self.strike):
+            return i - 1
+        return i - 1 if spot - self.strike[i - 1] <= self.strike[i] - spot else i
+
+    def index_of(self, strike):
+        i = int(np.searchsorted(self.strike, strike))
+        if i < len(self.strike) and self.strike[i] == strike:
+            return i
+        return None
+
+    def row(self, i):
+        item = self.items[i]
+        values = {"strike": item['strikePrice']}
+        for column, (side, key) in FIELDS.items():
+            values[column] = (item.get(side) or {}).get(key, 0) or 0
+        return values
+
+
+class ParsedChain:
+    def __init__(self, spot, timestamp, expiries, chains):
+        self.spot = spot
+        self.timestamp = timestamp
+        self.expiries = expiries  # sorted by date, as listed in records.expiryDates
+        self.chains = chains  # expiry -> ExpiryChain
+
+    def nearest_expiries(self, count):
+        return [e for e in self.expiries if e in self.chains][:count]
+
+    def atm(self, expiry):
+        chain = self.chains[expiry]
+        return chain.row(chain.atm_index(self.spot))
+
+    def lookup(self, expiry, strike):
+        chain = self.chains.get(expiry)
+        i = chain.index_of(strike) if chain is not None else None
+        return chain.row(i) if i is not None else None
+
+
+# -----------------------------------------
+# ✅ SINGLE-PASS PARSE
+# -----------------------------------------
+def parse_option_chain(data):
+    records = data['records']
+    groups = {}
+    for item in records['data']:
+        expiry = item['expiryDate']
+        group = groups.get(expiry)
+        if group is None:
+            groups[expiry] = group = []
+        group.append(item)
+
+    chains = {expiry: ExpiryChain(expiry, items) for expiry, items in groups.items()}
+
+    expiries = sorted(records.get('expiryDates') or chains.keys(), key=parse_expiry)
+    return ParsedChain(records['underlyingValue'], records.get('timestamp'), expiries, chains)
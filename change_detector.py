@@ -0,0 +1,109 @@
+# change_detector.py
+# Decides whether a tick brought new NSE data. Each fetched option chain is
+# fingerprinted by NSE's own records.timestamp plus a hash of the fields
+# the row stage reads (spot, strikes, expiries, LTP/volume/IV/OI per leg);
+# when every chain matches the fingerprint of the last written row (weekend
+# and pre-open runs, NSE serving the previous close) the tick is skipped:
+# no row, no VWAP/IVP samples, no alerts, no plots.
+#
+# Fingerprints and the skipped-tick counter are kept in a small JSON file,
+# so one-shot runs compare against the previous run.
+
+import os
+import json
+import hashlib
+from array import array
+from datetime import datetime
+
+# Per-leg NSE fields the row stage reads (chain_parser.FIELDS); the rest of
+# the payload (bid/ask, changes) is not hashed.
+LEG_FIELDS = ("lastPrice", "totalTradedVolume", "impliedVolatility", "openInterest")
+
+
+def chain_values(records):
+    yield records.get("underlyingValue") or 0
+    for item in records.get("data") or ():
+        yield item.get("strikePrice") or 0
+        for side in ("CE", "PE"):
+            leg = item.get(side) or {}
+            for key in LEG_FIELDS:
+                yield leg.get(key) or 0
+
+
+def chain_fingerprint(data):
+    # Packed float64s of the used fields plus the expiry labels: a few ms on
+    # a full 18-expiry chain, where json.dumps of the whole payload took ~100.
+    records = data.get("records") or {}
+    digest = hashlib.sha1()
+    try:
+        digest.update(array("d", chain_values(records)).tobytes())
+    except (TypeError, ValueError):  # a non-numeric field ("-"): hash its text instead
+        digest.update(json.dumps(list(chain_values(records)), separators=(",", ":")).encode())
+    digest.update("|".join(str(item.get("expiryDate")) for item in records.get("data") or ()).encode())
+    return {
+        "timestamp": records.get("timestamp"),
+        "hash": digest.hexdigest(),
+    }
+
+
+class ChangeDetector:
+    def __init__(self, state_path=None):
+        self.state_path = state_path
+        self.fingerprints = {}
+        self.skipped_ticks = 0
+        self.last_skip = None
+        self._load_state()
+
+    def _load_state(self):
+        if not self.state_path or not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path) as f:
+                state = json.load(f)
+            self.fingerprints = dict(state.get("fingerprints", {}))
+            self.skipped_ticks = int(state.get("skipped_ticks", 0))
+            self.last_skip = state.get("last_skip")
+        except (OSError, ValueError, AttributeError, TypeError):
+            pass
+
+    def _save_state(self):
+        if not self.state_path:
+            return
+        state = {"fingerprints": self.fingerprints, "skipped_ticks": self.skipped_ticks,
+                 "last_skip": self.last_skip}
+        try:
+            os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+            tmp_path = f"{self.state_path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.state_path)
+        except OSError as e:
+            print(f"⚠️ Could not save change-detection state: {e}")
+
+    # -----------------------------------------
+    # ✅ CHECK / COMMIT / SKIP
+    # -----------------------------------------
+    def check(self, chains):
+        # chains: {symbol: payload or None}. Returns (changed, fingerprints);
+        # a tick counts as unchanged only if every chain that arrived matches.
+        fingerprints = {symbol: chain_fingerprint(data) for symbol, data in chains.items() if data}
+        if not fingerprints:
+            return True, fingerprints
+        return bool(self.changed(fingerprints)), fingerprints
+
+    def changed(self, fingerprints):
+        # Symbols whose chain differs from the one last written.
+        return [symbol for symbol, fp in fingerprints.items() if self.fingerprints.get(symbol) != fp]
+
+    def commit(self, fingerprints):
+        # Called once the row built from these chains has been written.
+        self.fingerprints.update(fingerprints)
+        self._save_state()
+
+    def record_skip(self, fingerprints):
+        self.skipped_ticks += 1
+        self.last_skip = datetime.now().isoformat(timespec="seconds")
+        self._save_state()
+        nse_times = sorted({fp["timestamp"] for fp in fingerprints.values() if fp["timestamp"]})
+        print(f"⏭️ NSE data unchanged since {', '.join(nse_times) or 'last tick'}, "
+              f"skipping this tick (skipped ticks: {self.skipped_ticks})")
@@ -0,0 +1,33 @@
+# config.py
+# Settings shared by the live runner and the offline tools (recompute.py,
+# storage.py), so both compute the same derived columns from the same store.
+
+import os
+
+STATIC_DIR = "static"
+REPORTS_DIR = "reports"  # daily PDFs from eod_report.py, served by server.py
+CSV_FILENAME = os.path.join(STATIC_DIR, "atm_straddle_combined.csv")  # dashboard download (export)
+STORE_DIR = os.path.join("data", "store")
+SYMBOL_STORE_DIR = os.path.join("data", "symbols")  # one store per symbol group outside "main" (symbols.py)
+STORAGE_BACKEND = os.getenv("NSE_STORAGE_BACKEND", "parquet")  # parquet | sqlite | csv
+EXPORT_CSV = True
+CHAIN_DIR = os.path.join("data", "chains")  # full option-chain capture (chain_capture.py)
+EVENTS_DIR = os.path.join("data", "events")  # row/alert feed tailed by server.py for SSE (event_log.py)
+RECORDINGS_DIR = os.path.join("data", "recordings")  # raw NSE payloads per tick with NSE_RECORD=1 (recorder.py)
+RUNS_DIR = os.path.join(".runlog", "runs")  # one JSON line of timings/counters per run, /metrics in server.py (metrics.py)
+COOKIE_CACHE_PATH = os.path.join(".runlog", "nse_cookies.json")  # NSE session cookies (nse_session.py)
+HOLIDAY_CACHE_PATH = os.path.join("data", "nse_holidays.json")  # fetched once per year, committed with data/ (trading_calendar.py)
+
+LOOKBACK = 30  # ticks in the primary VWAP/IVP window ({label}_vwap, {label}_ivp)
+IVP_EXTRA_WINDOWS = {}  # e.g. {"1d": "1d", "20d": "20d", "252d": "252d"} adds {label}_vwap_20d, {label}_ivp_20d, ...
+IVP_WINDOWS = {"": LOOKBACK, **IVP_EXTRA_WINDOWS}
+HISTORY_SESSIONS = 5  # sessions each table keeps in memory for the live plots; longer "Nd" IVP windows extend it
+
+# Alert thresholds (tune with `python backtest.py` before changing)
+VIX_HIGH = 16
+VIX_LOW = 10
+IVP_HIGH = 90
+IVP_LOW = 10
+VWAP_FACTOR_HIGH = 1.5
+VWAP_FACTOR_LOW = 0.5
+ALERT_COOLDOWN = 15 * 60  # seconds before the same condition (e.g. nifty_curr IVP high) alerts again
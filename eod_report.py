@@ -0,0 +1,187 @@
+# eod_report.py
+# End-of-day PDF: one page per symbol with the dashboard's three panels
+# (VIX & IV, spot vs straddle premium & VWAP, spot vs IVP%) and the day's
+# alerts marked where they fired, written to REPORTS_DIR/<day>.pdf and copied
+# to REPORTS_DIR/latest.pdf (the dashboard's download link).
+#
+# Built once after the close, not every tick: each table's day partition is
+# read once, dense series are bucket-averaged down to what a printed page can
+# show, and the figures are built in parallel worker processes and pickled
+# back; the parent writes them as vector pages with matplotlib's PdfPages
+# (the only serial step, and the cheap one at REPORT_POINTS per series).
+#
+#   python eod_report.py                                # today's IST session
+#   python eod_report.py --date 2025-07-22 --symbols all
+
+import os
+import json
+import time
+import shutil
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from plot_renderer import SERIES, SymbolFigure, series_column, symbol_data, pool_context  # sets the Agg backend
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_pdf import PdfPages
+import matplotlib.dates as mdates
+from storage import open_store, downsample
+from symbols import active_symbols, group_paths
+from market_hours import IST
+from config import REPORTS_DIR, EVENTS_DIR, STORAGE_BACKEND
+
+REPORT_POINTS = 1000  # samples per series, about one per pixel column of a panel
+REPORT_WORKERS = 4  # page renderer processes
+LATEST_REPORT = "latest.pdf"
+
+# alert key "ivp:nifty_curr:high" -> panel 2 of the NIFTY page; "vix:high" -> panel 0 of every page
+MARKER_PANELS = {"vix": 0, "vwap": 1, "ivp": 2}
+MARKER_COLORS = {"high": "red", "above": "red", "low": "green", "below": "green"}
+
+# -----------------------------------------
+# ✅ INPUTS (one read per table, the day's alert events)
+# -----------------------------------------
+def read_day(day, specs):
+    # {prefix: frame of that symbol's table on `day`}; only the plotted columns.
+    tables = {}
+    for spec in specs:
+        tables.setdefault(spec["group"], []).append(spec)
+    frames = {}
+    for group, group_specs in tables.items():
+        columns = ["india_vix"] + [series_column(spec["prefix"], suffix)
+                                   for spec in group_specs for _, _, suffix, _, _ in SERIES if suffix != "india_vix"]
+        store = open_store(STORAGE_BACKEND, group_paths(group)[0])
+        df = store.read(f"{day} 00:00:00", f"{day} 23:59:59", columns=list(dict.fromkeys(columns)))
+        if df.empty:
+            continue
+        df = df.sort_values("timestamp").reset_index(drop=True)
+        df["india_vix"] = df["india_vix"].ffill()
+        frames.update({spec["prefix"]: df for spec in group_specs})
+    return frames
+
+
+def alert_markers(day, prefixes):
+    # {prefix: [(panel, x, label, color)]} from the day's "alert" events (event_log.py).
+    markers = {prefix: [] for prefix in prefixes}
+    try:
+        with open(os.path.join(EVENTS_DIR, f"{day}.jsonl"), encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return markers
+    for line in lines:
+        try:
+            event = json.loads(line)
+        except ValueError:
+            continue
+        if event.get("type") != "alert":
+            continue
+        parts = str(event["data"].get("key", "")).split(":")
+        if parts[0] not in MARKER_PANELS or len(parts) < 2:
+            continue
+        x = mdates.date2num(datetime.fromisoformat(event["time"]).replace(tzinfo=None))
+        direction = parts[-1]
+        if parts[0] == "vix":
+            targets, label = list(markers), f"VIX {direction}"
+        else:
+            prefix, _, slot = parts[1].rpartition("_")
+            targets, label = [prefix] if prefix in markers else [], f"{slot} {parts[0].upper()} {direction}"
+        for prefix in targets:
+            markers[prefix].append((MARKER_PANELS[parts[0]], x, label, MARKER_COLORS.get(direction, "gray")))
+    return markers
+
+# -----------------------------------------
+# ✅ ONE PAGE (built in a worker process)
+# -----------------------------------------
+def build_page(prefix, title, data, markers):
+    # Returns the finished Figure; the pool pickles it back to the parent,
+    # which only has to write its vectors into the PDF.
+    figure = SymbolFigure(prefix, title)
+    figure.update(data)
+    for panel, x, label, color in markers:
+        ax = figure.axes[(panel, "left")]
+        ax.axvline(x, color=color, linewidth=1, linestyle=":", alpha=0.8)
+        ax.annotate(label, xy=(x, 0.98), xycoords=("data", "axes fraction"), rotation=90,
+                    va="top", ha="right", fontsize=7, color=color)
+    plt.close(figure.fig)  # off pyplot's books, here and once unpickled in the parent
+    return figure.fig
+
+
+def write_pdf(figures, pdf_path):
+    # Vector pages via matplotlib's PDF backend, written to a temp file first
+    # so latest.pdf never points at a half-written report.
+    os.makedirs(os.path.dirname(pdf_path) or ".", exist_ok=True)
+    tmp_path = f"{pdf_path}.tmp"
+    with PdfPages(tmp_path) as pdf:
+        for fig in figures:
+            pdf.savefig(fig)
+    os.replace(tmp_path, pdf_path)
+
+# -----------------------------------------
+# ✅ REPORT (parallel pages -> one PDF)
+# -----------------------------------------
+def build_report(frames, titles, markers, pdf_path, workers=REPORT_WORKERS, points=REPORT_POINTS):
+    # frames: {prefix: frame}, titles: {prefix: page title}, markers: alert_markers().
+    # Returns the number of pages written.
+    jobs = []
+    for prefix, title in titles.items():
+        frame = frames.get(prefix)
+        if frame is None or frame.empty:
+            continue
+        columns = ["timestamp"] + [c for c in dict.fromkeys(series_column(prefix, s) for _, _, s, _, _ in SERIES)
+                                   if c in frame.columns]
+        jobs.append((prefix, title, symbol_data(downsample(frame[columns], points), prefix), markers.get(prefix, [])))
+
+    if workers > 1 and len(jobs) > 1:
+        # forkserver workers, as in plot_renderer.py (the daemon's threads are running)
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs)),
+                                 mp_context=pool_context(("plot_renderer", "eod_report"))) as pool:
+            futures = [pool.submit(build_page, *job) for job in jobs]
+            pages = []
+            for (_, title, _, _), future in zip(jobs, futures):
+                try:
+                    pages.append(future.result())
+                except Exception as e:
+                    print(f"❌ {title} page failed: {e}")
+    else:
+        pages = [build_page(*job) for job in jobs]
+    if pages:
+        write_pdf(pages, pdf_path)
+    return len(pages)
+
+
+def build_day_report(day=None, selection=None, workers=REPORT_WORKERS, points=REPORT_POINTS, reports_dir=REPORTS_DIR):
+    day = day or datetime.now(IST).strftime("%Y-%m-%d")
+    started = time.perf_counter()
+    specs = active_symbols(selection)
+    frames = read_day(day, specs)
+    if not frames:
+        # Weekday holidays and closed days: nothing to report, not a failure.
+        print(f"⚠️ No data for {day}, no report")
+        return None
+    markers = alert_markers(day, [spec["prefix"] for spec in specs])
+    titles = {spec["prefix"]: f"{spec['name']} {day}" for spec in specs}
+    pdf_path = os.path.join(reports_dir, f"{day}.pdf")
+    pages = build_report(frames, titles, markers, pdf_path, workers, points)
+    if not pages:
+        raise RuntimeError(f"no pages rendered for {day}")
+    shutil.copyfile(pdf_path, os.path.join(reports_dir, LATEST_REPORT))
+    print(f"✅ PDF Saved: {pdf_path} ({pages} pages, {sum(map(len, markers.values()))} alert markers, "
+          f"{time.perf_counter() - started:.1f}s)")
+    return pdf_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="End-of-day PDF report from the snapshot stores")
+    parser.add_argument("--date", help="IST session day, YYYY-MM-DD (default: today)")
+    parser.add_argument("--symbols", help="NSE_SYMBOLS-style selection, e.g. NIFTY,RELIANCE or all")
+    parser.add_argument("--workers", type=int, default=REPORT_WORKERS)
+    parser.add_argument("--points", type=int, default=REPORT_POINTS, help="samples per series on a page")
+    parser.add_argument("--out", default=REPORTS_DIR)
+    args = parser.parse_args()
+
+    # Exit 1 only when a report was due and could not be built; a day without
+    # rows (the 15:30 cron on a weekday holiday) exits 0.
+    try:
+        build_day_report(args.date, args.symbols, max(args.workers, 1), args.points, args.out)
+    except Exception as e:
+        print(f"❌ End-of-day report failed: {e}")
+        raise SystemExit(1)
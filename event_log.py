@@ -0,0 +1,86 @@
+# event_log.py
+# Append-only JSON-lines feed of what the runner has persisted: one "row"
+# event per symbol once its row is in the store, one "alert" event per alert
+# that passed the cooldown. One file per IST day under EVENTS_DIR.
+#
+# server.py tails these files and pushes every new line to the dashboards
+# over Server-Sent Events (/api/stream). Event ids are increasing
+# millisecond timestamps, so a reconnecting client can send Last-Event-ID
+# and get exactly what it missed.
+
+import os
+import json
+import math
+import time
+import threading
+from datetime import datetime
+from pytz import timezone
+
+IST = timezone("Asia/Kolkata")
+
+
+def json_default(value):
+    # numpy scalars from the parsed chains
+    return value.item() if hasattr(value, "item") else str(value)
+
+
+def clean(value):
+    # NaN is not valid JSON for the browser's JSON.parse.
+    return None if isinstance(value, float) and math.isnan(value) else value
+
+
+def symbol_delta(row, spec):
+    # The slice of a combined row that belongs to one symbol, keyed like the
+    # /api/series columns ("curr_straddle", "cm_iv_30d", ...).
+    prefix = f"{spec['prefix']}_"
+    columns = {key[len(prefix):]: clean(value) for key, value in row.items() if key.startswith(prefix)}
+    if not columns:
+        return None
+    if "india_vix" in row:
+        columns["india_vix"] = clean(row["india_vix"])
+    return {"symbol": spec["name"], "timestamp": row["timestamp"], "columns": columns}
+
+
+class EventLog:
+    def __init__(self, root):
+        self.root = root
+        self.day = None
+        self.file = None
+        self.last_id = 0
+        self.lock = threading.Lock()
+
+    def path(self, day):
+        return os.path.join(self.root, f"{day}.jsonl")
+
+    def publish(self, kind, data):
+        with self.lock:
+            # ms timestamps, forced strictly increasing within the process
+            event_id = max(int(time.time() * 1000), self.last_id + 1)
+            self.last_id = event_id
+            now = datetime.now(IST)
+            day = now.strftime("%Y-%m-%d")
+            if day != self.day:
+                self._open(day)
+            line = json.dumps({"id": event_id, "type": kind, "time": now.isoformat(timespec="seconds"),
+                               "data": data}, separators=(",", ":"), default=json_default)
+            try:
+                # Flushed per line; the tailing reader only consumes complete lines.
+                self.file.write(line + "\n")
+                self.file.flush()
+            except OSError as e:
+                print(f"⚠️ Could not write {kind} event: {e}")
+            return event_id
+
+    def _open(self, day):
+        if self.file is not None:
+            self.file.close()
+        os.makedirs(self.root, exist_ok=True)
+        self.file = open(self.path(day), "a", encoding="utf-8")
+        self.day = day
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+                self.day = None
@@ -0,0 +1,90 @@
+# fetch_stage.py
+# Runs every data source of a tick (India VIX, one option chain per symbol)
+# concurrently on a bounded thread pool and returns whatever arrived by the
+# stage deadline, so one slow endpoint can't hold back the rest of the row.
+
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+# Per-source view of the stage deadline, handed to every fetch callable.
+class FetchContext:
+    def __init__(self, name, deadline, cancelled):
+        self.name = name
+        self.deadline = deadline
+        self.cancelled = cancelled
+
+    def remaining(self):
+        return max(0.0, self.deadline - time.monotonic())
+
+    def expired(self):
+        return self.cancelled.is_set() or self.remaining() <= 0
+
+    def backoff(self, seconds):
+        # Waits on the cancel event instead of time.sleep, so a retry never
+        # outlives the stage deadline and wakes up as soon as the stage ends.
+        delay = min(seconds, self.remaining())
+        if delay > 0:
+            self.cancelled.wait(delay)
+        return not self.expired()
+
+
+class FetchStage:
+    def __init__(self, max_workers=8):
+        self.max_workers = max_workers
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fetch")
+
+    # sources: {name: fn(ctx)}. Returns (results, elapsed) where results only
+    # holds sources that returned a non-None value before their own timeout
+    # (timeouts[name]) and the overall stage deadline. A source past its own
+    # timeout is dropped while the others keep running, and its ctx reports
+    # expired(), so its retries and browser fallback stop too.
+    def run(self, sources, deadline, timeouts=None):
+        timeouts = timeouts or {}
+        started = time.monotonic()
+        stage_deadline = started + deadline
+        deadlines = {name: min(stage_deadline, started + timeouts.get(name, deadline)) for name in sources}
+        cancelled = threading.Event()
+        elapsed = {}
+
+        def call(name, fn):
+            ctx = FetchContext(name, deadlines[name], cancelled)
+            try:
+                return fn(ctx)
+            except Exception as e:
+                print(f"❗️ {name} fetch error: {e}")
+                return None
+            finally:
+                elapsed[name] = time.monotonic() - started
+
+        futures = {self.executor.submit(call, name, fn): name for name, fn in sources.items()}
+        results = {}
+        pending = set(futures)
+        late = []
+        while pending:
+            now = time.monotonic()
+            overdue = {f for f in pending if not f.done() and deadlines[futures[f]] <= now}
+            for future in overdue:
+                name = futures[future]
+                if deadlines[name] < stage_deadline:
+                    print(f"⚠️ {name} timeout ({timeouts[name]}s) hit, continuing without it")
+                else:
+                    late.append(name)
+            pending -= overdue
+            if not pending:
+                break
+            remaining = min(deadlines[futures[f]] for f in pending) - now
+            done, pending = wait(pending, timeout=max(remaining, 0), return_when=FIRST_COMPLETED)
+            for future in done:
+                value = future.result()
+                if value is not None:
+                    results[futures[future]] = value
+
+        cancelled.set()  # every source has a result or is past its deadline
+        if late:
+            print(f"⚠️ Fetch deadline ({deadline}s) hit, continuing without: {', '.join(sorted(late))}")
+        return results, elapsed
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,215 @@
+# greeks.py
+# Black-Scholes implied volatility and Greeks for whole option chains in one
+# batched numpy call, instead of trusting NSE's rounded (and sometimes 0)
+# impliedVolatility fields.
+#
+# Contracts are flat arrays (spot, strike, years to expiry, price, kind) with
+# kind = 1 call, -1 put, 0 straddle (call + put at the same strike, which is
+# how the ATM straddle IV is solved). The solver is a safeguarded Newton:
+# every contract keeps a [lo, hi] volatility bracket, and any Newton step that
+# leaves the bracket or stalls on a tiny vega falls back to bisection, so it
+# converges for deep ITM/OTM and near-expiry contracts too. Prices outside the
+# no-arbitrage bounds give NaN.
+
+from datetime import datetime, timedelta
+import numpy as np
+
+RISK_FREE_RATE = 0.065  # annualised, continuous; roughly the 91-day T-bill
+EXPIRY_TIME = (15, 30)  # IST, NSE index options settle at the close
+MIN_YEARS = 1 / (365 * 24 * 60)  # one minute, keeps expiry-day maths finite
+VOL_LO, VOL_HI = 1e-4, 5.0
+PRICE_TOL = 1e-3  # rupees; NSE prices tick in 0.05
+VOL_TOL = 1e-7  # stop once the bracket is this narrow
+MAX_ITER = 60
+
+SQRT_2PI = np.sqrt(2 * np.pi)
+
+
+def norm_pdf(x):
+    return np.exp(-0.5 * x * x) / SQRT_2PI
+
+
+def norm_cdf(x):
+    # Abramowitz & Stegun 26.2.17 (|error| < 7.5e-8); numpy has no erf.
+    z = np.abs(x)
+    t = 1.0 / (1.0 + 0.2316419 * z)
+    poly = t * (0.319381530 + t * (-0.356563782 + t * (1.781477937 + t * (-1.821255978 + t * 1.330274429))))
+    upper = norm_pdf(z) * poly
+    return np.where(x >= 0, 1.0 - upper, upper)
+
+
+def years_to_expiry(expiry, now):
+    # expiry: "31-Jul-2025"; now: naive IST datetime.
+    settle = datetime.strptime(expiry, "%d-%b-%Y") + timedelta(hours=EXPIRY_TIME[0], minutes=EXPIRY_TIME[1])
+    return max((settle - now).total_seconds() / (365 * 86400), MIN_YEARS)
+
+
+def _d1_d2(spot, strike, t, rate, vol):
+    sqrt_t = np.sqrt(t)
+    d1 = (np.log(spot / strike) + (rate + 0.5 * vol * vol) * t) / (vol * sqrt_t)
+    return d1, d1 - vol * sqrt_t
+
+
+def bs_price(spot, strike, t, vol, kind, rate=RISK_FREE_RATE):
+    d1, d2 = _d1_d2(spot, strike, t, rate, vol)
+    discount = strike * np.exp(-rate * t)
+    call = spot * norm_cdf(d1) - discount * norm_cdf(d2)
+    put = discount * norm_cdf(-d2) - spot * norm_cdf(-d1)
+    return np.where(kind > 0, call, np.where(kind < 0, put, call + put))
+
+
+def bs_vega(spot, strike, t, vol, kind, rate=RISK_FREE_RATE):
+    # dPrice/dVol (per 1.00 of vol); a straddle has twice the vega.
+    d1, _ = _d1_d2(spot, strike, t, rate, vol)
+    vega = spot * norm_pdf(d1) * np.sqrt(t)
+    return np.where(kind == 0, 2 * vega, vega)
+
+
+def price_bounds(spot, strike, t, kind, rate=RISK_FREE_RATE):
+    discount = strike * np.exp(-rate * t)
+    call_lo, put_lo = np.maximum(spot - discount, 0), np.maximum(discount - spot, 0)
+    lower = np.where(kind > 0, call_lo, np.where(kind < 0, put_lo, call_lo + put_lo))
+    upper = np.where(kind > 0, spot, np.where(kind < 0, discount, spot + discount))
+    return lower, upper
+
+
+# -----------------------------------------
+# ✅ IMPLIED VOLATILITY (batched, safeguarded Newton)
+# -----------------------------------------
+def implied_vol(price, spot, strike, t, kind, rate=RISK_FREE_RATE, tol=PRICE_TOL, max_iter=MAX_ITER):
+    price, spot, strike, t, kind = np.broadcast_arrays(*(np.asarray(a, dtype=np.float64)
+                                                         for a in (price, spot, strike, t, kind)))
+    lower, upper = price_bounds(spot, strike, t, kind, rate)
+    valid = np.isfinite(price) & (price > 0) & (spot > 0) & (strike > 0) & (t > 0) \
+        & (price > lower) & (price < upper)
+    vol = np.full(price.shape, np.nan)
+    if not valid.any():
+        return vol
+
+    p, s, k, tt, kd = price[valid], spot[valid], strike[valid], t[valid], kind[valid]
+    lo = np.full(p.shape, VOL_LO)
+    hi = np.full(p.shape, VOL_HI)
+    # Brenner-Subrahmanyam start, a good guess near the money.
+    per_leg = np.where(kd == 0, p / 2, p)
+    sigma = np.clip(per_leg / s * np.sqrt(2 * np.pi / tt), 0.05, 2.0)
+    active = np.ones(p.shape, dtype=bool)
+    for _ in range(max_iter):
+        idx = np.flatnonzero(active)
+        if not len(idx):
+            break
+        sg = sigma[idx]
+        diff = bs_price(s[idx], k[idx], tt[idx], sg, kd[idx], rate) - p[idx]
+        done = (np.abs(diff) < tol) | (hi[idx] - lo[idx] < VOL_TOL)
+        active[idx[done]] = False
+        # Price is increasing in vol, so the sign of diff moves the bracket.
+        hi[idx] = np.where(diff > 0, sg, hi[idx])
+        lo[idx] = np.where(diff <= 0, sg, lo[idx])
+        vega = bs_vega(s[idx], k[idx], tt[idx], sg, kd[idx], rate)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            step = sg - diff / vega
+        bisect = ~np.isfinite(step) | (step <= lo[idx]) | (step >= hi[idx]) | (vega < 1e-8 * s[idx])
+        sigma[idx] = np.where(done, sg, np.where(bisect, 0.5 * (lo[idx] + hi[idx]), step))
+    vol[valid] = sigma
+    return vol
+
+
+# -----------------------------------------
+# ✅ GREEKS
+# -----------------------------------------
+def greeks(spot, strike, t, vol, kind, rate=RISK_FREE_RATE):
+    # delta per 1 point, gamma per 1 point, vega per 1 vol point (1%),
+    # theta per calendar day. Straddles get call + put.
+    spot, strike, t, vol, kind = np.broadcast_arrays(*(np.asarray(a, dtype=np.float64)
+                                                       for a in (spot, strike, t, vol, kind)))
+    d1, d2 = _d1_d2(spot, strike, t, rate, vol)
+    pdf = norm_pdf(d1)
+    sqrt_t = np.sqrt(t)
+    discount = strike * np.exp(-rate * t)
+    call_delta = norm_cdf(d1)
+    put_delta = call_delta - 1
+    gamma = pdf / (spot * vol * sqrt_t)
+    vega = spot * pdf * sqrt_t / 100
+    decay = -spot * pdf * vol / (2 * sqrt_t)
+    call_theta = (decay - rate * discount * norm_cdf(d2)) / 365
+    put_theta = (decay + rate * discount * norm_cdf(-d2)) / 365
+    legs = np.where(kind == 0, 2, 1)
+    return {
+        "delta": np.where(kind > 0, call_delta, np.where(kind < 0, put_delta, call_delta + put_delta)),
+        "gamma": gamma * legs,
+        "vega": vega * legs,
+        "theta": np.where(kind > 0, call_theta, np.where(kind < 0, put_theta, call_theta + put_theta)),
+    }
+
+
+# -----------------------------------------
+# ✅ WHOLE CHAIN / ATM / CONSTANT MATURITY
+# -----------------------------------------
+def chain_greeks(chain, now, expiries=None, rate=RISK_FREE_RATE):
+    # IV and Greeks for every call and put of a ParsedChain in one batch.
+    # Returns {expiry: {"strike", "ce_iv", "ce_delta", ..., "pe_theta"}},
+    # IVs in percent like NSE's; contracts without a solvable price are NaN.
+    expiries = [e for e in (expiries or chain.expiries) if e in chain.chains]
+    if not expiries:
+        return {}
+    strikes, years, prices, kinds, sizes = [], [], [], [], []
+    for expiry in expiries:
+        expiry_chain = chain.chains[expiry]
+        t = years_to_expiry(expiry, now)
+        n = len(expiry_chain.strike)
+        for column, kind in (("ce_ltp", 1), ("pe_ltp", -1)):
+            strikes.append(expiry_chain.strike)
+            years.append(np.full(n, t))
+            prices.append(expiry_chain[column])
+            kinds.append(np.full(n, kind))
+        sizes.append(n)
+    strike, t, price, kind = (np.concatenate(a).astype(np.float64) for a in (strikes, years, prices, kinds))
+    vol = implied_vol(price, chain.spot, strike, t, kind, rate)
+    g = greeks(chain.spot, strike, t, vol, kind, rate)
+
+    result, position = {}, 0
+    for expiry, n in zip(expiries, sizes):
+        out = {"strike": strike[position:position + n]}
+        for side, offset in (("ce", 0), ("pe", n)):
+            window = slice(position + offset, position + offset + n)
+            out[f"{side}_iv"] = vol[window] * 100
+            for name, values in g.items():
+                out[f"{side}_{name}"] = values[window]
+        result[expiry] = out
+        position += 2 * n
+    return result
+
+
+def atm_straddles(chain, now, expiries, rate=RISK_FREE_RATE):
+    # Solves the ATM straddle (call + put LTP at the ATM strike) of each
+    # expiry as one contract. Returns {expiry: {"t", "iv", "delta", "gamma",
+    # "vega", "theta"}} with iv in percent.
+    expiries = [e for e in expiries if e in chain.chains]
+    if not expiries:
+        return {}
+    atm = [chain.atm(e) for e in expiries]
+    strike = np.array([row["strike"] for row in atm], dtype=np.float64)
+    premium = np.array([row["ce_ltp"] + row["pe_ltp"] if row["ce_ltp"] > 0 and row["pe_ltp"] > 0 else np.nan
+                        for row in atm])
+    t = np.array([years_to_expiry(e, now) for e in expiries])
+    kind = np.zeros(len(expiries))
+    vol = implied_vol(premium, chain.spot, strike, t, kind, rate)
+    g = greeks(chain.spot, strike, t, vol, kind, rate)
+    return {e: {"t": t[i], "iv": vol[i] * 100, **{name: values[i] for name, values in g.items()}}
+            for i, e in enumerate(expiries)}
+
+
+def constant_maturity_iv(straddles, days):
+    # Interpolates ATM IV to a fixed tenor linearly in total variance
+    # (iv^2 * t); flat beyond the first/last solved expiry.
+    points = sorted((v["t"], v["iv"]) for v in straddles.values() if np.isfinite(v["iv"]))
+    if not points:
+        return np.nan
+    target = days / 365
+    t = np.array([p[0] for p in points])
+    iv = np.array([p[1] for p in points])
+    if target <= t[0] or len(points) == 1:
+        return float(iv[0])
+    if target >= t[-1]:
+        return float(iv[-1])
+    variance = np.interp(target, t, iv * iv * t)
+    return float(np.sqrt(variance / target))
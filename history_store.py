@@ -0,0 +1,112 @@
+# history_store.py
+# Loads the recent snapshot history once per process and keeps it in memory
+# for the plotter and for warming the VWAP/IVP engine (ivp_engine.py). Only
+# the last sessions are loaded: HISTORY_SESSIONS (or the longest "Nd" IVP
+# window), widened until every expiry slot has its LOOKBACK ticks; each
+# append then trims sessions past that, so memory and start-up time follow
+# the windows, not the size of the store.
+# New rows go to the snapshot store (see storage.py) and, as a true append,
+# to the CSV export.
+
+import os
+import numpy as np
+import pandas as pd
+from storage import typed_frame, migrate_csv
+from config import IVP_WINDOWS, HISTORY_SESSIONS
+
+
+def window_needs(windows, sessions=HISTORY_SESSIONS):
+    # (sessions, ticks per expiry slot) the in-memory frame has to cover.
+    ticks = max([spec for spec in windows.values() if isinstance(spec, int)], default=0)
+    days = [int(str(spec).rstrip("d")) for spec in windows.values() if not isinstance(spec, int)]
+    return max([sessions] + days), ticks
+
+
+class HistoryStore:
+    def __init__(self, store, export=None, legacy_csv=None, windows=IVP_WINDOWS, sessions=HISTORY_SESSIONS):
+        self.store = store
+        self.export = export  # CSVStore mirror for the dashboard download link
+        self.legacy_csv = legacy_csv  # migrated into an empty store on first load
+        self.sessions, self.ticks = window_needs(windows, sessions)
+        self.columns = []
+        self._df = None
+        self._pending = []
+        self.loaded = False
+
+    # -----------------------------------------
+    # ✅ LOAD ONCE (recent sessions only)
+    # -----------------------------------------
+    def covers(self, df):
+        # Every expiry slot has `ticks` observed samples, or already appears
+        # after the first loaded session (so there is nothing older to load).
+        if df.empty or not self.ticks:
+            return True
+        days = df["timestamp"].dt.normalize()
+        first = (days == days.min()).to_numpy()
+        for column in df.columns:
+            if not column.endswith("_expiry"):
+                continue
+            label = column[:-len("_expiry")]
+            present = df[column].notna().to_numpy()
+            observed = present & (df[f"{label}_repeat"].to_numpy() != 1) if f"{label}_repeat" in df.columns else present
+            if observed.sum() < self.ticks and present[first].any():
+                return False
+        return True
+
+    def load(self):
+        if self.store.is_empty() and self.legacy_csv and os.path.exists(self.legacy_csv):
+            migrate_csv(self.legacy_csv, self.store)
+        days = self.store.days()
+        count = min(self.sessions, len(days))
+        while True:
+            df = self.store.read(start=f"{days[-count]} 00:00:00") if days else self.store.read()
+            if count >= len(days) or self.covers(df):
+                break
+            count = min(count * 2, len(days))
+        print(f"✅ Loaded {len(df)} rows ({count} of {len(days)} sessions) from the {self.store.name} snapshot store")
+        self._df = df
+        self._pending = []
+        self.columns = list(df.columns)
+        self.loaded = True
+        return self
+
+    def ensure_loaded(self):
+        if not self.loaded:
+            self.load()
+
+    # -----------------------------------------
+    # ✅ APPEND (memory + store + CSV export)
+    # -----------------------------------------
+    def append(self, row):
+        self.ensure_loaded()
+        self._pending.append(row)
+        self.columns += [col for col in row if col not in self.columns]
+
+        self.store.append([row])
+        if self.export is not None:
+            self.export.append([row])
+        return len(self)
+
+    # -----------------------------------------
+    # ✅ RECENT FRAME (shared with the plotter)
+    # -----------------------------------------
+    def trim(self, df):
+        # Sessions older than the last `sessions` go; the engine was warmed
+        # from the loaded frame before the first append and is incremental since.
+        days = df["timestamp"].dt.normalize().to_numpy()
+        kept = np.unique(days)
+        if len(kept) <= self.sessions:
+            return df
+        return df[days >= kept[-self.sessions]].reset_index(drop=True)
+
+    def frame(self):
+        self.ensure_loaded()
+        if self._pending:
+            new_rows = typed_frame(pd.DataFrame(self._pending))
+            self._df = pd.concat([self._df, new_rows], ignore_index=True) if not self._df.empty else new_rows
+            self._df = self.trim(self._df)
+            self._pending = []
+        return self._df.copy(deep=False)
+
+    def __len__(self):
+        return (len(self._df) if self._df is not None else 0) + len(self._pending)
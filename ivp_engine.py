@@ -0,0 +1,212 @@
+# ivp_engine.py
+# Incremental VWAP / IV-percentile state per (symbol, expiry slot), e.g.
+# "nifty_curr". Each slot keeps running VWAP sums and a Fenwick tree over
+# quantised IVs for every configured window, so a tick is an O(log n) update
+# instead of rebuilding pandas objects. A slot resets when its contract
+# rolls (curr/next expiry changes), so two contracts never share a window.
+#
+# Window specs: an int is a tick count (LOOKBACK = 30), "Nd" is the last N
+# trading sessions seen by the slot (including the current session).
+
+from collections import deque
+import pandas as pd
+
+IV_SCALE = 100  # IVs are bucketed at 0.01 resolution
+PRICE_SCALE = 100  # straddle premium in paise, so VWAP sums are exact ints
+
+
+def iv_bucket(iv):
+    return max(0, int(round(iv * IV_SCALE)))
+
+
+def premium_paise(straddle):
+    return int(round(straddle * PRICE_SCALE))
+
+
+def vwap_from_sums(sum_pv, sum_vol):
+    if sum_vol == 0:
+        return None
+    return round(sum_pv / sum_vol / PRICE_SCALE, 2)
+
+
+def ivp_from_count(below, total):
+    if total == 0:
+        return None
+    return round((below / total) * 100, 1)
+
+
+class FenwickTree:
+    def __init__(self, size=4096):
+        self.tree = [0] * (size + 1)
+
+    def _grow(self, index):
+        size = len(self.tree) - 1
+        while index >= size:
+            size *= 2
+        counts = [self.prefix(i) - self.prefix(i - 1) for i in range(len(self.tree) - 1)]
+        self.tree = [0] * (size + 1)
+        for i, count in enumerate(counts):
+            if count:
+                self.add(i, count)
+
+    def add(self, index, delta):
+        if index >= len(self.tree) - 1:
+            self._grow(index)
+        i = index + 1
+        while i < len(self.tree):
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefix(self, index):
+        # Number of values with bucket <= index.
+        if index < 0:
+            return 0
+        i = min(index + 1, len(self.tree) - 1)
+        total = 0
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+
+class RollingWindow:
+    def __init__(self, spec):
+        self.spec = spec
+        self.ticks = spec if isinstance(spec, int) else None
+        self.sessions = None if self.ticks is not None else int(str(spec).rstrip("d"))
+        self.reset()
+
+    def reset(self):
+        self.entries = deque()  # (session, pv, vol, iv_bucket or None)
+        self.session_dates = deque()
+        self.sum_pv = 0
+        self.sum_vol = 0
+        self.iv_count = 0
+        self.ivs = FenwickTree()
+
+    def _evict_left(self):
+        session, pv, vol, bucket = self.entries.popleft()
+        self.sum_pv -= pv
+        self.sum_vol -= vol
+        if bucket is not None:
+            self.ivs.add(bucket, -1)
+            self.iv_count -= 1
+
+    def advance(self, session):
+        # Called before a tick's stats are read, so session windows already
+        # exclude sessions that fall out of range on the first tick of a day.
+        if self.sessions is None:
+            return
+        if not self.session_dates or self.session_dates[-1] != session:
+            self.session_dates.append(session)
+        while len(self.session_dates) > self.sessions:
+            oldest = self.session_dates.popleft()
+            while self.entries and self.entries[0][0] == oldest:
+                self._evict_left()
+
+    def push(self, session, pv, vol, bucket):
+        self.entries.append((session, pv, vol, bucket))
+        self.sum_pv += pv
+        self.sum_vol += vol
+        if bucket is not None:
+            self.ivs.add(bucket, 1)
+            self.iv_count += 1
+        if self.ticks is not None:
+            while len(self.entries) > self.ticks:
+                self._evict_left()
+
+    def vwap(self):
+        return vwap_from_sums(self.sum_pv, self.sum_vol)
+
+    def ivp(self, iv):
+        if iv is None:
+            return None
+        return ivp_from_count(self.ivs.prefix(iv_bucket(iv) - 1), self.iv_count)
+
+
+class SlotEngine:
+    def __init__(self, windows, log_rollovers=True):
+        self.windows = {suffix: RollingWindow(spec) for suffix, spec in windows.items()}
+        self.expiry = None
+        self.log_rollovers = log_rollovers
+
+    def observe(self, timestamp, expiry, straddle, total_vol, straddle_iv):
+        # Returns {"vwap", "ivp", "vwap_<suffix>", ...} over the window *before*
+        # this tick, then adds the tick.
+        if expiry != self.expiry:
+            if self.expiry is not None and self.log_rollovers:
+                print(f"🔁 Expiry rollover {self.expiry} → {expiry}, resetting VWAP/IVP state")
+            for window in self.windows.values():
+                window.reset()
+            self.expiry = expiry
+
+        session = str(timestamp)[:10]
+        valid_price = not (pd.isna(straddle) or pd.isna(total_vol))
+        pv = premium_paise(straddle) * int(total_vol) if valid_price else 0
+        vol = int(total_vol) if valid_price else 0
+        iv = None if pd.isna(straddle_iv) else float(straddle_iv)
+
+        stats = {}
+        for suffix, window in self.windows.items():
+            window.advance(session)
+            key = f"_{suffix}" if suffix else ""
+            stats[f"vwap{key}"] = window.vwap()
+            stats[f"ivp{key}"] = window.ivp(iv)
+            window.push(session, pv, vol, iv_bucket(iv) if iv is not None else None)
+        return stats
+
+
+class IVPEngine:
+    def __init__(self, windows, log_rollovers=True):
+        # windows: {column suffix: spec}; the "" suffix feeds {label}_vwap/_ivp.
+        self.windows = windows
+        self.log_rollovers = log_rollovers
+        self.slots = {}
+        self.warmed = False
+
+    def slot(self, label):
+        if label not in self.slots:
+            self.slots[label] = SlotEngine(self.windows, self.log_rollovers)
+        return self.slots[label]
+
+    def observe(self, label, timestamp, expiry, straddle, total_vol, straddle_iv):
+        return self.slot(label).observe(timestamp, expiry, straddle, total_vol, straddle_iv)
+
+    def columns(self, label):
+        return [f"{label}_{kind}{'_' + suffix if suffix else ''}"
+                for suffix in self.windows for kind in ("vwap", "ivp")]
+
+    # -----------------------------------------
+    # ✅ WARM-UP FROM STORED HISTORY
+    # -----------------------------------------
+    def horizon(self, segment):
+        # Rows of the current contract that any window can still see.
+        start = len(segment)
+        for spec in self.windows.values():
+            if isinstance(spec, int):
+                start = min(start, max(0, len(segment) - spec))
+            else:
+                sessions = segment["timestamp"].astype(str).str[:10]
+                keep = sessions.drop_duplicates().tail(int(str(spec).rstrip("d")))
+                start = min(start, int(sessions.isin(keep).to_numpy().argmax()) if len(keep) else len(segment))
+        return segment.iloc[start:]
+
+    def warm(self, df, labels=None):
+        self.warmed = True
+        if labels is None:
+            labels = [c[:-len("_straddle_iv")] for c in df.columns if c.endswith("_straddle_iv")]
+        for label in labels:
+            cols = [f"{label}_{c}" for c in ("expiry", "straddle", "total_vol", "straddle_iv")]
+            if df.empty or not all(c in df.columns for c in cols):
+                continue
+            rows = df[["timestamp"] + cols].dropna(subset=[f"{label}_expiry"])
+            if f"{label}_repeat" in df.columns:  # carried samples were never observed (row_stage.py)
+                rows = rows[df.loc[rows.index, f"{label}_repeat"].to_numpy() != 1]
+            if rows.empty:
+                continue
+            expiry = rows[cols[0]].iloc[-1]
+            last_other = (rows[cols[0]] != expiry).to_numpy().nonzero()[0]
+            segment = rows.iloc[last_other[-1] + 1:] if len(last_other) else rows
+            slot = self.slot(label)
+            for ts, exp, straddle, vol, iv in self.horizon(segment).itertuples(index=False, name=None):
+                slot.observe(ts, exp, straddle, vol, iv)
@@ -0,0 +1,79 @@
+# market_hours.py
+# NSE sessions and the daemon's tick grid. Standard library + pytz only:
+# nifty_master_runner.py asks is_trading_session() before any stage module
+# (and pandas, matplotlib, selenium, ...) is imported, so a market-closed run
+# exits in well under a second. Weekends, NSE holidays and special sessions
+# come from trading_calendar.py.
+
+import os
+from datetime import datetime, time, timedelta
+from pytz import timezone
+from trading_calendar import TradingCalendar
+from config import HOLIDAY_CACHE_PATH, COOKIE_CACHE_PATH
+
+DEBUG_MODE = os.getenv("NSE_DEBUG_MODE") == "1"  # after-hours testing: every day is one long session
+MARKET_OPEN = (9, 15)   # IST
+MARKET_CLOSE = (15, 30)  # IST
+IST = timezone('Asia/Kolkata')
+NSE_BASE_URL = os.getenv("NSE_BASE_URL", "https://www.nseindia.com")
+SESSION_SEARCH_DAYS = 30  # next_session_open() gives up after this many shut days
+CLOSE_MINUTE = timedelta(minutes=1)  # the close minute is in session: 15:30:59 still ticks
+
+calendar = TradingCalendar(HOLIDAY_CACHE_PATH, NSE_BASE_URL, cookie_path=COOKIE_CACHE_PATH)
+
+
+def at(day, hour_minute):
+    return IST.localize(datetime.combine(day, time(*hour_minute)))
+
+
+def session_bounds(ist_now):
+    # (open, close) of the session on ist_now's IST date, or None if NSE is shut.
+    day = ist_now.astimezone(IST).date()
+    if DEBUG_MODE:
+        return at(day, (0, 0)), at(day + timedelta(days=1), (0, 0))
+    hours = calendar.session_hours(day, (MARKET_OPEN, MARKET_CLOSE))
+    if hours is None:
+        return None
+    return at(day, hours[0]), at(day, hours[1])
+
+
+def is_trading_session(ist_now=None, grace=timedelta(0)):
+    # grace: extra time after the close minute, for runs that start late
+    # (GitHub's scheduled runs fire seconds to minutes after their cron time).
+    ist_now = ist_now or datetime.now(IST)
+    bounds = session_bounds(ist_now)
+    return bounds is not None and bounds[0] <= ist_now < bounds[1] + CLOSE_MINUTE + grace
+
+
+def closed_reason(ist_now):
+    bounds = session_bounds(ist_now)
+    if bounds is None:
+        return calendar.closed_reason(ist_now.astimezone(IST).date()) or "no session"
+    return f"outside {bounds[0].strftime('%H:%M')}–{bounds[1].strftime('%H:%M')} IST"
+
+
+def next_session_open(ist_now=None):
+    # The first session open at or after ist_now.
+    ist_now = ist_now or datetime.now(IST)
+    day = ist_now.astimezone(IST).date()
+    for offset in range(SESSION_SEARCH_DAYS + 1):
+        bounds = session_bounds(at(day + timedelta(days=offset), (12, 0)))
+        if bounds is not None and bounds[0] >= ist_now:
+            return bounds[0]
+    raise RuntimeError(f"No NSE session in the {SESSION_SEARCH_DAYS} days after {ist_now}")
+
+
+def next_tick_time(ist_now, interval):
+    # Ticks sit on a fixed grid anchored at the session open, so a slow
+    # cycle never pushes the following ticks later (no drift). Outside a
+    # session the next tick is the next open, however many days away.
+    bounds = session_bounds(ist_now)
+    if bounds is not None and ist_now <= bounds[1]:
+        market_open, market_close = bounds
+        if ist_now <= market_open:
+            return market_open
+        elapsed = (ist_now - market_open).total_seconds()
+        due = market_open + timedelta(seconds=-(-elapsed // interval) * interval)
+        if due <= market_close:
+            return due
+    return next_session_open(ist_now + timedelta(seconds=1))
@@ -0,0 +1,222 @@
+# metrics.py
+# Timers and counters for the monitor, a JSON-lines run log and the
+# Prometheus text format server.py serves on /metrics. Standard library only,
+# no external service.
+#
+# Code records into the process-wide `metrics` registry:
+#
+#   with metrics.timer("stage_seconds", "fetch"): ...
+#   metrics.inc("nse_payload_bytes", "NIFTY", len(body))
+#
+# Every metric has at most one label (the stage, the source, the outcome);
+# an observation is a dict update under a lock, about a microsecond. At the
+# end of a run RunLog.write() appends one line per run to RUNS_DIR/<IST day>.jsonl
+# with that run's values and the running totals, so counters keep counting
+# across one-shot GitHub Actions runs and a daemon restart, and /metrics
+# only has to read the last line.
+
+import os
+import json
+import time
+import glob
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pytz import timezone
+
+IST = timezone("Asia/Kolkata")
+NAMESPACE = "nse_monitor"
+RETENTION_DAYS = 14  # run log files kept; totals live on in the last line
+TAIL_BYTES = 64 * 1024  # usually enough for the last record; the whole file is read otherwise
+
+# name: (Prometheus type, label name, help)
+METRICS = {
+    "stage_seconds": ("summary", "stage", "Wall time per monitor stage (cookies, fetch, prepare_row, csv_append, plots, ...)"),
+    "source_seconds": ("summary", "source", "Fetch time per NSE source: India VIX and each option chain"),
+    "nse_requests": ("counter", "outcome", "NSE API requests by outcome (ok, http_<status>, error, breaker_open)"),
+    "nse_retries": ("counter", "source", "NSE API retries after a failed attempt"),
+    "nse_payload_bytes": ("counter", "source", "NSE API response bytes (decoded) per source"),
+    "source_failures": ("counter", "source", "Sources with no data by the fetch deadline"),
+    "browser_launches": ("counter", None, "Headless Chrome launches for NSE cookies and India VIX"),
+    "ticks": ("counter", "result", "Monitor ticks by result (written, unchanged, no_data, failed)"),
+    "rows_written": ("counter", "group", "Rows appended per snapshot table"),
+    "plots": ("counter", "status", "Dashboard PNGs by render status (rendered, unchanged, failed)"),
+    "alerts": ("counter", "outcome", "Alerts by outcome (raised, suppressed, queued, sent, failed, rate_limited)"),
+}
+
+
+class Metrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timers = {}  # name -> {label: [count, seconds]}
+        self.counters = {}  # name -> {label: value}
+
+    @contextmanager
+    def timer(self, name, label=""):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, label)
+
+    def observe(self, name, seconds, label=""):
+        with self.lock:
+            entry = self.timers.setdefault(name, {}).setdefault(label, [0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+
+    def inc(self, name, label="", value=1):
+        with self.lock:
+            series = self.counters.setdefault(name, {})
+            series[label] = series.get(label, 0) + value
+
+    def seconds(self, name):
+        # {label: seconds} of one timer so far this run (stage timings line).
+        with self.lock:
+            return {label: entry[1] for label, entry in self.timers.get(name, {}).items()}
+
+    def pop(self):
+        with self.lock:
+            snapshot = {"timers": self.timers, "counters": self.counters}
+            self.timers, self.counters = {}, {}
+        return snapshot
+
+
+metrics = Metrics()
+
+
+def merge_totals(totals, snapshot):
+    timers = {name: {label: list(entry) for label, entry in series.items()}
+              for name, series in totals.get("timers", {}).items()}
+    counters = {name: dict(series) for name, series in totals.get("counters", {}).items()}
+    for name, series in snapshot["timers"].items():
+        for label, (count, seconds) in series.items():
+            entry = timers.setdefault(name, {}).setdefault(label, [0, 0.0])
+            entry[0] += count
+            entry[1] = round(entry[1] + seconds, 6)
+    for name, series in snapshot["counters"].items():
+        for label, value in series.items():
+            counters.setdefault(name, {})[label] = counters.get(name, {}).get(label, 0) + value
+    return {"timers": timers, "counters": counters}
+
+
+def rounded_timers(timers):
+    return {name: {label: [count, round(seconds, 6)] for label, (count, seconds) in series.items()}
+            for name, series in timers.items()}
+
+# -----------------------------------------
+# ✅ RUN LOG (one JSON line per run)
+# -----------------------------------------
+class RunLog:
+    def __init__(self, root, retention_days=RETENTION_DAYS):
+        self.root = root
+        self.retention_days = retention_days
+        self.previous = None  # last record, read from disk once
+
+    def files(self):
+        return sorted(glob.glob(os.path.join(self.root, "*.jsonl")))
+
+    def last(self):
+        # The newest complete record, or None before the first run.
+        for path in reversed(self.files()):
+            for tail in (TAIL_BYTES, None):
+                with open(path, "rb") as f:
+                    if tail is not None:
+                        f.seek(max(0, os.path.getsize(path) - tail))
+                    lines = f.read().splitlines()
+                for line in reversed(lines):
+                    try:
+                        return json.loads(line)
+                    except ValueError:
+                        continue  # a torn last line or a cut first line
+        return None
+
+    def write(self, mode, ok, seconds, snapshot):
+        if self.previous is None:
+            self.previous = self.last() or {}
+        now = datetime.now(IST)
+        record = {
+            "run": self.previous.get("run", 0) + 1,
+            "time": now.isoformat(timespec="seconds"),
+            "mode": mode,
+            "ok": bool(ok),
+            "seconds": round(seconds, 3),
+            "timers": rounded_timers(snapshot["timers"]),
+            "counters": snapshot["counters"],
+            "totals": merge_totals(self.previous.get("totals", {}), snapshot),
+        }
+        os.makedirs(self.root, exist_ok=True)
+        path = os.path.join(self.root, f"{now.strftime('%Y-%m-%d')}.jsonl")
+        try:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, separators=(",", ":")) + "\n")
+        except OSError as e:
+            print(f"⚠️ Could not write the run log: {e}")
+            return record
+        self.previous = record
+        self._prune(now)
+        return record
+
+    def _prune(self, now):
+        cutoff = (now - timedelta(days=self.retention_days)).strftime("%Y-%m-%d")
+        for path in self.files()[:-1]:
+            if os.path.basename(path)[:10] < cutoff:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+# -----------------------------------------
+# ✅ PROMETHEUS TEXT FORMAT (version 0.0.4)
+# -----------------------------------------
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def sample(name, value, label_name=None, label=""):
+    labels = f'{{{label_name}="{escape(label)}"}}' if label_name else ""
+    return f"{name}{labels} {round(value, 6) if isinstance(value, float) else value}"
+
+
+def family(lines, name, kind, help_text):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+
+
+def prometheus_text(record, extra=None, namespace=NAMESPACE):
+    # record: the last RunLog line (or None); extra: [(name, type, help, value)]
+    # gauges/counters the caller owns (server.py's SSE hub).
+    lines = []
+    if record:
+        family(lines, f"{namespace}_runs_total", "counter", "Monitor runs logged")
+        lines.append(sample(f"{namespace}_runs_total", record["run"]))
+        family(lines, f"{namespace}_last_run_timestamp_seconds", "gauge", "End of the last run (unix time)")
+        lines.append(sample(f"{namespace}_last_run_timestamp_seconds", datetime.fromisoformat(record["time"]).timestamp()))
+        family(lines, f"{namespace}_last_run_success", "gauge", "1 if the last run completed")
+        lines.append(sample(f"{namespace}_last_run_success", int(record["ok"])))
+        family(lines, f"{namespace}_last_run_duration_seconds", "gauge", "Wall time of the last run")
+        lines.append(sample(f"{namespace}_last_run_duration_seconds", float(record["seconds"])))
+
+        totals = record.get("totals", {})
+        for name, series in sorted(totals.get("timers", {}).items()):
+            _, label_name, help_text = METRICS.get(name, ("summary", "label", name))
+            metric = f"{namespace}_{name}"
+            family(lines, metric, "summary", help_text)
+            for label, (count, seconds) in sorted(series.items()):
+                lines.append(sample(f"{metric}_sum", float(seconds), label_name, label))
+                lines.append(sample(f"{metric}_count", count, label_name, label))
+            last = record.get("timers", {}).get(name, {})
+            if last:
+                family(lines, f"{namespace}_last_{name}", "gauge", f"Last run: {help_text[0].lower()}{help_text[1:]}")
+                for label, (_, seconds) in sorted(last.items()):
+                    lines.append(sample(f"{namespace}_last_{name}", float(seconds), label_name, label))
+        for name, series in sorted(totals.get("counters", {}).items()):
+            _, label_name, help_text = METRICS.get(name, ("counter", "label", name))
+            metric = f"{namespace}_{name}_total"
+            family(lines, metric, "counter", help_text)
+            for label, value in sorted(series.items()):
+                lines.append(sample(metric, value, label_name, label))
+    for name, kind, help_text, value in extra or []:
+        family(lines, name, kind, help_text)
+        lines.append(sample(name, value))
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,177 @@
+# monitor_cycle.py
+# One monitor tick and the daemon loop around it, stitched from the stage
+# modules: source_stage (fetch), row_stage (parse + write) and plot_stage
+# (PNGs). The row and plot stages are imported on first use, so a tick
+# whose chains are unchanged never loads pandas or matplotlib, and
+# --fetch-only never does.
+
+import sys
+import time
+import importlib
+from datetime import datetime, timedelta
+from alert_rules import vix_breach
+from market_hours import IST, MARKET_OPEN, MARKET_CLOSE, is_trading_session, closed_reason, next_tick_time
+from metrics import metrics
+from monitor_state import alerts, events, changes, runs, timed_stage
+from source_stage import SYMBOL_SPECS, fetch_all_sources, summarize_sources
+from config import VIX_HIGH, VIX_LOW
+
+ALERT_DRAIN_TIMEOUT = 15  # seconds a one-shot run waits for queued alerts before exiting
+FETCH_TIMINGS_SHOWN = 5  # slowest sources listed in the stage timings line
+REPORT_AFTER_CLOSE = True  # daemon builds the day's PDF (eod_report.py) once the session is over
+
+# -----------------------------------------
+# ✅ STAGE TIMINGS + RUN LOG (metrics.py)
+# -----------------------------------------
+def report_stage_timings():
+    timings = metrics.seconds("stage_seconds")
+    # Slowest sources only: with dozens of symbols the full list drowns the log.
+    sources = sorted(metrics.seconds("source_seconds").items(), key=lambda item: item[1], reverse=True)
+    timings.update({f"fetch_{name.lower()}": seconds for name, seconds in sources[:FETCH_TIMINGS_SHOWN]})
+    if timings:
+        print("⏱️ Stage timings: " + ", ".join(f"{k}={v:.2f}s" for k, v in timings.items()))
+
+def log_run(mode, ok, seconds):
+    # One JSON line per run (or daemon tick) with everything metrics recorded.
+    record = runs.write(mode, ok, seconds, metrics.pop())
+    print(f"📟 Run #{record['run']} logged to {runs.root} ({record['seconds']:.1f}s, {'ok' if ok else 'failed'})")
+    return record
+
+def load_stage(name):
+    # The first tick pays for the import (pandas + pyarrow, matplotlib); timed
+    # so it shows up in that tick's stage timings.
+    if name not in sys.modules:
+        with timed_stage(f"import_{name}"):
+            importlib.import_module(name)
+    return sys.modules[name]
+
+# -----------------------------------------
+# ✅ ONE MONITOR CYCLE
+# -----------------------------------------
+def run_cycle(now=None, plots=True):
+    # now/plots: replay.py runs recorded ticks at their recorded time and may
+    # draw only every few ticks.
+    india_time = now or datetime.now(IST)
+    timestamp = india_time.strftime("%Y-%m-%d %H:%M:%S")
+
+    try:
+        # --- Step 1️⃣: Fetch India VIX + Option Chains concurrently
+        fetched = fetch_all_sources()
+        india_vix = fetched.get("INDIA_VIX")
+        chains = {spec["name"]: fetched.get(spec["name"]) for spec in SYMBOL_SPECS}
+
+        # --- Step 2️⃣: Check Option Chains (and whether NSE has anything new)
+        if not any(chains.values()):
+            print("❗️ Option chain fetch failed. Skipping this cycle...")
+            metrics.inc("ticks", "no_data")
+            return True
+        with timed_stage("change_check"):
+            changed, fingerprints = changes.check(chains)
+        if not changed:
+            changes.record_skip(fingerprints)
+            metrics.inc("ticks", "unchanged")
+            return True
+        missing = [symbol for symbol, data in chains.items() if not data]
+        if missing:
+            print(f"⚠️ Partial option chain data (missing {', '.join(missing)}), writing partial rows")
+
+        if india_vix is not None:
+            rounded_vix = round(india_vix, 2)
+            print(f"✅ India VIX: {rounded_vix} (Checking thresholds: LOW={VIX_LOW}, HIGH={VIX_HIGH})")
+
+            if vix_breach(rounded_vix, VIX_LOW, VIX_HIGH):
+                alerts.alert(f"vix:{'high' if rounded_vix >= VIX_HIGH else 'low'}",
+                             f"⚠️ India VIX Alert! VIX={rounded_vix} at {timestamp}")
+        else:
+            print("⚠️ India VIX scrape returned None")
+
+        # --- Step 3️⃣: One row per table whose chains changed
+        row_stage = load_stage("row_stage")
+        fresh = set(changes.changed(fingerprints))
+        with timed_stage("group_rows"):
+            written = set(row_stage.write_group_rows(fresh, timestamp, india_vix, chains))
+        changes.commit({symbol: fp for symbol, fp in fingerprints.items() if symbol in written})
+        row_stage.capture_chains(fresh, timestamp, chains)
+
+        # --- Step 4️⃣: Generate PNGs
+        if plots:
+            plot_stage = load_stage("plot_stage")
+            with timed_stage("plots"):
+                plot_stage.generate_ivp_plots()
+        metrics.inc("ticks", "written")
+        return True
+
+    except Exception as e:
+        error_msg = f"❗️ Error in GitHub Actions run: {str(e)}"
+        print(error_msg)
+        alerts.alert(f"error:{type(e).__name__}", error_msg)
+        metrics.inc("ticks", "failed")
+        return False
+    finally:
+        alerts.flush(header=f"🔔 NSE alerts at {timestamp} IST")
+        report_stage_timings()
+
+# -----------------------------------------
+# ✅ FETCH ONLY (connectivity check, nothing written)
+# -----------------------------------------
+def run_fetch_only():
+    try:
+        fetched = fetch_all_sources()
+        summarize_sources(fetched)
+        return any(fetched.get(spec["name"]) for spec in SYMBOL_SPECS)
+    finally:
+        report_stage_timings()
+
+# -----------------------------------------
+# ✅ DAEMON MODE (one warm process per session)
+# -----------------------------------------
+def run_daemon(interval):
+    print(f"✅ Starting NSE Monitor daemon (tick every {interval}s, IST {MARKET_OPEN[0]:02d}:{MARKET_OPEN[1]:02d}–{MARKET_CLOSE[0]:02d}:{MARKET_CLOSE[1]:02d} on NSE trading days)")
+    last_due = session_day = None
+    while True:
+        due = next_tick_time(datetime.now(IST), interval)
+        if due == last_due:
+            due = next_tick_time(due + timedelta(seconds=1), interval)
+        if REPORT_AFTER_CLOSE and session_day and due.date() != session_day:
+            # Last tick of the day is done: one report build, before the overnight sleep.
+            try:
+                load_stage("eod_report").build_day_report(session_day.isoformat())
+            except Exception as e:
+                print(f"❌ End-of-day report for {session_day} failed: {e}")
+            session_day = None
+        now = datetime.now(IST)
+        wait = (due - now).total_seconds()
+        if wait > 0:
+            if not is_trading_session(now):
+                # One sleep straight to the next open: no polling through nights, weekends or holidays.
+                print(f"💤 Market closed ({closed_reason(now)}), sleeping until {due.strftime('%a %Y-%m-%d %H:%M')} IST ({wait / 3600:.1f}h)")
+            else:
+                print(f"⏳ Next tick at {due.strftime('%Y-%m-%d %H:%M:%S')} IST (sleeping {wait:.0f}s)")
+            time.sleep(wait)
+        last_due, session_day = due, due.date()
+
+        started = time.monotonic()
+        ok = run_cycle()
+        print(f"⏱️ Cycle finished in {time.monotonic() - started:.1f}s")
+        log_run("daemon", ok, time.monotonic() - started)
+
+# -----------------------------------------
+# ✅ ONE-SHOT RUN (GitHub Actions, Railway, --fetch-only)
+# -----------------------------------------
+def run_once(fetch_only=False):
+    started = time.monotonic()
+    ok = run_fetch_only() if fetch_only else run_cycle()
+    shutdown()  # drains queued alerts first, so "sent" lands in this run's log line
+    log_run("fetch-only" if fetch_only else "once", ok, time.monotonic() - started)
+    return ok
+
+# -----------------------------------------
+# ✅ SHUTDOWN (only the stages this process loaded)
+# -----------------------------------------
+def shutdown():
+    alerts.close(ALERT_DRAIN_TIMEOUT)
+    for name in ("plot_stage", "row_stage"):
+        stage = sys.modules.get(name)
+        if stage is not None:
+            stage.close()
+    events.close()
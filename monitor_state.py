@@ -0,0 +1,30 @@
+# monitor_state.py
+# Process-wide objects the monitor's stage modules share: the alert
+# dispatcher, the event feed for server.py, the chain change detector and
+# the run log. Only light imports here (requests, pytz), so every stage can
+# use them without dragging in another stage's dependencies.
+
+import os
+from alert_dispatcher import AlertDispatcher, TELEGRAM_API_URL
+from change_detector import ChangeDetector
+from event_log import EventLog
+from metrics import metrics, RunLog
+from config import EVENTS_DIR, RUNS_DIR, ALERT_COOLDOWN
+
+TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
+TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
+TELEGRAM_API = os.getenv("TELEGRAM_API_URL", TELEGRAM_API_URL)  # point at telegram_stub_server.py for local runs
+ALERT_STATE_PATH = os.path.join(".runlog", "alert_state.json")
+CHAIN_STATE_PATH = os.path.join(".runlog", "chain_state.json")  # last written chains + skipped-tick counter
+
+events = EventLog(EVENTS_DIR)  # pushed to dashboards by server.py (/api/stream)
+alerts = AlertDispatcher(TELEGRAM_TOKEN, TELEGRAM_CHAT_ID, api_url=TELEGRAM_API,
+                         cooldown=ALERT_COOLDOWN, state_path=ALERT_STATE_PATH,
+                         on_alert=lambda key, message: events.publish("alert", {"key": key, "message": message}))
+changes = ChangeDetector(CHAIN_STATE_PATH)
+runs = RunLog(RUNS_DIR)  # replaces .runlog/run_count.txt
+
+
+def timed_stage(stage):
+    # Group stages run on pool threads: summed, not wall time.
+    return metrics.timer("stage_seconds", stage)
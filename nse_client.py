@@ -0,0 +1,200 @@
+# nse_client.py
+# Pooled keep-alive HTTP client for the NSE JSON APIs. One requests.Session
+# (and one user agent, matching the cookie jar) per NSE session, automatic
+# cookie refresh on 401/403 and a circuit breaker so a bad NSE minute fails
+# fast instead of burning three full timeouts per symbol.
+
+import time
+import threading
+import requests
+from urllib.parse import quote
+from requests.adapters import HTTPAdapter
+from metrics import metrics
+
+try:
+    import brotli  # noqa: F401  (lets urllib3 decode "br" responses)
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+NSE_BASE_URL = "https://www.nseindia.com"
+
+
+class CircuitOpenError(Exception):
+    pass
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=3, reset_timeout=60):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self.lock:
+            if self.opened_at is None:
+                return "closed"
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                return "half_open"
+            return "open"
+
+    def allow(self):
+        # Half-open admits a single trial request; its result decides whether
+        # the breaker closes or re-opens for another reset_timeout. Everyone
+        # else is refused until then.
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_timeout or self.trial_in_flight:
+                return False
+            self.trial_in_flight = True
+            return True
+
+    def release(self):
+        # An allowed request that ended with no verdict on NSE's health
+        # (cookie refresh, a 404 for one symbol, the stage deadline).
+        with self.lock:
+            self.trial_in_flight = False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self.lock:
+            self.trial_in_flight = False
+            self.failures += 1
+            if self.failures >= self.failure_threshold or self.opened_at is not None:
+                if self.opened_at is None:
+                    print(f"🚧 NSE circuit breaker open after {self.failures} failures (retry in {self.reset_timeout}s)")
+                self.opened_at = time.monotonic()
+
+
+class NSEClient:
+    def __init__(self, cookie_source=None, base_url=NSE_BASE_URL, pool_size=8, timeout=15,
+                 attempts=3, breaker=None, on_payload=None):
+        self.cookie_source = cookie_source
+        self.base_url = base_url.rstrip("/")
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.attempts = attempts
+        self.breaker = breaker or CircuitBreaker()
+        self.on_payload = on_payload  # (label, payload) of every successful response, see recorder.py
+        self.session = None
+        self.session_key = None
+        self.lock = threading.Lock()
+
+    # -----------------------------------------
+    # ✅ POOLED SESSION (rebuilt only when the NSE cookie session changes)
+    # -----------------------------------------
+    def _new_session(self, user_agent):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=self.pool_size, max_retries=0)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({
+            "accept": "application/json",
+            "accept-encoding": ACCEPT_ENCODING,
+            "accept-language": "en-US,en;q=0.9",
+            "referer": f"{self.base_url}/",
+            "user-agent": user_agent,
+        })
+        return session
+
+    def _session(self, timeout=None):
+        # (session, the cookie string it sends)
+        cookie_string, user_agent = None, None
+        if self.cookie_source is not None:
+            cookie_string = self.cookie_source.get_cookies(timeout)
+            user_agent = self.cookie_source.user_agent
+        key = (cookie_string, user_agent)
+        with self.lock:
+            if self.session is None or self.session_key != key:
+                if self.session is not None:
+                    self.session.close()
+                self.session = self._new_session(user_agent or "Mozilla/5.0")
+                if cookie_string:
+                    self.session.headers["cookie"] = cookie_string
+                self.session_key = key
+            return self.session, cookie_string
+
+    def refresh_cookies(self, stale_cookie, timeout=None):
+        if self.cookie_source is not None:
+            self.cookie_source.refresh(stale_cookie, timeout)
+
+    # -----------------------------------------
+    # ✅ GET JSON (retries, cookie refresh, circuit breaker)
+    # -----------------------------------------
+    def get_json(self, path, label=None, ctx=None):
+        label = label or path
+        url = path if path.startswith("http") else f"{self.base_url}{path}"
+        refreshed = False
+
+        for attempt in range(self.attempts):
+            if ctx is not None and ctx.expired():
+                return None
+            if not self.breaker.allow():
+                print(f"🚧 {label}: NSE circuit breaker open, skipping request")
+                metrics.inc("nse_requests", "breaker_open")
+                return None
+            if attempt:
+                metrics.inc("nse_retries", label)
+            timeout = self.timeout if ctx is None else max(1, min(self.timeout, ctx.remaining()))
+            try:
+                session, cookie_string = self._session(None if ctx is None else ctx.remaining())
+                response = session.get(url, timeout=timeout)
+                metrics.inc("nse_payload_bytes", label, len(response.content))
+                if response.status_code == 200:
+                    payload = response.json()
+                    self.breaker.record_success()
+                    metrics.inc("nse_requests", "ok")
+                    if self.on_payload is not None:
+                        self.on_payload(label, payload)
+                    return payload
+                metrics.inc("nse_requests", f"http_{response.status_code}")
+                print(f"⚠️ {label} fetch failed: HTTP {response.status_code}")
+                if response.status_code in (401, 403) and not refreshed and self.cookie_source is not None:
+                    print(f"🍪 {label}: NSE rejected our cookies, refreshing session")
+                    self.breaker.release()
+                    self.refresh_cookies(cookie_string, None if ctx is None else ctx.remaining())
+                    refreshed = True
+                    continue
+                if 400 <= response.status_code < 500 and response.status_code not in (401, 403):
+                    # Bad symbol or request: retrying won't help, and it says
+                    # nothing about NSE being down for everyone else.
+                    self.breaker.release()
+                    return None
+            except Exception as e:
+                metrics.inc("nse_requests", "error")
+                print(f"❗️ {label} fetch error: {e}")
+            self.breaker.record_failure()
+
+            if attempt + 1 < self.attempts:
+                if ctx is None:
+                    time.sleep(2 ** attempt)
+                elif not ctx.backoff(2 ** attempt):
+                    return None
+        return None
+
+    def option_chain(self, symbol, endpoint="indices", ctx=None):
+        # endpoint: "indices" (NIFTY, BANKNIFTY, ...) or "equities" (F&O stocks).
+        return self.get_json(f"/api/option-chain-{endpoint}?symbol={quote(symbol)}", label=symbol, ctx=ctx)
+
+    def india_vix(self, ctx=None):
+        payload = self.get_json("/api/allIndices", label="INDIA_VIX", ctx=ctx)
+        for item in (payload or {}).get("data", []):
+            if item.get("index") == "INDIA VIX" or item.get("indexSymbol") == "INDIA VIX":
+                return float(item["last"])
+        return None
+
+    def close(self):
+        with self.lock:
+            if self.session is not None:
+                self.session.close()
+                self.session = None
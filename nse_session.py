@@ -0,0 +1,246 @@
+# nse_session.py
+# One headless browser launch per cookie lifetime: it collects the NSE cookies
+# and the India VIX page together, and the cookie jar is cached on disk so the
+# next run (or the next daemon tick) can skip Chrome until the jar expires.
+#
+# selenium, webdriver_manager and bs4 are imported only when Chrome actually
+# launches: with a cached jar the run never pays for them.
+
+import os
+import json
+import time
+import random
+import threading
+import traceback
+from datetime import datetime, timedelta
+from pytz import timezone
+from metrics import metrics
+
+NSE_BASE_URL = "https://www.nseindia.com"
+SESSION_COOKIES = ("nsit", "nseappid")
+
+IST = timezone('Asia/Kolkata')
+
+_driver_path = None  # ChromeDriverManager().install() result, resolved once per process
+
+
+def chrome_driver_path():
+    global _driver_path
+    if _driver_path is None:
+        from webdriver_manager.chrome import ChromeDriverManager
+        _driver_path = ChromeDriverManager().install()
+    return _driver_path
+
+
+def parse_india_vix(page_source):
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(page_source, 'html.parser')
+    for row in soup.find_all('tr'):
+        cols = row.find_all('td')
+        if any("INDIA VIX" in c.text for c in cols):
+            vix_value = next((float(c.text.strip()) for c in cols if c.text.strip().replace(".", "").isdigit()), None)
+            if vix_value:
+                return vix_value
+    return None
+
+
+class NSESession:
+    def __init__(self, user_agents, cookie_path, live_indices_url, cookie_ttl=timedelta(minutes=30),
+                 base_url=NSE_BASE_URL, on_page=None, relaunch_after=40):
+        self.user_agents = user_agents
+        self.base_url = base_url.rstrip("/")
+        self.cookie_path = cookie_path
+        self.live_indices_url = live_indices_url
+        self.cookie_ttl = cookie_ttl
+        self.cookie_string = None
+        self.cookie_expiry = None
+        self.user_agent = random.choice(user_agents)
+        self.browser_vix = None  # VIX read during the last browser launch, consumed once
+        self.on_page = on_page  # (name, html) of the live-indices page, see recorder.py
+        # One refresh path for every fetch thread: the lock serialises jar
+        # reloads and Chrome launches, refreshed_from remembers which cookie
+        # was last replaced (so a 401 wave relaunches once) and launched_at
+        # keeps a failed launch from being retried by each waiting thread.
+        self.lock = threading.RLock()
+        self.refreshed_from = None
+        self.launched_at = None
+        self.relaunch_after = relaunch_after  # seconds between Chrome launches
+
+    def timed(self, stage):
+        return metrics.timer("stage_seconds", stage)
+
+    # -----------------------------------------
+    # ✅ COOKIE JAR (memory + disk)
+    # -----------------------------------------
+    def cookies_valid(self, ist_now=None):
+        ist_now = ist_now or datetime.now(IST)
+        return bool(self.cookie_string and self.cookie_expiry and ist_now < self.cookie_expiry)
+
+    def load_cookie_jar(self):
+        try:
+            with open(self.cookie_path, "r") as f:
+                jar = json.load(f)
+            self.cookie_string = jar["cookie_string"]
+            self.cookie_expiry = datetime.fromisoformat(jar["cookie_expiry"])
+            self.user_agent = jar.get("user_agent", self.user_agent)
+        except (OSError, ValueError, KeyError):
+            return False
+        return self.cookies_valid()
+
+    def save_cookie_jar(self):
+        os.makedirs(os.path.dirname(self.cookie_path) or ".", exist_ok=True)
+        tmp_path = f"{self.cookie_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({
+                "cookie_string": self.cookie_string,
+                "cookie_expiry": self.cookie_expiry.isoformat(),
+                "user_agent": self.user_agent,
+            }, f)
+        os.replace(tmp_path, self.cookie_path)
+
+    def invalidate(self):
+        self.cookie_string = None
+        self.cookie_expiry = None
+        try:
+            os.remove(self.cookie_path)
+        except OSError:
+            pass
+
+    def acquire(self, timeout=None):
+        # False if another thread's refresh outlasted the caller's deadline.
+        return self.lock.acquire(timeout=-1 if timeout is None else max(timeout, 0))
+
+    def launched_recently(self):
+        return self.launched_at is not None and time.monotonic() - self.launched_at < self.relaunch_after
+
+    def get_cookies(self, timeout=None):
+        if self.cookies_valid():
+            print("♻️ Reusing existing NSE cookies")
+            return self.cookie_string
+        if not self.acquire(timeout):
+            return None
+        try:
+            if self.cookies_valid():  # another thread refreshed while we waited
+                return self.cookie_string
+            with self.timed("cookie_cache_load"):
+                cached = self.load_cookie_jar()
+            if cached:
+                print(f"♻️ Reusing cached NSE cookies from {self.cookie_path} (valid until {self.cookie_expiry.strftime('%H:%M:%S')})")
+                return self.cookie_string
+            if self.launched_recently():
+                return None
+            self.launch_browser(timeout)
+            return self.cookie_string if self.cookies_valid() else None
+        finally:
+            self.lock.release()
+
+    def refresh(self, stale_cookie, timeout=None):
+        # NSE rejected stale_cookie. The first thread to get here replaces the
+        # jar (one Chrome launch); the rest find it already replaced and reuse
+        # the new cookies, or None if that launch failed.
+        if not self.acquire(timeout):
+            return None
+        try:
+            if stale_cookie == self.refreshed_from or (self.cookie_string and self.cookie_string != stale_cookie):
+                return self.cookie_string if self.cookies_valid() else None
+            self.refreshed_from = stale_cookie
+            self.invalidate()
+            if self.launched_recently():
+                return None
+            self.launch_browser(timeout)
+            return self.cookie_string if self.cookies_valid() else None
+        finally:
+            self.lock.release()
+
+    # -----------------------------------------
+    # ✅ SINGLE BROWSER LAUNCH (cookies + VIX page)
+    # -----------------------------------------
+    def launch_browser(self, timeout=None):
+        # timeout: seconds the caller can wait (its fetch deadline). Page
+        # loads and waits are capped by it and Chrome is quit once it is
+        # spent, so a launch never runs on into the next tick.
+        with self.lock:
+            self.launched_at = time.monotonic()
+            self._launch_browser(None if timeout is None else time.monotonic() + timeout)
+
+    def _launch_browser(self, stop=None):
+        print("⚡️ Launching headless Chrome for NSE cookies + India VIX...")
+        metrics.inc("browser_launches")
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+        from selenium.webdriver.chrome.options import Options
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        driver = None
+        ist_now = datetime.now(IST)
+        within = lambda seconds: seconds if stop is None else max(0.5, min(seconds, stop - time.monotonic()))
+        self.user_agent = random.choice(self.user_agents)
+        try:
+            options = Options()
+            options.add_argument("--headless")
+            options.add_argument("--no-sandbox")
+            options.add_argument("--disable-dev-shm-usage")
+            options.add_argument("--disable-blink-features=AutomationControlled")
+            options.add_argument("--disable-gpu")
+            options.add_argument("--window-size=1920x1080")
+            options.add_experimental_option("excludeSwitches", ["enable-automation"])
+            options.add_experimental_option("useAutomationExtension", False)
+            options.add_argument(f"user-agent={self.user_agent}")
+
+            with self.timed("driver_install"):
+                driver_path = chrome_driver_path()
+            with self.timed("browser_start"):
+                driver = webdriver.Chrome(service=Service(driver_path), options=options)
+                driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+                driver.set_page_load_timeout(within(30))
+
+            with self.timed("cookie_fetch"):
+                driver.get(f"{self.base_url}/option-chain")
+                WebDriverWait(driver, within(15)).until(EC.presence_of_element_located((By.TAG_NAME, "body")))
+                try:
+                    WebDriverWait(driver, within(10), poll_frequency=0.25).until(
+                        lambda d: any(c['name'] in SESSION_COOKIES for c in d.get_cookies())
+                    )
+                except Exception:
+                    print("⚠️ NSE session cookies not seen yet, using what the page set")
+                cookies = driver.get_cookies()
+                self.cookie_string = "; ".join([f"{c['name']}={c['value']}" for c in cookies])
+                self.cookie_expiry = ist_now + self.cookie_ttl
+                expiries = [c['expiry'] for c in cookies if c['name'] in SESSION_COOKIES and c.get('expiry')]
+                if expiries:
+                    self.cookie_expiry = min(self.cookie_expiry, datetime.fromtimestamp(min(expiries), IST))
+                self.save_cookie_jar()
+                print(f"✅ NSE cookies fetched (valid until {self.cookie_expiry.strftime('%H:%M:%S')})")
+
+            if stop is not None and time.monotonic() >= stop:
+                print("⚠️ Fetch deadline reached, skipping the India VIX page")
+                return
+            with self.timed("vix_page"):
+                driver.set_page_load_timeout(within(30))
+                driver.get(self.live_indices_url)
+                WebDriverWait(driver, within(20)).until(EC.presence_of_element_located((By.TAG_NAME, "table")))
+                try:
+                    WebDriverWait(driver, within(10), poll_frequency=0.25).until(lambda d: "INDIA VIX" in d.page_source)
+                except Exception:
+                    pass
+                page_source = driver.page_source
+                if self.on_page is not None:
+                    self.on_page("live-market-indices", page_source)
+                self.browser_vix = parse_india_vix(page_source)
+                if self.browser_vix is None:
+                    print("❗️ India VIX not found in table rows.")
+                    print("🔎 Dumping partial page content (first 500 chars):")
+                    print(page_source[:500])
+        except Exception:
+            print(f"❗️ NSE browser session error:\n{traceback.format_exc()}")
+        finally:
+            if driver is not None:
+                try:
+                    driver.quit()
+                except Exception:
+                    pass
+
+    def pop_browser_vix(self):
+        vix, self.browser_vix = self.browser_vix, None
+        return vix
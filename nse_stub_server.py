@@ -0,0 +1,334 @@
+# nse_stub_server.py
+# Local stand-in for the NSE endpoints the monitor talks to, so the client,
+# fetch stage and pipeline can be exercised without hitting nseindia.com:
+#
+#   python nse_stub_server.py --port 8765 --require-cookie --fail-first 4
+#   python nse_stub_server.py --frozen   # same chains every call (closed market)
+#   python nse_stub_server.py --replay data/recordings/2025-07-22.jsonl.gz --speed 60
+#   NSE_BASE_URL=http://127.0.0.1:8765 python nifty_master_runner.py
+#
+# Serves synthetic option-chain-indices/-equities payloads shaped like NSE's
+# (any symbol; unknown ones get a 1000-ish spot and monthly expiries), the
+# allIndices JSON (India VIX), the trading-holiday list (plus any --holiday)
+# and two HTML pages that set session cookies and carry the live-indices VIX
+# table for the browser path. With --replay it
+# serves a recorder.py recording instead, one recorded tick at a time
+# (advanced at --speed, looping; replay.py moves it itself with play()).
+
+import gzip
+import json
+import math
+import random
+import argparse
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+SYMBOL_SPECS = {
+    "NIFTY": {"spot": 24850.0, "step": 50, "weekly": True},
+    "BANKNIFTY": {"spot": 56850.0, "step": 100, "weekly": False},
+    "FINNIFTY": {"spot": 26500.0, "step": 50, "weekly": False},
+    "MIDCPNIFTY": {"spot": 12900.0, "step": 25, "weekly": False},
+}
+
+
+def _norm_cdf(x):
+    return 0.5 * (1.0 + math.erf(x / math.sqrt(2.0)))
+
+
+def _bs_price(spot, strike, t, vol, call):
+    if t <= 0:
+        return max(0.0, spot - strike) if call else max(0.0, strike - spot)
+    d1 = (math.log(spot / strike) + 0.5 * vol * vol * t) / (vol * math.sqrt(t))
+    d2 = d1 - vol * math.sqrt(t)
+    if call:
+        return spot * _norm_cdf(d1) - strike * _norm_cdf(d2)
+    return strike * _norm_cdf(-d2) - spot * _norm_cdf(-d1)
+
+
+def _expiry_dates(now, count, weekly):
+    dates = []
+    day = now.date()
+    while len(dates) < count:
+        if day.weekday() == 3:  # Thursday expiries
+            next_week = day + timedelta(days=7)
+            if weekly or next_week.month != day.month:
+                dates.append(day)
+        day += timedelta(days=1)
+    return dates
+
+
+# -----------------------------------------
+# ✅ SYNTHETIC OPTION CHAIN (NSE option-chain-indices shape)
+# -----------------------------------------
+def synthetic_option_chain(symbol="NIFTY", now=None, strikes_per_side=40, n_expiries=6, seed=None, spot=None):
+    spec = SYMBOL_SPECS.get(symbol, {"spot": 1000.0, "step": 10, "weekly": False})
+    now = now or datetime.now()
+    rng = random.Random(seed if seed is not None else f"{symbol}-{now.isoformat()}")
+    spot = spot or spec["spot"] * (1 + rng.uniform(-0.01, 0.01))
+    step = spec["step"]
+    atm = round(spot / step) * step
+    expiries = _expiry_dates(now, n_expiries, spec["weekly"])
+
+    data = []
+    for expiry in expiries:
+        expiry_str = expiry.strftime("%d-%b-%Y")
+        t = max((datetime.combine(expiry, datetime.min.time()) + timedelta(hours=15, minutes=30) - now).total_seconds(), 3600) / (365 * 86400)
+        for k in range(-strikes_per_side, strikes_per_side + 1):
+            strike = atm + k * step
+            item = {"strikePrice": strike, "expiryDate": expiry_str}
+            for side, call in (("CE", True), ("PE", False)):
+                vol = 0.11 + 0.02 * abs(k) / strikes_per_side + rng.uniform(-0.005, 0.005)
+                ltp = round(_bs_price(spot, strike, t, vol, call) * 20) / 20
+                volume = int(rng.uniform(0.2, 1.0) * 500000 / (1 + abs(k)))
+                oi = int(rng.uniform(0.5, 1.0) * 200000 / (1 + 0.3 * abs(k)))
+                item[side] = {
+                    "strikePrice": strike,
+                    "expiryDate": expiry_str,
+                    "underlying": symbol,
+                    "identifier": f"OPTIDX{symbol}{expiry.strftime('%d-%m-%Y')}{side}{strike:.2f}",
+                    "openInterest": oi,
+                    "changeinOpenInterest": int(oi * rng.uniform(-0.1, 0.1)),
+                    "pchangeinOpenInterest": round(rng.uniform(-10, 10), 2),
+                    "totalTradedVolume": volume,
+                    "impliedVolatility": round(vol * 100, 2) if ltp > 0.05 else 0,
+                    "lastPrice": ltp,
+                    "change": round(rng.uniform(-5, 5), 2),
+                    "pChange": round(rng.uniform(-3, 3), 2),
+                    "totalBuyQuantity": int(volume * rng.uniform(0.1, 0.3)),
+                    "totalSellQuantity": int(volume * rng.uniform(0.1, 0.3)),
+                    "bidQty": 75 * rng.randint(1, 40),
+                    "bidprice": max(0.05, round(ltp - 0.05, 2)),
+                    "askQty": 75 * rng.randint(1, 40),
+                    "askPrice": round(ltp + 0.05, 2),
+                    "underlyingValue": round(spot, 2),
+                }
+            data.append(item)
+
+    expiry_strs = [e.strftime("%d-%b-%Y") for e in expiries]
+    return {
+        "records": {
+            "expiryDates": expiry_strs,
+            "data": data,
+            "timestamp": now.strftime("%d-%b-%Y %H:%M:%S"),
+            "underlyingValue": round(spot, 2),
+            "strikePrices": sorted({item["strikePrice"] for item in data}),
+        },
+        "filtered": {"data": [d for d in data if d["expiryDate"] == expiry_strs[0]]},
+    }
+
+
+STUB_HOLIDAYS = ((1, 26, "Republic Day"), (5, 1, "Maharashtra Day"), (8, 15, "Independence Day"),
+                 (10, 2, "Mahatma Gandhi Jayanti"), (12, 25, "Christmas"))
+
+
+def synthetic_holidays(year, extra=()):
+    # /api/holiday-master?type=trading: this year's weekday holidays per segment.
+    days = [(datetime(year, month, day), description) for month, day, description in STUB_HOLIDAYS]
+    days += [(datetime.strptime(day, "%Y-%m-%d"), "Stub holiday") for day in extra]
+    items = [{"Sr_no": i + 1, "tradingDate": day.strftime("%d-%b-%Y"), "weekDay": day.strftime("%A"),
+              "description": description, "morning_session": "", "evening_session": ""}
+             for i, (day, description) in enumerate(sorted(d for d in days if d[0].weekday() < 5))]
+    return {"CM": items, "FO": items, "CD": items}
+
+
+def synthetic_all_indices(vix=None, now=None):
+    rng = random.Random((now or datetime.now()).isoformat())
+    vix = vix if vix is not None else round(rng.uniform(10.5, 14.5), 2)
+    return {"data": [
+        {"key": "BROAD MARKET INDICES", "index": "NIFTY 50", "indexSymbol": "NIFTY 50", "last": SYMBOL_SPECS["NIFTY"]["spot"]},
+        {"key": "BROAD MARKET INDICES", "index": "INDIA VIX", "indexSymbol": "INDIA VIX", "last": vix},
+    ]}
+
+
+# -----------------------------------------
+# ✅ HTTP HANDLER
+# -----------------------------------------
+class StubNSEHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+    def _send(self, status, body, content_type="application/json", extra_headers=None):
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body, separators=(",", ":")).encode()
+        elif isinstance(body, str):
+            body = body.encode()
+        headers = list(extra_headers or [])
+        if "gzip" in self.headers.get("Accept-Encoding", "") and len(body) > 512:
+            body = gzip.compress(body, compresslevel=5)
+            headers.append(("Content-Encoding", "gzip"))
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _fault(self):
+        with self.server.lock:
+            self.server.requests_seen += 1
+            if self.server.fail_first > 0:
+                self.server.fail_first -= 1
+                return self.server.fail_status
+        return None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        stub = self.server
+
+        if url.path == "/option-chain" or url.path == "/":
+            cookies = [("Set-Cookie", f"{name}=stub-{name}; Path=/") for name in ("nsit", "nseappid")]
+            self._send(200, "<html><body>NSE stub</body></html>", "text/html", cookies)
+            return
+        if url.path == "/market-data/live-market-indices":
+            self._send(200, stub.live_indices_page(), "text/html")
+            return
+
+        if stub.require_cookie and "nsit=" not in self.headers.get("Cookie", ""):
+            self._send(401, {"error": "unauthorized"})
+            return
+        status = self._fault()
+        if status:
+            self._send(status, {"error": "injected"})
+            return
+
+        if url.path in ("/api/option-chain-indices", "/api/option-chain-equities"):
+            symbol = query.get("symbol", ["NIFTY"])[0].upper()
+            chain = stub.option_chain(symbol)
+            if chain is None:
+                self._send(404, {"error": f"{symbol} not in this tick of the recording"})
+            else:
+                self._send(200, chain)
+        elif url.path == "/api/holiday-master":
+            self._send(200, synthetic_holidays(stub.clock().year, stub.holidays))
+        elif url.path == "/api/allIndices":
+            payload = stub.all_indices()
+            if payload is None:
+                self._send(404, {"error": "INDIA_VIX not in this tick of the recording"})
+            else:
+                self._send(200, payload)
+        else:
+            self._send(404, {"error": "not found"})
+
+
+class StubNSEServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, require_cookie=False, fail_first=0, fail_status=503,
+                 strikes_per_side=40, n_expiries=6, frozen=False, verbose=False):
+        super().__init__(address, StubNSEHandler)
+        self.require_cookie = require_cookie
+        self.fail_first = fail_first
+        self.fail_status = fail_status
+        self.strikes_per_side = strikes_per_side
+        self.n_expiries = n_expiries
+        self.frozen = frozen
+        self.frozen_chains = {}
+        self.verbose = verbose
+        self.requests_seen = 0
+        self.lock = threading.Lock()
+        self.clock = datetime.now
+        self.tick = None  # recorder.py tick being replayed (play()), else synthetic data
+        self.holidays = []  # extra YYYY-MM-DD holidays in /api/holiday-master
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    # -----------------------------------------
+    # ✅ REPLAY (recorder.py recordings)
+    # -----------------------------------------
+    def play(self, tick):
+        # From now on every endpoint answers from this recorded tick.
+        with self.lock:
+            self.tick = tick
+
+    def current_tick(self):
+        with self.lock:
+            return self.tick
+
+    def all_indices(self):
+        tick = self.current_tick()
+        if tick is not None:
+            return tick["sources"].get("INDIA_VIX")
+        return synthetic_all_indices(now=self.clock())
+
+    def live_indices_page(self):
+        tick = self.current_tick()
+        if tick is not None and "live-market-indices" in tick["pages"]:
+            return tick["pages"]["live-market-indices"]
+        payload = self.all_indices() or {"data": []}
+        vix = next((item["last"] for item in payload["data"] if item.get("index") == "INDIA VIX"), "-")
+        return f"<html><body><table><tr><td>INDIA VIX</td><td>{vix}</td></tr></table></body></html>"
+
+    def option_chain(self, symbol):
+        tick = self.current_tick()
+        if tick is not None:
+            return tick["sources"].get(symbol)
+        if self.frozen and symbol in self.frozen_chains:
+            return self.frozen_chains[symbol]
+        chain = synthetic_option_chain(symbol, now=self.clock(), strikes_per_side=self.strikes_per_side,
+                                       n_expiries=self.n_expiries)
+        if self.frozen:
+            self.frozen_chains[symbol] = chain
+        return chain
+
+
+def play_recording(server, path, speed, loop=True):
+    # Moves the stub through a recording at `speed` recorded seconds per wall second.
+    from recorder import iter_recording, tick_time
+    while True:
+        started, first = time.monotonic(), None
+        for tick in iter_recording(path):
+            first = first or tick_time(tick)
+            wait = started + (tick_time(tick) - first).total_seconds() / speed - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            server.play(tick)
+            print(f"📼 Serving the {tick['time']} tick")
+        if not loop or first is None:
+            return
+
+
+def serve_in_thread(port=0, **kwargs):
+    server = StubNSEServer(("127.0.0.1", port), **kwargs)
+    thread = threading.Thread(target=server.serve_forever, name="nse-stub", daemon=True)
+    thread.start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stub of the NSE endpoints used by the monitor")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--require-cookie", action="store_true", help="answer 401 to API calls without an nsit cookie")
+    parser.add_argument("--fail-first", type=int, default=0, help="fail this many API requests before serving data")
+    parser.add_argument("--fail-status", type=int, default=503)
+    parser.add_argument("--strikes", type=int, default=40, help="strikes on each side of ATM per expiry")
+    parser.add_argument("--expiries", type=int, default=6)
+    parser.add_argument("--frozen", action="store_true", help="serve the same chains every time, like NSE after the close")
+    parser.add_argument("--holiday", action="append", default=[], help="extra YYYY-MM-DD trading holiday (repeatable)")
+    parser.add_argument("--replay", help="serve a recorder.py recording (.jsonl.gz) instead of synthetic chains")
+    parser.add_argument("--speed", type=float, default=60, help="with --replay: recorded seconds per wall second (loops at the end)")
+    args = parser.parse_args()
+
+    server = StubNSEServer(("127.0.0.1", args.port), require_cookie=args.require_cookie,
+                           fail_first=args.fail_first, fail_status=args.fail_status,
+                           strikes_per_side=args.strikes, n_expiries=args.expiries,
+                           frozen=args.frozen, verbose=True)
+    server.holidays = args.holiday
+    print(f"✅ NSE stub listening on {server.base_url}")
+    if args.replay:
+        threading.Thread(target=play_recording, args=(server, args.replay, max(args.speed, 0.001)),
+                         name="nse-replay", daemon=True).start()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("👋 NSE stub stopped.")
@@ -0,0 +1,226 @@
+# plot_renderer.py
+# The three-panel IVP dashboard plot per symbol (VIX & IV, spot vs straddle
+# & VWAP, spot vs IVP%), rendered with the Agg backend.
+#
+# - Symbols render on a bounded pool of worker processes. Workers live as
+#   long as the PlotRenderer (the whole session in --daemon mode) and keep
+#   their figures, so a tick only swaps line data and rescales the axes.
+#   They come from a forkserver (pool_context), never from a fork of the
+#   monitor itself, whose fetch and alert threads are running by then.
+# - A fingerprint of the plotted columns is kept per PNG; when the data has
+#   not changed since the last render the symbol is not re-rendered at all.
+# - The daily PDF reuses SymbolFigure from eod_report.py, after the close.
+
+import os
+import json
+import hashlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import matplotlib.dates as mdates
+
+FIGSIZE = (14, 14)
+DPI = 100
+
+# (panel, axis, series suffix or "india_vix", legend label, style)
+SERIES = [
+    (0, "left", "india_vix", "India VIX", {"color": "red", "linestyle": "--"}),
+    (0, "right", "curr_straddle_iv", "Curr IV", {"color": "blue"}),
+    (0, "right", "next_straddle_iv", "Next IV", {"color": "orange"}),
+    (1, "left", "curr_spot", "Spot", {"color": "black"}),
+    (1, "right", "curr_straddle", "Curr Premium", {"color": "blue"}),
+    (1, "right", "curr_vwap", "Curr VWAP", {"color": "blue", "linestyle": "--"}),
+    (1, "right", "next_straddle", "Next Premium", {"color": "orange"}),
+    (1, "right", "next_vwap", "Next VWAP", {"color": "orange", "linestyle": "--"}),
+    (2, "left", "curr_spot", "Spot Price", {"color": "black"}),
+    (2, "right", "curr_ivp", "Curr IVP%", {"color": "green"}),
+    (2, "right", "next_ivp", "Next IVP%", {"color": "darkorange"}),
+]
+PANELS = [
+    ("VIX & IV vs Time ({title})", ("India VIX", "red"), ("Straddle IV", "blue")),
+    ("Spot vs Straddle Premium & VWAP ({title})", ("Spot", "black"), ("Straddle / VWAP", "black")),
+    ("Spot vs IVP% ({title})", ("Spot Price", "black"), ("IVP %", "green")),
+]
+
+
+def series_column(prefix, suffix):
+    return suffix if suffix == "india_vix" else f"{prefix}_{suffix}"
+
+
+def symbol_data(df, prefix):
+    # Plain numpy arrays for one symbol: x as matplotlib date numbers, every
+    # series as float64 (missing columns become all-NaN, i.e. an empty line).
+    data = {"x": mdates.date2num(df["timestamp"].to_numpy())}
+    for _, _, suffix, _, _ in SERIES:
+        column = series_column(prefix, suffix)
+        if column in df.columns:
+            data[column] = pd.to_numeric(df[column], errors="coerce").astype("float64").to_numpy()
+        else:
+            data[column] = np.full(len(df), np.nan)
+    return data
+
+
+def fingerprint(prefix, title, data):
+    digest = hashlib.sha1(f"{prefix}|{title}|{FIGSIZE}|{DPI}".encode())
+    for key in sorted(data):
+        digest.update(key.encode())
+        digest.update(np.ascontiguousarray(data[key]).tobytes())
+    return digest.hexdigest()
+
+
+# -----------------------------------------
+# ✅ REUSABLE FIGURE
+# -----------------------------------------
+class SymbolFigure:
+    def __init__(self, prefix, title):
+        self.prefix = prefix
+        self.fig, axes = plt.subplots(3, 1, figsize=FIGSIZE, dpi=DPI, sharex=True)
+        # Fixed margins instead of tight_layout, which would re-measure every tick.
+        self.fig.subplots_adjust(left=0.07, right=0.93, top=0.96, bottom=0.06, hspace=0.5)
+        self.axes = {}
+        for panel, (panel_title, (left_label, left_color), (right_label, right_color)) in enumerate(PANELS):
+            ax = axes[panel]
+            twin = ax.twinx()
+            ax.set_title(panel_title.format(title=title))
+            ax.set_ylabel(left_label, color=left_color)
+            twin.set_ylabel(right_label, color=right_color)
+            ax.xaxis.set_major_formatter(mdates.DateFormatter("%H:%M"))
+            ax.tick_params(axis="x", rotation=45)
+            self.axes[(panel, "left")] = ax
+            self.axes[(panel, "right")] = twin
+
+        self.lines = []
+        for panel, side, suffix, label, style in SERIES:
+            line, = self.axes[(panel, side)].plot([], [], label=label, linewidth=2, **style)
+            self.lines.append((series_column(prefix, suffix), line))
+        for (panel, side), ax in self.axes.items():
+            ax.legend(loc="lower left" if side == "left" else "upper left")
+
+    def update(self, data):
+        for column, line in self.lines:
+            line.set_data(data["x"], data[column])
+        for ax in self.axes.values():
+            ax.relim()
+            ax.autoscale_view()
+
+    def save(self, target, **kwargs):
+        self.fig.savefig(target, **kwargs)
+
+
+_FIGURES = {}  # per process: prefix -> SymbolFigure, reused across ticks
+
+
+def pool_context(preload=("plot_renderer",)):
+    # Forking the monitor would copy its fetch/dispatcher threads' locks
+    # (stdout, metrics) in whatever state they are in. The forkserver is a
+    # clean single-threaded process that imports `preload` (matplotlib) once
+    # and forks each worker from there. spawn where there is none (Windows).
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("spawn")
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload(list(preload))
+    return context
+
+
+def render_symbol(prefix, title, png_path, data):
+    figure = _FIGURES.get(prefix)
+    if figure is None:
+        figure = _FIGURES[prefix] = SymbolFigure(prefix, title)
+    figure.update(data)
+    tmp_path = f"{png_path}.tmp.png"
+    figure.save(tmp_path)
+    os.replace(tmp_path, png_path)
+    return png_path
+
+
+# -----------------------------------------
+# ✅ RENDERER (parallel, skip-if-unchanged)
+# -----------------------------------------
+class PlotRenderer:
+    def __init__(self, targets, state_path=None, parallel=True, max_workers=4):
+        # targets: {prefix: (title, png_path)}
+        self.targets = targets
+        self.state_path = state_path
+        self.parallel = parallel
+        self.max_workers = max(1, min(len(targets), max_workers))
+        self.pool = None
+        self.rendered = self._load_state()
+
+    def _load_state(self):
+        if not self.state_path or not os.path.exists(self.state_path):
+            return {}
+        try:
+            with open(self.state_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self):
+        if not self.state_path:
+            return
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        with open(self.state_path, "w") as f:
+            json.dump(self.rendered, f)
+
+    def _executor(self):
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=pool_context())
+        return self.pool
+
+    def render(self, df, force=False):
+        # df: one frame for every target, or {prefix: frame} when symbols live
+        # in different tables. Returns {prefix: "rendered" | "unchanged" | "failed"}.
+        status = {}
+        jobs = {}
+        for prefix, (title, png_path) in self.targets.items():
+            frame = df.get(prefix) if isinstance(df, dict) else df
+            if frame is None or frame.empty:
+                continue
+            data = symbol_data(frame, prefix)
+            digest = fingerprint(prefix, title, data)
+            if not force and self.rendered.get(png_path) == digest and os.path.exists(png_path):
+                status[prefix] = "unchanged"
+                print(f"⏭️ {title} plot unchanged, keeping {png_path}")
+                continue
+            os.makedirs(os.path.dirname(png_path) or ".", exist_ok=True)
+            jobs[prefix] = (title, png_path, data, digest)
+
+        if self.parallel and len(jobs) > 1:
+            futures = {prefix: self._executor().submit(render_symbol, prefix, title, png_path, data)
+                       for prefix, (title, png_path, data, _) in jobs.items()}
+            results = {}
+            for prefix, future in futures.items():
+                try:
+                    results[prefix] = future.result()
+                except Exception as e:
+                    results[prefix] = e
+        else:
+            results = {}
+            for prefix, (title, png_path, data, _) in jobs.items():
+                try:
+                    results[prefix] = render_symbol(prefix, title, png_path, data)
+                except Exception as e:
+                    results[prefix] = e
+
+        for prefix, result in results.items():
+            title, png_path, _, digest = jobs[prefix]
+            if isinstance(result, Exception):
+                status[prefix] = "failed"
+                self.rendered.pop(png_path, None)
+                print(f"❌ {title} plot failed: {result}")
+            else:
+                status[prefix] = "rendered"
+                self.rendered[png_path] = digest
+                print(f"✅ PNG Saved: {png_path}")
+        if jobs:
+            self._save_state()
+        return status
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=True)
+            self.pool = None
@@ -0,0 +1,57 @@
+# plot_stage.py
+# Plot stage of the monitor: the dashboard PNGs for every active symbol,
+# rendered by plot_renderer.py's worker processes. Imports matplotlib, so
+# monitor_cycle.py loads it only when there is something to draw. The daily
+# PDF is eod_report.py's job, once after the close.
+
+import os
+import pandas as pd
+from plot_renderer import PlotRenderer
+from metrics import metrics
+from source_stage import SYMBOL_SPECS
+from row_stage import groups, load_existing_csv
+from config import STATIC_DIR
+
+SAVE_PNG = True
+PLOT_WORKERS = 4  # renderer processes shared by all symbols
+PLOT_STATE_PATH = os.path.join(".runlog", "plot_state.json")  # fingerprints of the last rendered PNGs
+
+plots = PlotRenderer({spec["prefix"]: (spec["name"], spec["png_path"]) for spec in SYMBOL_SPECS},
+                     state_path=PLOT_STATE_PATH, max_workers=PLOT_WORKERS)  # workers keep their figures across daemon ticks
+
+# -----------------------------------------
+# ✅ GENERATE IVP PLOTS (PNG)
+# -----------------------------------------
+def generate_ivp_plots():
+    print("🖼️ Generating IVP Plots...")
+
+    try:
+        frames = {}
+        for group in groups.values():
+            df = load_existing_csv(group)
+            if df.empty:
+                continue
+
+            df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
+            df = df.dropna(subset=['timestamp'])
+            df = df.sort_values("timestamp")
+
+            if 'india_vix' not in df.columns:
+                df['india_vix'] = None
+            df['india_vix'] = df['india_vix'].ffill()
+            frames.update({spec["prefix"]: df for spec in group.specs})
+        if not frames:
+            print("⚠️ No data in CSV to plot")
+            return
+
+        if SAVE_PNG:
+            os.makedirs(STATIC_DIR, exist_ok=True)
+            for status in plots.render(frames).values():
+                metrics.inc("plots", status)
+
+    except Exception as e:
+        print(f"❌ Error in generate_ivp_plots(): {e}")
+
+
+def close():
+    plots.close()
@@ -0,0 +1,257 @@
+# recompute.py
+# Rebuilds every derived VWAP/IVP column ({label}_vwap, {label}_ivp and the
+# IVP_EXTRA_WINDOWS variants) for the whole snapshot store in one pass, e.g.
+# after changing LOOKBACK or the window set in config.py.
+#
+#   python recompute.py            # recompute and rewrite the store (+ CSV export)
+#   python recompute.py --dry-run  # recompute and report, store untouched
+#   python recompute.py --check    # prove the result matches the live engine (tests/test_recompute.py in CI)
+#   python recompute.py --group finnifty  # another symbol table (symbols.py)
+#
+# Tick windows are computed with cumulative sums and a sliding window view per
+# (label, expiry run); session windows ("Nd") replay the engine's own
+# RollingWindow, which is already O(log n) per row. Rounding goes through the
+# same helpers as ivp_engine.py, so the output is identical to what
+# prepare_combined_row would have written tick by tick. Rows marked
+# {label}_repeat (an unchanged chain, see row_stage.py) are not samples: they
+# carry the label's previous values, as they did live.
+
+import time
+import argparse
+import numpy as np
+import pandas as pd
+
+from config import CSV_FILENAME, STORE_DIR, STORAGE_BACKEND, EXPORT_CSV, IVP_WINDOWS
+from storage import open_store, CSVStore
+from symbols import group_paths
+from ivp_engine import IVPEngine, RollingWindow, IV_SCALE, PRICE_SCALE, vwap_from_sums, ivp_from_count
+
+CHUNK_ROWS = 50_000  # bounds the (rows x LOOKBACK) comparison matrix
+
+
+def derived_labels(df):
+    return [c[:-len("_straddle_iv")] for c in df.columns if c.endswith("_straddle_iv")]
+
+
+def derived_column(label, kind, suffix):
+    return f"{label}_{kind}{'_' + suffix if suffix else ''}"
+
+
+def is_derived(col, label):
+    return col.startswith((f"{label}_vwap", f"{label}_ivp"))
+
+
+# -----------------------------------------
+# ✅ PER-LABEL INPUTS
+# -----------------------------------------
+def repeated(df, label):
+    # Rows that carried the label's last sample instead of observing a new one.
+    present = df[f"{label}_expiry"].notna().to_numpy()
+    if f"{label}_repeat" not in df.columns:
+        return present, np.zeros(len(df), dtype=bool)
+    repeat = (pd.to_numeric(df[f"{label}_repeat"], errors="coerce") == 1).to_numpy() & present
+    return present & ~repeat, repeat
+
+
+def carry_forward(column, observed, repeat):
+    # Repeat rows take the value of the label's last observed row.
+    previous = np.maximum.accumulate(np.where(observed, np.arange(len(column)), -1))
+    rows = np.flatnonzero(repeat & (previous >= 0))
+    column[rows] = column[previous[rows]]
+    return column
+
+
+def label_inputs(df, label):
+    # Rows where the live path called engine.observe for this label, and the
+    # per-row values the engine would have pushed for them.
+    observed, repeat = repeated(df, label)
+    rows = df.loc[observed]
+    expiry = rows[f"{label}_expiry"].astype(str).to_numpy()
+    straddle, volume, iv = (pd.to_numeric(rows[f"{label}_{col}"], errors="coerce").astype("float64").to_numpy()
+                            for col in ("straddle", "total_vol", "straddle_iv"))
+
+    valid = ~(np.isnan(straddle) | np.isnan(volume))
+    vol = np.where(valid, volume, 0).astype(np.int64)
+    paise = np.where(valid, np.rint(np.where(valid, straddle, 0) * PRICE_SCALE), 0).astype(np.int64)
+    # Python ints, so the running sums stay exact however long the run is.
+    pv = paise.astype(object) * vol.astype(object)
+    has_iv = ~np.isnan(iv)
+    bucket = np.where(has_iv, np.maximum(0, np.rint(np.where(has_iv, iv, 0) * IV_SCALE)), -1).astype(np.int64)
+
+    run_start = np.r_[True, expiry[1:] != expiry[:-1]]
+    run_first = np.maximum.accumulate(np.where(run_start, np.arange(len(rows)), 0))
+    sessions = rows["timestamp"].astype(str).str[:10].to_numpy()
+    return {
+        "observed": observed, "repeat": repeat, "pv": pv, "vol": vol.astype(object), "bucket": bucket,
+        "has_iv": has_iv, "run_start": run_start, "run_first": run_first, "sessions": sessions,
+    }
+
+
+# -----------------------------------------
+# ✅ TICK WINDOWS (vectorised)
+# -----------------------------------------
+def tick_window(inputs, ticks):
+    n = len(inputs["bucket"])
+    index = np.arange(n)
+    lo = np.maximum(inputs["run_first"], index - ticks)  # window is rows [lo, i)
+
+    cum_pv = np.r_[0, np.cumsum(inputs["pv"])] if n else np.zeros(1, dtype=object)
+    cum_vol = np.r_[0, np.cumsum(inputs["vol"])] if n else np.zeros(1, dtype=object)
+    sum_pv = cum_pv[index] - cum_pv[lo]
+    sum_vol = cum_vol[index] - cum_vol[lo]
+    vwap = [vwap_from_sums(p, v) for p, v in zip(sum_pv, sum_vol)]
+
+    bucket = inputs["bucket"]
+    padded = np.r_[np.full(ticks, -1, dtype=np.int64), bucket]
+    offsets = np.arange(ticks)
+    below = np.zeros(n, dtype=np.int64)
+    total = np.zeros(n, dtype=np.int64)
+    for start in range(0, n, CHUNK_ROWS):
+        stop = min(n, start + CHUNK_ROWS)
+        # Row i sees rows i-ticks .. i-1 of the same expiry run.
+        window = np.lib.stride_tricks.sliding_window_view(padded, ticks)[start:stop]
+        first = (lo[start:stop] - index[start:stop] + ticks)[:, None]
+        counted = (offsets[None, :] >= first) & (window >= 0)
+        below[start:stop] = (counted & (window < bucket[start:stop, None])).sum(axis=1)
+        total[start:stop] = counted.sum(axis=1)
+    ivp = [ivp_from_count(int(b), int(t)) if ok else None
+           for b, t, ok in zip(below, total, inputs["has_iv"])]
+    return vwap, ivp
+
+
+# -----------------------------------------
+# ✅ SESSION WINDOWS (engine replay)
+# -----------------------------------------
+def session_window(inputs, spec):
+    window = RollingWindow(spec)
+    vwap, ivp = [], []
+    for i in range(len(inputs["bucket"])):
+        if inputs["run_start"][i]:
+            window.reset()
+        window.advance(inputs["sessions"][i])
+        bucket = int(inputs["bucket"][i])
+        vwap.append(window.vwap())
+        ivp.append(ivp_from_count(window.ivs.prefix(bucket - 1), window.iv_count) if bucket >= 0 else None)
+        window.push(inputs["sessions"][i], inputs["pv"][i], inputs["vol"][i], bucket if bucket >= 0 else None)
+    return vwap, ivp
+
+
+# -----------------------------------------
+# ✅ RECOMPUTE
+# -----------------------------------------
+def recompute(df, windows=IVP_WINDOWS):
+    # Rows are taken in store order, which is the order the live path saw them.
+    df = df.reset_index(drop=True)
+    labels = derived_labels(df)
+    derived = {}
+    for label in labels:
+        if f"{label}_expiry" not in df.columns:
+            continue
+        inputs = label_inputs(df, label)
+        for suffix, spec in windows.items():
+            if isinstance(spec, int):
+                vwap, ivp = tick_window(inputs, spec)
+            else:
+                vwap, ivp = session_window(inputs, spec)
+            for kind, values in (("vwap", vwap), ("ivp", ivp)):
+                column = np.full(len(df), np.nan)
+                column[inputs["observed"]] = [np.nan if v is None else v for v in values]
+                derived[derived_column(label, kind, suffix)] = carry_forward(column, inputs["observed"], inputs["repeat"])
+
+    # Same column layout as the live row: derived columns follow {label}_straddle_iv,
+    # stale windows that are no longer configured are dropped.
+    columns = {}
+    for col in df.columns:
+        if any(is_derived(col, label) for label in labels):
+            continue
+        columns[col] = df[col]
+        if col.endswith("_straddle_iv"):
+            label = col[:-len("_straddle_iv")]
+            for name in (derived_column(label, kind, suffix) for suffix in windows for kind in ("vwap", "ivp")):
+                if name in derived:
+                    columns[name] = derived[name]
+    return pd.DataFrame(columns)
+
+
+# -----------------------------------------
+# ✅ CHECK AGAINST THE LIVE ENGINE
+# -----------------------------------------
+def replay_live(df, windows=IVP_WINDOWS):
+    # Feeds the rows through IVPEngine one tick at a time, exactly as
+    # prepare_combined_row does, and collects what it would have written.
+    engine = IVPEngine(windows, log_rollovers=False)
+    labels = [label for label in derived_labels(df) if f"{label}_expiry" in df.columns]
+    out = {derived_column(label, kind, suffix): np.full(len(df), np.nan)
+           for label in labels for suffix in windows for kind in ("vwap", "ivp")}
+    columns = ["timestamp"] + [f"{label}_{c}" for label in labels
+                               for c in ("expiry", "straddle", "total_vol", "straddle_iv")]
+    repeats = {label: repeated(df, label)[1] for label in labels}
+    last = {}
+    for i, row in enumerate(df[columns].itertuples(index=False, name=None)):
+        timestamp = row[0]
+        for j, label in enumerate(labels):
+            expiry, straddle, total_vol, straddle_iv = row[1 + 4 * j: 5 + 4 * j]
+            if pd.isna(expiry):
+                continue
+            if repeats[label][i]:
+                stats = last.get(label, {})
+            else:
+                stats = last[label] = engine.observe(label, timestamp, expiry, straddle, total_vol, straddle_iv)
+            for key, value in stats.items():
+                if value is not None:
+                    out[f"{label}_{key}"][i] = value
+    return out
+
+
+def check(df, windows=IVP_WINDOWS):
+    started = time.perf_counter()
+    fast = recompute(df, windows)
+    fast_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    live = replay_live(df.reset_index(drop=True), windows)
+    live_seconds = time.perf_counter() - started
+
+    mismatches = 0
+    for column, expected in live.items():
+        actual = fast[column].to_numpy(dtype=float)
+        same = (actual == expected) | (np.isnan(actual) & np.isnan(expected))
+        bad = np.flatnonzero(~same)
+        mismatches += len(bad)
+        for i in bad[:5]:
+            print(f"❌ {column} row {i} ({fast['timestamp'].iloc[i]}): recompute={actual[i]} live={expected[i]}")
+    print(f"🔬 {len(df)} rows x {len(live)} derived columns: recompute {fast_seconds:.2f}s, "
+          f"live engine replay {live_seconds:.2f}s")
+    if mismatches:
+        print(f"❌ {mismatches} cells differ from the live path")
+        return False
+    print("✅ Recompute matches the live path row-for-row")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute derived VWAP/IVP columns for the whole store")
+    parser.add_argument("--backend", default=STORAGE_BACKEND)
+    parser.add_argument("--root", default=STORE_DIR)
+    parser.add_argument("--group", help="symbol table from symbols.py (sets the store root and CSV export)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--dry-run", action="store_true", help="recompute without writing anything")
+    mode.add_argument("--check", action="store_true", help="compare against a tick-by-tick engine replay")
+    args = parser.parse_args()
+    root, csv_path = group_paths(args.group) if args.group else (args.root, CSV_FILENAME)
+
+    store = open_store(args.backend, root)
+    df = store.read()
+    print(f"✅ Loaded {len(df)} rows from the {store.name} snapshot store")
+    if args.check:
+        raise SystemExit(0 if check(df) else 1)
+
+    started = time.perf_counter()
+    result = recompute(df)
+    windows = ", ".join(f"{suffix or 'primary'}={spec}" for suffix, spec in IVP_WINDOWS.items())
+    print(f"✅ Recomputed {len(result)} rows in {time.perf_counter() - started:.2f}s (windows: {windows})")
+    if args.dry_run:
+        raise SystemExit(0)
+    store.replace_all(result)
+    if EXPORT_CSV:
+        CSVStore(csv_path).replace_all(result)
+    print(f"✅ Rewrote the {store.name} store" + (f" and {csv_path}" if EXPORT_CSV else ""))
@@ -0,0 +1,101 @@
+# recorder.py
+# Raw NSE payload recorder for offline replay and benchmarks. With
+# NSE_RECORD=1 the monitor keeps, per tick, every payload NSE answered (the
+# option-chain JSON of each symbol, the allIndices JSON behind India VIX) and
+# the live-indices page whenever the browser loaded it, as one JSON line in
+# RECORDINGS_DIR/<IST day>.jsonl.gz:
+#
+#   {"time": "2025-07-22 10:15:00", "sources": {"NIFTY": {...}, "INDIA_VIX": {...}},
+#    "pages": {"live-market-indices": "<html>..."}}
+#
+# nse_stub_server.py --replay serves a recording back, replay.py runs one
+# through the real pipeline and benchmarks.py suite builds synthetic ones.
+# chain_capture.py is the compact, parsed archive for analysis; this is the
+# verbatim input.
+
+import os
+import gzip
+import json
+import threading
+from datetime import datetime
+from pytz import timezone
+
+IST = timezone("Asia/Kolkata")
+COMPRESS_LEVEL = 5  # ~4x smaller than the JSON at a fraction of level 9's CPU
+
+
+class Recorder:
+    def __init__(self, root):
+        self.root = root
+        self.lock = threading.Lock()
+        self.sources = {}
+        self.pages = {}
+
+    def add(self, source, payload):
+        # nse_client.py on_payload: called from the fetch threads.
+        with self.lock:
+            self.sources[source] = payload
+
+    def add_page(self, name, html):
+        # nse_session.py on_page: the HTML the browser path parsed.
+        with self.lock:
+            self.pages[name] = html
+
+    def flush(self, now=None):
+        # One line per tick; each append is its own gzip member, which
+        # gzip.open reads back as a single stream.
+        now = now or datetime.now(IST)
+        with self.lock:
+            tick = {"time": now.strftime("%Y-%m-%d %H:%M:%S"), "sources": self.sources, "pages": self.pages}
+            self.sources, self.pages = {}, {}
+        if not tick["sources"] and not tick["pages"]:
+            return None
+        path = os.path.join(self.root, f"{now.strftime('%Y-%m-%d')}.jsonl.gz")
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            with _open(path, "at") as f:
+                f.write(json.dumps(tick, separators=(",", ":")) + "\n")
+        except OSError as e:
+            print(f"⚠️ Could not record NSE payloads: {e}")
+            return None
+        return path
+
+# -----------------------------------------
+# ✅ READ / WRITE RECORDINGS
+# -----------------------------------------
+def _open(path, mode):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode, compresslevel=COMPRESS_LEVEL, encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def iter_recording(path):
+    # Ticks in file order, one in memory at a time (a full-chain tick is a
+    # few MB); a torn last line (killed mid-write) is skipped.
+    with _open(path, "rt") as f:
+        try:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+        except EOFError:
+            return
+
+
+def write_recording(path, ticks):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    count = 0
+    with _open(path, "wt") as f:
+        for tick in ticks:
+            f.write(json.dumps(tick, separators=(",", ":")) + "\n")
+            count += 1
+    return count
+
+
+def tick_time(tick):
+    return datetime.strptime(tick["time"], "%Y-%m-%d %H:%M:%S")
+
+
+def tick_symbols(tick):
+    return [name for name in tick["sources"] if name != "INDIA_VIX"]
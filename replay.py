@@ -0,0 +1,175 @@
+# replay.py
+# Runs a recorder.py recording through the real monitor pipeline, offline:
+# nse_stub_server.py serves each recorded tick, and monitor_cycle.run_cycle()
+# fetches it over HTTP and takes it through prepare_combined_row, the
+# snapshot store and generate_ivp_plots exactly like a live tick, at the
+# recorded time. Everything is written under --workdir (a fresh temp dir by
+# default), never to the real data/ and static/.
+#
+#   python replay.py data/recordings/2025-07-22.jsonl.gz             # as fast as the pipeline goes
+#   python replay.py data/recordings/2025-07-22.jsonl.gz --speed 60  # one recorded minute per second
+#   python replay.py REC --workdir /tmp/replay --plot-every 5 --json # what benchmarks.py suite runs
+#
+# Reports per-stage latency (metrics.py stage_seconds, per tick), ticks/sec
+# and peak RSS of the process and of the plot worker processes. The stub runs
+# on a thread of this process, so "fetch" includes serving the JSON.
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+from itertools import islice
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+from pytz import timezone
+from recorder import iter_recording, tick_time, tick_symbols
+
+try:
+    import resource
+    HAVE_RESOURCE = True
+except ImportError:  # Windows: no peak RSS
+    HAVE_RESOURCE = False
+
+IST = timezone("Asia/Kolkata")
+
+# -----------------------------------------
+# ✅ MEASUREMENTS
+# -----------------------------------------
+def peak_rss_mb():
+    # (this process, waited-for children); ru_maxrss is KiB on Linux, bytes on macOS.
+    if not HAVE_RESOURCE:
+        return None, None
+    unit = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return tuple(round(resource.getrusage(who).ru_maxrss / unit, 1)
+                 for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN))
+
+
+def latency_ms(samples):
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+    return {"p50": round(pick(0.5) * 1000, 1), "p95": round(pick(0.95) * 1000, 1),
+            "max": round(ordered[-1] * 1000, 1), "n": len(ordered)}
+
+
+def stop_forkserver():
+    # The plot workers are children of multiprocessing's forkserver, not of
+    # this process: reaping the forkserver brings their peak RSS into
+    # RUSAGE_CHILDREN.
+    from multiprocessing import forkserver
+    stop = getattr(forkserver._forkserver, "_stop", None)
+    if stop is not None:
+        stop()
+
+
+def seed_cookie_jar(path):
+    # The stub wants no cookies; a jar valid for a year keeps NSESession from
+    # launching Chrome on the first tick.
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"cookie_string": "nsit=replay; nseappid=replay",
+                   "cookie_expiry": (datetime.now(IST) + timedelta(days=365)).isoformat(),
+                   "user_agent": "Mozilla/5.0 (replay)"}, f)
+
+# -----------------------------------------
+# ✅ REPLAY
+# -----------------------------------------
+def replay(path, workdir, speed=0, plot_every=1, limit=None, quiet=False):
+    ticks = islice(iter_recording(path), limit)
+    tick = next(ticks, None)
+    if tick is None:
+        raise SystemExit(f"❌ No ticks in {path}")
+    os.makedirs(workdir, exist_ok=True)
+    os.chdir(workdir)  # config.py paths are relative: data/, static/, .runlog/ land here
+
+    from nse_stub_server import serve_in_thread
+    stub = serve_in_thread()
+    os.environ["NSE_BASE_URL"] = stub.base_url
+    os.environ.setdefault("NSE_SYMBOLS", ",".join(tick_symbols(tick)))  # the symbols of the first tick
+    for name in ("NSE_RECORD", "TELEGRAM_TOKEN", "TELEGRAM_CHAT_ID"):
+        os.environ.pop(name, None)  # no re-recording, no Telegram messages from old data
+
+    import source_stage
+    import monitor_cycle
+    from metrics import metrics
+    seed_cookie_jar(source_stage.COOKIE_CACHE_PATH)
+
+    sink = open(os.devnull, "w") if quiet else sys.stdout
+    first = tick_time(tick)
+    count, tick_seconds, stages, results = 0, [], {}, {}
+    started = time.monotonic()
+    while tick is not None:
+        upcoming = next(ticks, None)  # one tick of lookahead: the last one always plots
+        recorded = tick_time(tick)
+        if speed > 0:
+            wait = started + (recorded - first).total_seconds() / speed - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+        stub.play(tick)
+        count += 1
+        tick_started = time.perf_counter()
+        with redirect_stdout(sink):
+            monitor_cycle.run_cycle(now=IST.localize(recorded),
+                                    plots=count % plot_every == 0 or upcoming is None)
+        tick_seconds.append(time.perf_counter() - tick_started)
+        snapshot = metrics.pop()
+        for stage, (_, seconds) in snapshot["timers"].get("stage_seconds", {}).items():
+            stages.setdefault(stage, []).append(seconds)
+        for result, n in snapshot["counters"].get("ticks", {}).items():
+            results[result] = results.get(result, 0) + n
+        tick = upcoming
+    wall = time.monotonic() - started
+
+    with redirect_stdout(sink):
+        monitor_cycle.shutdown()  # joins the plot workers, so their peak RSS is counted
+    stop_forkserver()
+    stub.shutdown()
+    if quiet:
+        sink.close()
+    rss, children_rss = peak_rss_mb()
+    return {
+        "recording": path,
+        "workdir": workdir,
+        "ticks": count,
+        "results": results,
+        "seconds": round(wall, 3),
+        "ticks_per_sec": round(count / sum(tick_seconds), 3),  # pipeline only, not reading the recording
+        "tick_ms": latency_ms(tick_seconds),
+        "stages": {stage: latency_ms(samples) for stage, samples in sorted(stages.items())},
+        "peak_rss_mb": rss,
+        "peak_rss_workers_mb": children_rss,
+    }
+
+
+def print_summary(summary):
+    results = ", ".join(f"{count} {result}" for result, count in sorted(summary["results"].items()))
+    print(f"\n📼 Replayed {summary['ticks']} ticks in {summary['seconds']:.1f}s "
+          f"({summary['ticks_per_sec']:.2f} ticks/s): {results}")
+    tick = summary["tick_ms"]
+    print(f"   {'tick':<24} p50 {tick['p50']:9.1f} ms   p95 {tick['p95']:9.1f} ms   max {tick['max']:9.1f} ms")
+    for stage, ms in summary["stages"].items():
+        print(f"   {stage:<24} p50 {ms['p50']:9.1f} ms   p95 {ms['p95']:9.1f} ms   max {ms['max']:9.1f} ms   ({ms['n']} ticks)")
+    if summary["peak_rss_mb"] is not None:
+        print(f"   peak RSS: {summary['peak_rss_mb']:.0f} MB (plot workers {summary['peak_rss_workers_mb']:.0f} MB)")
+    print(f"   output in {summary['workdir']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a recorded NSE session through the monitor pipeline")
+    parser.add_argument("recording", help="recorder.py file, e.g. data/recordings/2025-07-22.jsonl.gz")
+    parser.add_argument("--workdir", help="where the store, PNGs and run state go (default: a new temp dir)")
+    parser.add_argument("--speed", type=float, default=0, help="recorded seconds per wall second; 0 = no waiting")
+    parser.add_argument("--plot-every", type=int, default=1, help="render the dashboards every N ticks (and the last)")
+    parser.add_argument("--limit", type=int, help="replay only the first N ticks")
+    parser.add_argument("--quiet", action="store_true", help="hide the pipeline's own log lines")
+    parser.add_argument("--json", action="store_true", help="print the summary as one JSON line")
+    args = parser.parse_args()
+
+    recording = os.path.abspath(args.recording)
+    workdir = os.path.abspath(args.workdir) if args.workdir else tempfile.mkdtemp(prefix="nse-replay-")
+    summary = replay(recording, workdir, args.speed, max(args.plot_every, 1), args.limit, args.quiet)
+    if args.json:
+        print(json.dumps(summary, separators=(",", ":")))
+    else:
+        print_summary(summary)
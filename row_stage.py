@@ -0,0 +1,202 @@
+# row_stage.py
+# Row stage of the monitor: parses the fetched chains, solves the ATM
+# straddle IV/Greeks, updates each table's VWAP/IVP engine, raises the IVP and
+# premium alerts and appends one row per snapshot table (symbols.py groups).
+# This is where numpy, pandas and pyarrow come in; monitor_cycle.py imports it
+# only once a tick actually has new chains to write.
+
+import os
+import math
+from datetime import datetime
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+from chain_parser import parse_option_chain
+from alert_rules import ivp_breach, vwap_breach
+from chain_capture import ChainCapture
+from greeks import atm_straddles, constant_maturity_iv
+from symbols import build_groups
+from event_log import symbol_delta
+from source_stage import SYMBOL_SPECS
+from metrics import metrics
+from monitor_state import alerts, events, timed_stage
+from config import CHAIN_DIR
+
+GROUP_WORKERS = 4  # snapshot tables (symbols.py groups) built and written concurrently
+CONSTANT_MATURITY_DAYS = 30  # {symbol}_cm_iv_30d: ATM IV interpolated to a fixed tenor
+CAPTURE_CHAINS = os.getenv("NSE_CAPTURE_CHAINS") == "1"  # full option chains to CHAIN_DIR (tens of MB/day/index)
+
+groups = build_groups(SYMBOL_SPECS)  # one store + engine per table, loaded once, kept warm across daemon ticks
+group_pool = ThreadPoolExecutor(max_workers=GROUP_WORKERS, thread_name_prefix="group")
+capture = ChainCapture(CHAIN_DIR) if CAPTURE_CHAINS else None
+
+# -----------------------------------------
+# ✅ LOAD EXISTING HISTORY (once per process, see history_store.py)
+# -----------------------------------------
+def load_existing_csv(group):
+    return group.history.frame()
+
+# -----------------------------------------
+# ✅ APPEND ONE ROW (snapshot store + CSV export)
+# -----------------------------------------
+def append_row_to_csv(group, row_dict):
+    total = group.history.append(row_dict)
+    print(f"✅ Data appended to the {group.store.name} store and {group.csv_path} ({total} rows in memory)")
+
+# -----------------------------------------
+# ✅ PREPARE COMBINED ROW
+# -----------------------------------------
+def rounded(value, digits):
+    return round(float(value), digits) if value is not None and math.isfinite(value) else None
+
+
+def last_sample(group, spec):
+    # The symbol's columns from the last row it was written in, or None.
+    sample = group.last_samples.get(spec["prefix"])
+    if sample is None:
+        df = group.history.frame()
+        column = f"{spec['labels'][0]}_expiry"
+        index = df[column].last_valid_index() if column in df.columns else None
+        if index is None:
+            return None
+        sample = {c: (None if pd.isna(v) else (v.item() if hasattr(v, "item") else v))
+                  for c, v in df.loc[index].items() if c.startswith(f"{spec['prefix']}_")}
+        group.last_samples[spec["prefix"]] = sample
+    return sample
+
+
+def prepare_combined_row(timestamp, india_vix, chains, group, fresh=None):
+    # One row of the group's table: every symbol in the group, every expiry slot.
+    # A symbol whose chain is unchanged since its last row (not in `fresh`)
+    # carries that row's values, VWAP/IVP included, marked {label}_repeat = 1:
+    # the engine sees each NSE sample once, and recompute.py / warm() skip
+    # the repeats the same way.
+    engine = group.engine
+    if not engine.warmed:
+        engine.warm(group.history.frame())
+
+    combined_row = {"timestamp": timestamp}
+    if india_vix is not None:
+        combined_row["india_vix"] = round(india_vix, 2)
+
+    for spec in group.specs:
+        symbol, data = spec["name"], chains.get(spec["name"])
+        if not data:
+            print(f"⚠️ No {symbol} option chain this tick, leaving its columns empty")
+            continue
+        if fresh is not None and symbol not in fresh:
+            sample = last_sample(group, spec)
+            if sample is not None:
+                print(f"⏭️ {symbol} chain unchanged, carrying its last VWAP/IVP (no new sample)")
+                combined_row.update(sample)
+                combined_row.update({f"{label}_repeat": 1 for label in spec["labels"]
+                                     if sample.get(f"{label}_expiry") is not None})
+                continue
+        chain = parse_option_chain(data)
+        spot_price = chain.spot
+        chosen_expiries = chain.nearest_expiries(spec["expiries"])
+        # Black-Scholes ATM straddle IV/Greeks for every listed expiry in one batch
+        straddles = atm_straddles(chain, datetime.strptime(timestamp, "%Y-%m-%d %H:%M:%S"), chain.expiries)
+        combined_row[f"{spec['prefix']}_cm_iv_{CONSTANT_MATURITY_DAYS}d"] = rounded(
+            constant_maturity_iv(straddles, CONSTANT_MATURITY_DAYS), 2)
+
+        for i, expiry in enumerate(chosen_expiries):
+            atm = chain.atm(expiry)
+            atm_strike = atm['strike']
+
+            call_ltp = atm['ce_ltp']
+            put_ltp = atm['pe_ltp']
+            call_vol = atm['ce_vol']
+            put_vol = atm['pe_vol']
+            call_iv = atm['ce_iv']
+            put_iv = atm['pe_iv']
+
+            straddle_premium = round(call_ltp + put_ltp, 2)
+            total_vol = call_vol + put_vol
+            straddle_iv = round(call_iv + put_iv, 1)
+
+            label = spec["labels"][i]
+
+            combined_row[f"{label}_expiry"] = expiry
+            combined_row[f"{label}_strike"] = atm_strike
+            if i == 0:
+                combined_row[f"{label}_spot"] = round(spot_price, 1)
+            combined_row[f"{label}_call_ltp"] = call_ltp
+            combined_row[f"{label}_put_ltp"] = put_ltp
+            combined_row[f"{label}_straddle"] = straddle_premium
+            combined_row[f"{label}_call_vol"] = call_vol
+            combined_row[f"{label}_put_vol"] = put_vol
+            combined_row[f"{label}_total_vol"] = total_vol
+            combined_row[f"{label}_call_iv"] = call_iv
+            combined_row[f"{label}_put_iv"] = put_iv
+            combined_row[f"{label}_straddle_iv"] = straddle_iv
+            atm_bs = straddles.get(expiry, {})
+            combined_row[f"{label}_atm_iv"] = rounded(atm_bs.get("iv"), 2)
+            combined_row[f"{label}_atm_delta"] = rounded(atm_bs.get("delta"), 4)
+            combined_row[f"{label}_atm_vega"] = rounded(atm_bs.get("vega"), 2)
+            combined_row[f"{label}_atm_theta"] = rounded(atm_bs.get("theta"), 2)
+
+            stats = engine.observe(label, timestamp, expiry, straddle_premium, total_vol, straddle_iv)
+            vwap, ivp = stats["vwap"], stats["ivp"]
+
+            print(f"[{label}] Current IV: {straddle_iv}, IVP: {ivp}")
+
+            for key, value in stats.items():
+                combined_row[f"{label}_{key}"] = value
+
+            if ivp is not None and ivp_breach(ivp, spec["ivp_low"], spec["ivp_high"]):
+                alerts.alert(f"ivp:{label}:{'high' if ivp > spec['ivp_high'] else 'low'}",
+                             f"⚠️ {symbol} {expiry}: IVP Alert! IVP={ivp}% at {timestamp}")
+
+            if vwap is not None and vwap_breach(straddle_premium, vwap, spec["vwap_factor_low"], spec["vwap_factor_high"]):
+                alerts.alert(f"vwap:{label}:{'above' if straddle_premium > vwap else 'below'}",
+                             f"⚠️ {symbol} {expiry}: Straddle Premium Alert! Premium={straddle_premium}, VWAP={vwap} at {timestamp}")
+
+        group.last_samples[spec["prefix"]] = {c: v for c, v in combined_row.items() if c.startswith(f"{spec['prefix']}_")}
+
+    return combined_row
+
+# -----------------------------------------
+# ✅ BUILD + WRITE GROUP ROWS (bounded thread pool)
+# -----------------------------------------
+def write_group_row(group, timestamp, india_vix, chains, fresh=None):
+    with timed_stage("prepare_row"):
+        combined_row = prepare_combined_row(timestamp, india_vix, chains, group, fresh)
+    with timed_stage("csv_append"):
+        append_row_to_csv(group, combined_row)
+    metrics.inc("rows_written", group.name)
+    for spec in group.specs:
+        delta = symbol_delta(combined_row, spec)
+        if delta is not None:
+            events.publish("row", delta)
+    return group.symbols
+
+def write_group_rows(fresh, timestamp, india_vix, chains):
+    # Writes every table holding a changed symbol and returns the symbols
+    # whose rows were written; a failing table does not hold back the others.
+    due = [group for group in groups.values() if fresh.intersection(group.symbols)]
+    futures = {group_pool.submit(write_group_row, group, timestamp, india_vix, chains, fresh): group for group in due}
+    written = []
+    for future, group in futures.items():
+        try:
+            written += future.result()
+        except Exception as e:
+            error_msg = f"❗️ Error writing the {group.name} row: {e}"
+            print(error_msg)
+            alerts.alert(f"error:{group.name}:{type(e).__name__}", error_msg)
+    return written
+
+# -----------------------------------------
+# ✅ FULL CHAIN CAPTURE (NSE_CAPTURE_CHAINS=1)
+# -----------------------------------------
+def capture_chains(fresh, timestamp, chains):
+    if capture is None:
+        return
+    with timed_stage("chain_capture"):
+        for symbol, data in chains.items():
+            if data and symbol in fresh:
+                size = capture.write(symbol, timestamp, data)
+                print(f"📦 Captured full {symbol} chain ({size / 1024:.0f} KB)")
+
+
+def close():
+    group_pool.shutdown()
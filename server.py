@@ -1,23 +1,506 @@
-from flask import Flask, render_template, send_from_directory
+# server.py
+# Dashboard + JSON API over the snapshot stores.
+#
+#   python server.py               # gunicorn (gthread workers) when installed
+#   python server.py --dev         # Flask dev server
+#
+#   GET /api/latest                latest values for every symbol
+#   GET /api/series?symbol=NIFTY&from=2025-07-22&to=2025-07-22 15:30&downsample=500
+#   GET /api/stream                Server-Sent Events: new rows and alerts
+#   GET /metrics                   Prometheus text: runner timings/counters (last run log line) + this worker
+#
+# Nothing is built per request. SnapshotCache re-reads a table only when its
+# store's mtime changes (checked at most once a second), and every response
+# body is rendered once per store version and kept with its gzip variant and
+# a strong ETag, so a dashboard poll is a dict lookup and usually a 304.
+#
+# /api/stream: one EventHub per worker tails the runner's event files
+# (event_log.py) and fans every new event out to per-client bounded queues.
+# A client whose queue fills up (a slow phone) is disconnected instead of
+# holding up the others; its EventSource reconnects with Last-Event-ID and
+# is replayed what it missed from the last REPLAY_EVENTS events.
+
 import os
+import gzip
+import json
+import time
+import hashlib
+import glob
+import argparse
+import mimetypes
+import queue
+import threading
+from collections import OrderedDict, deque
+import numpy as np
+import pandas as pd
+from flask import Flask, Response, render_template, request, abort
+from werkzeug.security import safe_join
+
+from config import STATIC_DIR, REPORTS_DIR, STORAGE_BACKEND, EVENTS_DIR, RUNS_DIR
+from storage import open_store, downsample
+from metrics import RunLog, prometheus_text
+from symbols import active_symbols, group_paths
+from market_hours import IST
+
+try:
+    import gunicorn.app.base
+    HAVE_GUNICORN = True
+except ImportError:
+    HAVE_GUNICORN = False
+
+MTIME_CHECK_INTERVAL = 1.0  # seconds between store mtime checks
+LATEST_MAX_AGE = 5  # Cache-Control max-age, seconds
+SERIES_MAX_AGE = 30
+FILE_MAX_AGE = 30
+DEFAULT_POINTS = 1000  # /api/series downsamples to at most this many rows
+MAX_POINTS = 10_000
+RESPONSE_CACHE_SIZE = 512  # rendered bodies kept (LRU)
+GZIP_MIN_BYTES = 512
+GZIP_TYPES = ("application/json", "text/")
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+REPLAY_EVENTS = 500  # kept per worker for reconnecting clients
+REPLAY_TAIL_BYTES = 2 * 1024 * 1024  # read back from today's event file on start-up
+CLIENT_QUEUE_SIZE = 200  # events buffered per SSE client before it is dropped
+EVENT_POLL_INTERVAL = 0.5  # seconds between event-file checks
+HEARTBEAT_INTERVAL = 15  # SSE comment line so proxies keep the stream open
+SSE_RETRY_MS = 3000
+
+WEB_WORKERS = int(os.getenv("WEB_WORKERS", "2"))
+WEB_THREADS = int(os.getenv("WEB_THREADS", "128"))  # each open /api/stream holds one thread
+
+
+# -----------------------------------------
+# ✅ SNAPSHOT CACHE (reloads on store mtime change)
+# -----------------------------------------
+class SnapshotCache:
+    def __init__(self, specs, backend=STORAGE_BACKEND):
+        self.specs = {spec["name"]: spec for spec in specs}
+        self.stores = {}
+        for spec in specs:
+            if spec["group"] not in self.stores:
+                self.stores[spec["group"]] = open_store(backend, group_paths(spec["group"])[0])
+        self.frames = {}  # group -> (mtime, frame sorted by timestamp)
+        self.checked = {}  # group -> monotonic time of the last mtime check
+        self.lock = threading.Lock()
+
+    def frame(self, group):
+        now = time.monotonic()
+        with self.lock:
+            cached = self.frames.get(group)
+            if cached is not None and now - self.checked.get(group, 0) < MTIME_CHECK_INTERVAL:
+                return cached
+            self.checked[group] = now
+            store = self.stores[group]
+            mtime = store.mtime()
+            if cached is None or cached[0] != mtime:
+                df = store.read()
+                if not df.empty:
+                    df = df.dropna(subset=["timestamp"]).sort_values("timestamp", kind="stable").reset_index(drop=True)
+                cached = self.frames[group] = (mtime, df)
+            return cached
+
+    def version(self, groups=None):
+        return tuple(self.frame(group)[0] for group in (groups or self.stores))
+
+
+# -----------------------------------------
+# ✅ RENDERED RESPONSES (body + gzip + strong ETag, LRU)
+# -----------------------------------------
+class ResponseCache:
+    def __init__(self, size=RESPONSE_CACHE_SIZE):
+        self.size = size
+        self.entries = OrderedDict()
+        self.building = {}  # key -> lock, so a cold key is built once while other requests wait
+        self.lock = threading.Lock()
+        self.stats = {"hits": 0, "builds": 0}
+
+    def _lookup(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.stats["hits"] += 1
+            return entry
+
+    def get(self, key, build, mimetype):
+        entry = self._lookup(key)
+        if entry is not None:
+            return entry
+        with self.lock:
+            key_lock = self.building.setdefault(key, threading.Lock())
+        with key_lock:
+            entry = self._lookup(key)
+            if entry is not None:
+                return entry
+            try:
+                body = build()
+                if isinstance(body, str):
+                    body = body.encode()
+                compressible = mimetype.startswith(GZIP_TYPES) and len(body) >= GZIP_MIN_BYTES
+                entry = (body, gzip.compress(body, compresslevel=6, mtime=0) if compressible else None,
+                         hashlib.sha1(body).hexdigest())
+                with self.lock:
+                    self.entries[key] = entry
+                    while len(self.entries) > self.size:
+                        self.entries.popitem(last=False)
+                    self.stats["builds"] += 1
+            finally:
+                # Also when build() raised, or the key's lock would outlive the request.
+                with self.lock:
+                    self.building.pop(key, None)
+        return entry
+
+
+def cached_response(key, build, max_age, mimetype="application/json"):
+    body, gzipped, etag = responses.get(key, build, mimetype)
+    use_gzip = gzipped is not None and "gzip" in request.accept_encodings
+    # gzip and identity are different representations, so different strong ETags.
+    tag = f"{etag}-gz" if use_gzip else etag
+    headers = {"ETag": f'"{tag}"', "Cache-Control": f"public, max-age={max_age}"}
+    if gzipped is not None:
+        headers["Vary"] = "Accept-Encoding"
+    if request.if_none_match.contains(tag):
+        return Response(status=304, headers=headers)
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+        return Response(gzipped, mimetype=mimetype, headers=headers)
+    return Response(body, mimetype=mimetype, headers=headers)
+
+
+def json_error(status, message):
+    return Response(json.dumps({"error": message}), status=status, mimetype="application/json")
+
+
+# -----------------------------------------
+# ✅ PAYLOADS
+# -----------------------------------------
+def json_value(value):
+    if value is None or value is pd.NA or value is pd.NaT:
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.strftime(TIMESTAMP_FORMAT)
+    if isinstance(value, (np.integer,)):
+        return int(value)
+    if isinstance(value, (float, np.floating)):
+        return None if np.isnan(value) else float(value)
+    return value
+
+
+def symbol_columns(df, spec):
+    prefix = f"{spec['prefix']}_"
+    return [c for c in df.columns if c.startswith(prefix)]
+
+
+def latest_payload():
+    symbols = {}
+    updated, india_vix = None, None
+    for name, spec in cache.specs.items():
+        _, df = cache.frame(spec["group"])
+        columns = symbol_columns(df, spec)
+        if df.empty or not columns:
+            continue
+        observed = np.flatnonzero(df[columns].notna().any(axis=1).to_numpy())
+        if not len(observed):
+            continue
+        row = df.iloc[observed[-1]]
+        timestamp = json_value(row["timestamp"])
+        values = {c[len(spec["prefix"]) + 1:]: json_value(row[c]) for c in columns}
+        entry = {"timestamp": timestamp, "spot": values.get("curr_spot"), "expiries": {}}
+        for label in spec["labels"]:
+            slot = label[len(spec["prefix"]) + 1:]
+            fields = {k[len(slot) + 1:]: v for k, v in values.items() if k.startswith(f"{slot}_")}
+            if fields:
+                entry["expiries"][slot] = fields
+        entry.update({k: v for k, v in values.items() if not any(k.startswith(f"{s}_") for s in entry["expiries"])})
+        symbols[name] = entry
+        if updated is None or timestamp > updated:
+            updated = timestamp
+            if "india_vix" in df.columns:
+                india_vix = json_value(df["india_vix"].iloc[:observed[-1] + 1].ffill().iloc[-1])
+    return json.dumps({"updated": updated, "india_vix": india_vix, "symbols": symbols}, separators=(",", ":"))
+
+
+def series_payload(spec, start, end, points):
+    _, df = cache.frame(spec["group"])
+    columns = (["india_vix"] if "india_vix" in df.columns else []) + symbol_columns(df, spec)
+    if df.empty:
+        rows = df
+    else:
+        lo = np.searchsorted(df["timestamp"].to_numpy(), start.to_datetime64(), "left") if start is not None else 0
+        hi = np.searchsorted(df["timestamp"].to_numpy(), end.to_datetime64(), "right") if end is not None else len(df)
+        rows = df.iloc[lo:hi][["timestamp"] + columns]
+    total = len(rows)
+    rows = downsample(rows, points)
+    data = {"timestamp": [ts.strftime(TIMESTAMP_FORMAT) for ts in pd.to_datetime(rows["timestamp"])] if len(rows) else []}
+    for column in columns:
+        name = column if column == "india_vix" else column[len(spec["prefix"]) + 1:]
+        data[name] = [json_value(v) for v in rows[column].tolist()] if len(rows) else []
+    return json.dumps({"symbol": spec["name"], "rows": total, "points": len(rows),
+                       "downsampled": len(rows) < total, "columns": data}, separators=(",", ":"))
+
+
+def parse_time(value, end=False):
+    # Naive IST like the stored timestamps; an explicit offset (...+05:30, Z) is converted.
+    if not value:
+        return None
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert(IST).tz_localize(None)
+    if end and len(value) <= 10:  # a bare date includes the whole day
+        ts += pd.Timedelta(days=1) - pd.Timedelta(microseconds=1)
+    return ts
+
+
+# -----------------------------------------
+# ✅ EVENT HUB (SSE fan-out)
+# -----------------------------------------
+class Subscriber:
+    def __init__(self, size):
+        self.queue = queue.Queue(maxsize=size)
+        self.dropped = False
+
+
+class EventHub:
+    def __init__(self, root, replay=REPLAY_EVENTS, queue_size=CLIENT_QUEUE_SIZE, poll_interval=EVENT_POLL_INTERVAL):
+        self.root = root
+        self.replay = deque(maxlen=replay)  # (id, encoded SSE message)
+        self.queue_size = queue_size
+        self.poll_interval = poll_interval
+        self.subscribers = set()
+        self.path, self.offset = None, 0
+        self.lock = threading.Lock()
+        self.thread = None
+        self.stats = {"events": 0, "dropped_clients": 0}
+
+    def start(self):
+        # Lazily, so every gunicorn worker starts its own tail thread after the fork.
+        with self.lock:
+            if self.thread is None:
+                self._poll(initial=True)
+                self.thread = threading.Thread(target=self._run, name="event-tail", daemon=True)
+                self.thread.start()
+
+    def subscribe(self, last_id=None):
+        # Replay and registration happen under one lock, so no event falls
+        # between the two or arrives twice.
+        subscriber = Subscriber(self.queue_size)
+        with self.lock:
+            backlog = [message for event_id, message in self.replay if last_id is None or event_id > last_id]
+            self.subscribers.add(subscriber)
+        return subscriber, backlog
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            self.subscribers.discard(subscriber)
+
+    def _run(self):
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                with self.lock:
+                    self._poll()
+            except Exception as e:
+                print(f"⚠️ Event tail error: {e}")
+
+    def _poll(self, initial=False):
+        paths = sorted(glob.glob(os.path.join(self.root, "*.jsonl")))
+        if not paths:
+            return
+        if self.path is None:
+            # Start near the end of today's file: enough to fill the replay buffer.
+            self.path = paths[-1]
+            self.offset = max(0, os.path.getsize(self.path) - REPLAY_TAIL_BYTES)
+        for path in [p for p in paths if p >= self.path]:
+            if path != self.path:
+                self.path, self.offset = path, 0
+            with open(path, "rb") as f:
+                f.seek(self.offset)
+                chunk = f.read()
+            if initial and self.offset:
+                skip = chunk.find(b"\n") + 1  # landed mid-line
+                chunk, self.offset = chunk[skip:], self.offset + skip
+            end = chunk.rfind(b"\n") + 1  # complete lines only
+            if not end:
+                continue
+            self.offset += end
+            for line in chunk[:end].splitlines():
+                self._publish(line, fan_out=not initial)
+
+    def _publish(self, line, fan_out=True):
+        try:
+            event = json.loads(line)
+        except ValueError:
+            return
+        data = json.dumps(event.get("data"), separators=(",", ":"))
+        message = f"id: {event['id']}\nevent: {event['type']}\ndata: {data}\n\n".encode()
+        self.replay.append((event["id"], message))
+        self.stats["events"] += 1
+        if not fan_out:
+            return
+        for subscriber in list(self.subscribers):
+            try:
+                subscriber.queue.put_nowait(message)
+            except queue.Full:
+                subscriber.dropped = True
+                self.subscribers.discard(subscriber)
+                self.stats["dropped_clients"] += 1
+
+    def stream(self, last_id=None):
+        self.start()
+        subscriber, backlog = self.subscribe(last_id)
+        try:
+            yield f"retry: {SSE_RETRY_MS}\n\n".encode()
+            for message in backlog:
+                yield message
+            while not subscriber.dropped:
+                try:
+                    yield subscriber.queue.get(timeout=HEARTBEAT_INTERVAL)
+                except queue.Empty:
+                    yield b": keep-alive\n\n"
+        finally:
+            self.unsubscribe(subscriber)
+
+
+def served_symbols():
+    # The runner's active set (NSE_SYMBOLS) plus any registered symbol that
+    # already has a table on disk.
+    active = {spec["name"] for spec in active_symbols()}
+    return [spec for spec in active_symbols("all")
+            if spec["name"] in active or os.path.exists(group_paths(spec["group"])[0])]
+
+
+# -----------------------------------------
+# ✅ FLASK APP
+# -----------------------------------------
+app = Flask(__name__, static_folder=None)  # /static is served from the response cache below
+cache = SnapshotCache(served_symbols())
+responses = ResponseCache()
+hub = EventHub(EVENTS_DIR)
+runs = RunLog(RUNS_DIR)
 
-app = Flask(__name__)
 
 @app.route("/")
 def index():
     return render_template("index.html")
 
+
+@app.route("/api/latest")
+def api_latest():
+    return cached_response(("latest", cache.version()), latest_payload, LATEST_MAX_AGE)
+
+
+@app.route("/api/series")
+def api_series():
+    spec = cache.specs.get(request.args.get("symbol", "NIFTY").upper())
+    if spec is None:
+        return json_error(404, f"unknown symbol, expected one of {', '.join(cache.specs)}")
+    try:
+        start = parse_time(request.args.get("from"))
+        end = parse_time(request.args.get("to"), end=True)
+        points = int(request.args.get("downsample", DEFAULT_POINTS))
+        if points < 1:
+            raise ValueError(f"downsample must be between 1 and {MAX_POINTS}")
+        points = min(points, MAX_POINTS)
+    except ValueError as e:
+        return json_error(400, str(e))
+    key = ("series", spec["name"], start, end, points, cache.version([spec["group"]]))
+    return cached_response(key, lambda: series_payload(spec, start, end, points), SERIES_MAX_AGE)
+
+
+@app.route("/api/stream")
+def api_stream():
+    last_id = request.headers.get("Last-Event-ID") or request.args.get("lastEventId")
+    try:
+        last_id = int(last_id) if last_id else None
+    except ValueError:
+        last_id = None
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return Response(hub.stream(last_id), mimetype="text/event-stream", headers=headers)
+
+
+@app.route("/metrics")
+def prometheus_metrics():
+    # Runner side: the totals carried by the last run log line (metrics.py),
+    # so a scrape reads one line however many runs there were. Server side:
+    # this worker's SSE hub and response cache.
+    with hub.lock:
+        clients = len(hub.subscribers)
+    worker = [
+        ("nse_dashboard_sse_clients", "gauge", "Open /api/stream connections on this worker", clients),
+        ("nse_dashboard_sse_events_total", "counter", "Events read from the runner's event feed", hub.stats["events"]),
+        ("nse_dashboard_sse_dropped_clients_total", "counter", "SSE clients dropped for falling behind",
+         hub.stats["dropped_clients"]),
+        ("nse_dashboard_response_cache_hits_total", "counter", "Responses served from the rendered cache",
+         responses.stats["hits"]),
+        ("nse_dashboard_response_cache_builds_total", "counter", "Responses rendered", responses.stats["builds"]),
+    ]
+    return Response(prometheus_text(runs.last(), worker), mimetype="text/plain; version=0.0.4",
+                    headers={"Cache-Control": "no-cache"})
+
+
+def file_response(directory, filename):
+    path = safe_join(directory, filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+    stat = os.stat(path)
+    mimetype = mimetypes.guess_type(path)[0] or "application/octet-stream"
+
+    def build():
+        with open(path, "rb") as f:
+            return f.read()
+    return cached_response(("file", path, stat.st_mtime_ns, stat.st_size), build, FILE_MAX_AGE, mimetype)
+
+
 @app.route("/static/<path:filename>")
 def static_files(filename):
-    return send_from_directory("static", filename)
+    return file_response(STATIC_DIR, filename)
+
 
 @app.route("/plots/<path:filename>")
 def plot_files(filename):
-    return send_from_directory("static", filename)
+    return file_response(STATIC_DIR, filename)
+
 
 @app.route("/csv/<path:filename>")
 def csv_files(filename):
-    return send_from_directory("static", filename)
+    return file_response(STATIC_DIR, filename)
+
+
+@app.route("/reports/<path:filename>")
+def report_files(filename):
+    return file_response(REPORTS_DIR, filename)
+
+
+# -----------------------------------------
+# ✅ PRODUCTION SERVER (gunicorn, threaded workers)
+# -----------------------------------------
+def serve(host, port, workers=WEB_WORKERS, threads=WEB_THREADS):
+    class DashboardServer(gunicorn.app.base.BaseApplication):
+        def load_config(self):
+            options = {"bind": f"{host}:{port}", "workers": workers, "threads": threads,
+                       "worker_class": "gthread", "keepalive": 5, "timeout": 60}
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return app
+
+    DashboardServer().run()
+
 
 if __name__ == "__main__":
-    app.run(debug=True, host="0.0.0.0", port=8000)
+    parser = argparse.ArgumentParser(description="NSE IVP dashboard and JSON API")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=WEB_WORKERS)
+    parser.add_argument("--threads", type=int, default=WEB_THREADS)
+    parser.add_argument("--dev", action="store_true", help="Flask dev server with the debugger")
+    args = parser.parse_args()
+
+    if args.dev or not HAVE_GUNICORN:
+        if not args.dev:
+            print("⚠️ gunicorn not installed, falling back to the Flask dev server")
+        app.run(debug=args.dev, host=args.host, port=args.port, threaded=True)
+    else:
+        serve(args.host, args.port, args.workers, args.threads)
@@ -0,0 +1,113 @@
+# source_stage.py
+# Fetch stage of the monitor: NSE cookies, India VIX and every active
+# symbol's option chain, fetched concurrently under one deadline. HTTP only
+# (requests); Chrome and its imports are loaded by nse_session.py when the
+# cookie jar has expired.
+
+import os
+from nse_session import NSESession
+from fetch_stage import FetchStage
+from nse_client import NSEClient, CircuitBreaker
+from symbols import active_symbols
+from recorder import Recorder
+from metrics import metrics
+from monitor_state import timed_stage
+from config import RECORDINGS_DIR, COOKIE_CACHE_PATH
+
+SYMBOL_SPECS = active_symbols()  # registry in symbols.py, pick with NSE_SYMBOLS=NIFTY,RELIANCE or "all"
+
+USER_AGENTS = [
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/127.0.0.0 Safari/537.36"
+]
+
+NSE_BASE_URL = os.getenv("NSE_BASE_URL", "https://www.nseindia.com")  # point at nse_stub_server.py for local runs
+LIVE_INDICES_URL = f"{NSE_BASE_URL}/market-data/live-market-indices"
+
+FETCH_WORKERS = 8  # concurrent NSE requests, however many symbols are active
+FETCH_DEADLINE = 40  # seconds; whatever arrived by then goes into the row
+FETCH_TIMEOUTS = {"INDIA_VIX": 30}  # per-source caps, default is FETCH_DEADLINE
+BROWSER_MIN_SECONDS = 10  # VIX browser fallback only if at least this much of its timeout is left
+BREAKER_FAILURES = 3  # consecutive NSE failures before the circuit opens
+BREAKER_RESET = 60  # seconds the circuit stays open before a trial request
+
+RECORD_PAYLOADS = os.getenv("NSE_RECORD") == "1"  # raw payloads to RECORDINGS_DIR for replay.py / benchmarks
+
+recorder = Recorder(RECORDINGS_DIR) if RECORD_PAYLOADS else None
+nse = NSESession(USER_AGENTS, COOKIE_CACHE_PATH, LIVE_INDICES_URL, base_url=NSE_BASE_URL,
+                 on_page=recorder.add_page if recorder else None, relaunch_after=FETCH_DEADLINE)
+nse_client = NSEClient(nse, base_url=NSE_BASE_URL, pool_size=FETCH_WORKERS,
+                       breaker=CircuitBreaker(BREAKER_FAILURES, BREAKER_RESET),
+                       on_payload=recorder.add if recorder else None)
+fetch_stage = FetchStage(max_workers=FETCH_WORKERS)
+
+# -----------------------------------------
+# ✅ GET NSE COOKIES (shared browser session + on-disk jar)
+# -----------------------------------------
+def get_nse_cookies():
+    return nse.get_cookies()
+
+# -----------------------------------------
+# ✅ SCRAPE INDIA VIX (cached cookies → API, else one browser launch)
+# -----------------------------------------
+def scrape_india_vix(ctx=None):
+    # The browser fallback runs inside ctx's time: Chrome gets what is left
+    # of the source timeout and is quit by then, never outliving the stage.
+    print("🔍 Fetching India VIX...")
+    india_vix = nse.pop_browser_vix()
+    if india_vix is None:
+        india_vix = nse_client.india_vix(ctx)
+    time_left = None if ctx is None else ctx.remaining()
+    if (india_vix is None and nse_client.breaker.state != "open" and not nse.launched_recently()
+            and (time_left is None or time_left >= BROWSER_MIN_SECONDS) and not (ctx and ctx.expired())):
+        nse.launch_browser(time_left)
+        india_vix = nse.pop_browser_vix()
+    if india_vix is not None:
+        print(f"✅ India VIX scraped: {india_vix}")
+    return india_vix
+
+# -----------------------------------------
+# ✅ FETCH OPTION CHAIN (pooled client, see nse_client.py)
+# -----------------------------------------
+def fetch_option_chain(spec, ctx=None):
+    data = nse_client.option_chain(spec["name"], spec["endpoint"], ctx)
+    if data:
+        print(f"✅ {spec['name']} option chain fetched")
+    return data
+
+# -----------------------------------------
+# ✅ CONCURRENT FETCH STAGE (VIX + all option chains)
+# -----------------------------------------
+def fetch_all_sources():
+    # Cookies first: a cold start launches the browser once here, which also
+    # captures India VIX, so the parallel part below is pure HTTP.
+    with timed_stage("cookies"):
+        get_nse_cookies()
+
+    sources = {"INDIA_VIX": scrape_india_vix}
+    for spec in SYMBOL_SPECS:
+        sources[spec["name"]] = lambda ctx, spec=spec: fetch_option_chain(spec, ctx)
+
+    with timed_stage("fetch"):
+        results, elapsed = fetch_stage.run(sources, FETCH_DEADLINE, FETCH_TIMEOUTS)
+    for name, seconds in elapsed.items():
+        metrics.observe("source_seconds", seconds, name)
+    for name in sources:
+        if results.get(name) is None:
+            metrics.inc("source_failures", name)
+    if recorder is not None:
+        recorder.flush()
+    return results
+
+
+def summarize_sources(fetched):
+    # --fetch-only: what NSE returned, without parsing into numpy.
+    print(f"📡 India VIX: {fetched.get('INDIA_VIX')}")
+    for spec in SYMBOL_SPECS:
+        data = fetched.get(spec["name"])
+        if not data:
+            print(f"❗️ {spec['name']}: no option chain")
+            continue
+        records = data.get("records", {})
+        print(f"📡 {spec['name']}: spot {records.get('underlyingValue')}, "
+              f"{len(records.get('expiryDates', []))} expiries, {len(records.get('data', []))} contracts")
@@ -0,0 +1,164 @@
+// live.js
+// Live section of the dashboard: loads today's series from /api/series,
+// then follows /api/stream (Server-Sent Events) and appends each new row to
+// the charts in place. Alerts from the stream go to the "Recent alerts" list.
+// Without the API (GitHub Pages) the section stays hidden and the PNGs
+// below are the dashboard.
+(function () {
+  const API = new URL("../api/", document.currentScript.src);
+  const MAX_POINTS = 1500;
+  const MAX_ALERTS = 20;
+  const section = document.getElementById("live");
+  const cards = document.getElementById("live-cards");
+  const alertList = document.getElementById("live-alerts");
+  const status = document.getElementById("live-status");
+  const charts = {};
+  let pending = false;
+
+  // "2025-07-22 10:15:00" (IST) -> ms, read back with UTC getters so the
+  // axis shows IST whatever the browser's timezone.
+  const toMs = ts => Date.parse(ts.replace(" ", "T") + "Z");
+  const fmt = (v, digits = 2) => (v === null || v === undefined ? "–" : Number(v).toFixed(digits));
+  const hhmm = ms => new Date(ms).toISOString().slice(11, 16);
+
+  function card(symbol) {
+    const el = document.createElement("div");
+    el.className = "live-card";
+    el.innerHTML = `<h3>${symbol} <small class="live-values"></small></h3><canvas height="220"></canvas>`;
+    cards.appendChild(el);
+    return {
+      el, values: el.querySelector(".live-values"), canvas: el.querySelector("canvas"),
+      t: [], straddle: [], vwap: [], ivp: [], last: {}, lastTs: null,
+    };
+  }
+
+  function push(chart, timestamp, columns) {
+    if (chart.lastTs !== null && timestamp <= chart.lastTs) return;  // replayed row
+    chart.lastTs = timestamp;
+    chart.t.push(toMs(timestamp));
+    chart.straddle.push(columns.curr_straddle ?? null);
+    chart.vwap.push(columns.curr_vwap ?? null);
+    chart.ivp.push(columns.curr_ivp ?? null);
+    if (chart.t.length > MAX_POINTS) {
+      for (const key of ["t", "straddle", "vwap", "ivp"]) chart[key].shift();
+    }
+    Object.assign(chart.last, columns);
+  }
+
+  function label(chart) {
+    const v = chart.last;
+    chart.values.textContent = `spot ${fmt(v.curr_spot, 1)} · straddle ${fmt(v.curr_straddle)} · ` +
+      `VWAP ${fmt(v.curr_vwap)} · IVP ${fmt(v.curr_ivp, 1)}% · ATM IV ${fmt(v.curr_atm_iv)}% · ${chart.lastTs || ""}`;
+  }
+
+  function range(values) {
+    let lo = Infinity, hi = -Infinity;
+    for (const v of values) if (v !== null) { lo = Math.min(lo, v); hi = Math.max(hi, v); }
+    if (lo === Infinity) return [0, 1];
+    return lo === hi ? [lo - 1, hi + 1] : [lo, hi];
+  }
+
+  function line(ctx, xs, ys, x, y, style, dash) {
+    ctx.strokeStyle = style;
+    ctx.setLineDash(dash || []);
+    ctx.beginPath();
+    let drawing = false;
+    for (let i = 0; i < xs.length; i++) {
+      if (ys[i] === null) { drawing = false; continue; }
+      drawing ? ctx.lineTo(x(xs[i]), y(ys[i])) : ctx.moveTo(x(xs[i]), y(ys[i]));
+      drawing = true;
+    }
+    ctx.stroke();
+  }
+
+  function draw(chart) {
+    const canvas = chart.canvas, dpr = window.devicePixelRatio || 1;
+    const width = canvas.clientWidth, height = 220, pad = 36;
+    canvas.width = width * dpr;
+    canvas.height = height * dpr;
+    const ctx = canvas.getContext("2d");
+    ctx.scale(dpr, dpr);
+    ctx.clearRect(0, 0, width, height);
+    if (!chart.t.length) return;
+
+    const t0 = chart.t[0], t1 = Math.max(chart.t[chart.t.length - 1], t0 + 1);
+    const [p0, p1] = range(chart.straddle.concat(chart.vwap));
+    const x = t => pad + (t - t0) / (t1 - t0) * (width - 2 * pad);
+    const yLeft = v => height - pad + (v - p0) / (p1 - p0) * (2 * pad - height);
+    const yRight = v => height - pad + v / 100 * (2 * pad - height);
+
+    ctx.lineWidth = 1.5;
+    line(ctx, chart.t, chart.ivp, x, yRight, "#16a34a");
+    line(ctx, chart.t, chart.vwap, x, yLeft, "#1d4ed8", [5, 4]);
+    line(ctx, chart.t, chart.straddle, x, yLeft, "#1d4ed8");
+
+    ctx.setLineDash([]);
+    ctx.fillStyle = "#6b7280";
+    ctx.font = "11px system-ui, sans-serif";
+    ctx.fillText(fmt(p1), 2, pad);
+    ctx.fillText(fmt(p0), 2, height - pad);
+    ctx.fillText("IVP 100", width - pad - 8, pad);
+    ctx.fillText(hhmm(t0), pad, height - 12);
+    ctx.fillText(hhmm(t1), width - pad - 28, height - 12);
+  }
+
+  function redraw() {
+    // Rows for many symbols arrive together: one repaint per frame.
+    if (pending) return;
+    pending = true;
+    requestAnimationFrame(() => {
+      pending = false;
+      for (const chart of Object.values(charts)) if (chart.dirty) { chart.dirty = false; label(chart); draw(chart); }
+    });
+  }
+
+  function addAlert(data, replayed) {
+    const li = document.createElement("li");
+    li.textContent = data.message;
+    if (replayed) li.className = "replayed";
+    alertList.prepend(li);
+    while (alertList.children.length > MAX_ALERTS) alertList.lastChild.remove();
+  }
+
+  async function load() {
+    const latest = await fetch(new URL("latest", API)).then(r => (r.ok ? r.json() : Promise.reject(r.status)));
+    const symbols = Object.keys(latest.symbols);
+    if (!symbols.length) return;
+    section.hidden = false;
+    await Promise.all(symbols.map(async symbol => {
+      const chart = charts[symbol] = card(symbol);
+      const day = latest.symbols[symbol].timestamp.slice(0, 10);
+      const url = new URL(`series?symbol=${encodeURIComponent(symbol)}&from=${day}&downsample=${MAX_POINTS}`, API);
+      const series = await fetch(url).then(r => r.json());
+      const cols = series.columns;
+      cols.timestamp.forEach((ts, i) => {
+        const row = {};
+        for (const key in cols) row[key] = cols[key][i];
+        push(chart, ts, row);
+      });
+      chart.dirty = true;
+    }));
+    redraw();
+    connect();
+  }
+
+  function connect() {
+    const stream = new EventSource(new URL("stream", API));
+    const opened = Date.now();
+    stream.onopen = () => { status.textContent = "● live"; status.className = "on"; };
+    stream.onerror = () => { status.textContent = "○ reconnecting"; status.className = ""; };
+    stream.addEventListener("row", e => {
+      const data = JSON.parse(e.data);
+      const chart = charts[data.symbol];
+      if (!chart) return;
+      push(chart, data.timestamp, data.columns);
+      chart.dirty = true;
+      redraw();
+    });
+    // Alerts in the first second are the server's replay of recent history.
+    stream.addEventListener("alert", e => addAlert(JSON.parse(e.data), Date.now() - opened < 1000));
+  }
+
+  window.addEventListener("resize", () => { for (const c of Object.values(charts)) c.dirty = true; redraw(); });
+  load().catch(() => { section.hidden = true; });
+})();
@@ -11,6 +11,8 @@ self.addEventListener("install", e => {
 });
 
 self.addEventListener("fetch", e => {
+  // Live API (JSON and the /api/stream event stream) always goes to the network.
+  if (new URL(e.request.url).pathname.includes("/api/")) return;
   e.respondWith(
     caches.match(e.request).then(response => {
       return response || fetch(e.request);
@@ -0,0 +1,392 @@
+# storage.py
+# Storage backends for the straddle snapshots behind HistoryStore:
+#
+#   parquet  typed, zstd-compressed, one file per IST trading day (needs pyarrow)
+#   sqlite   typed single-file fallback with an index on timestamp
+#   csv      the original wide CSV, kept as an append-only export for the
+#            dashboard's download link
+#
+#   python storage.py migrate                    # one-time CSV -> data/store
+#   python storage.py export-csv --out file.csv  # full CSV from the store
+
+import os
+import glob
+import shutil
+import sqlite3
+import argparse
+import numpy as np
+import pandas as pd
+from config import CSV_FILENAME, STORE_DIR, STORAGE_BACKEND
+
+try:
+    import pyarrow  # noqa: F401
+    HAVE_PYARROW = True
+except ImportError:
+    HAVE_PYARROW = False
+
+INT_SUFFIXES = ("_strike", "_call_vol", "_put_vol", "_total_vol")
+TEXT_SUFFIXES = ("_expiry",)
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+# -----------------------------------------
+# ✅ TYPING HELPERS
+# -----------------------------------------
+def typed_frame(df):
+    # timestamp -> datetime64, strikes/volumes -> nullable Int64, expiry
+    # strings stay strings (dictionary-encoded on disk), the rest float64.
+    df = df.copy()
+    if "timestamp" in df.columns:
+        df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce")
+    for col in df.columns:
+        if col == "timestamp":
+            continue
+        if col.endswith(TEXT_SUFFIXES):
+            df[col] = df[col].astype("string")
+        elif col.endswith(INT_SUFFIXES):
+            df[col] = pd.to_numeric(df[col], errors="coerce").round().astype("Int64")
+        else:
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype("float64")
+    return df
+
+
+def downsample(df, points):
+    # For plotting and the API (server.py /api/series, eod_report.py pages).
+    # Equal-count row buckets: timestamps and non-float columns keep the last
+    # row of each bucket, float columns are NaN-aware bucket means.
+    n = len(df)
+    if points <= 0 or n <= points:
+        return df
+    starts = np.linspace(0, n, points + 1).astype(np.int64)[:-1]
+    ends = np.r_[starts[1:], n] - 1
+    out = {}
+    for column in df.columns:
+        values = df[column]
+        if values.dtype == np.float64:
+            v = values.to_numpy()
+            valid = ~np.isnan(v)
+            sums = np.add.reduceat(np.where(valid, v, 0.0), starts)
+            counts = np.add.reduceat(valid.astype(np.int64), starts)
+            out[column] = np.where(counts > 0, np.round(sums / np.maximum(counts, 1), 4), np.nan)
+        else:
+            out[column] = values.iloc[ends].to_numpy()
+    return pd.DataFrame(out)
+
+
+def _bounds(start, end):
+    return (pd.Timestamp(start) if start is not None else None,
+            pd.Timestamp(end) if end is not None else None)
+
+
+def _filter_range(df, start, end):
+    if df.empty or (start is None and end is None):
+        return df
+    mask = pd.Series(True, index=df.index)
+    if start is not None:
+        mask &= df["timestamp"] >= start
+    if end is not None:
+        mask &= df["timestamp"] <= end
+    return df[mask]
+
+
+def _project(df, columns):
+    if columns is None:
+        return df
+    wanted = ["timestamp"] + [c for c in columns if c != "timestamp"]
+    return df.reindex(columns=wanted)
+
+
+# -----------------------------------------
+# ✅ PARQUET (date-partitioned, columnar)
+# -----------------------------------------
+class ParquetStore:
+    name = "parquet"
+
+    def __init__(self, root):
+        self.root = root
+        self._day = None  # (date_str, frame) of the partition being appended to
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, day):
+        return os.path.join(self.root, f"date={day}", "snapshots.parquet")
+
+    def days(self):
+        paths = glob.glob(os.path.join(self.root, "date=*", "snapshots.parquet"))
+        return sorted(os.path.basename(os.path.dirname(p))[5:] for p in paths)
+
+    def is_empty(self):
+        return not self.days()
+
+    def _read_day(self, day, columns=None):
+        path = self._path(day)
+        if columns is not None:
+            import pyarrow.parquet as pq
+            available = set(pq.read_schema(path).names)
+            columns = [c for c in ["timestamp"] + list(columns) if c in available]
+            columns = list(dict.fromkeys(columns))
+        return pd.read_parquet(path, columns=columns)
+
+    def read(self, start=None, end=None, columns=None):
+        start, end = _bounds(start, end)
+        days = [d for d in self.days()
+                if (start is None or d >= start.strftime("%Y-%m-%d")) and (end is None or d <= end.strftime("%Y-%m-%d"))]
+        frames = [self._read_day(d, columns) for d in days]
+        frames = [f for f in frames if not f.empty]
+        if not frames:
+            return pd.DataFrame(columns=["timestamp"] + list(columns or []))
+        df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+        return _project(_filter_range(df, start, end), columns).reset_index(drop=True)
+
+    def append(self, rows):
+        new = typed_frame(pd.DataFrame(rows))
+        for day, part in new.groupby(new["timestamp"].dt.strftime("%Y-%m-%d"), sort=True):
+            if self._day is None or self._day[0] != day:
+                path = self._path(day)
+                self._day = (day, pd.read_parquet(path) if os.path.exists(path) else pd.DataFrame())
+            current = self._day[1]
+            merged = pd.concat([current, part], ignore_index=True) if not current.empty else part.reset_index(drop=True)
+            self._write_day(day, merged)
+            self._day = (day, merged)
+
+    def _write_day(self, day, df):
+        path = self._path(day)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        df.to_parquet(tmp_path, index=False, compression="zstd")
+        os.replace(tmp_path, path)
+
+    def replace_all(self, df):
+        # Every new partition is written to a staging dir first; only then are
+        # they renamed over the old ones and the days no longer present
+        # removed. A failure or Ctrl-C while writing leaves the store as it
+        # was, and the swap itself is renames only.
+        df = typed_frame(df)
+        staging = os.path.join(self.root, ".replace")
+        shutil.rmtree(staging, ignore_errors=True)  # left over from an interrupted run
+        staged = {}
+        try:
+            for day, part in df.groupby(df["timestamp"].dt.strftime("%Y-%m-%d"), sort=True):
+                path = os.path.join(staging, f"date={day}", "snapshots.parquet")
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                part.reset_index(drop=True).to_parquet(path, index=False, compression="zstd")
+                staged[day] = path
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        old_days = self.days()
+        self._day = None
+        for day, path in staged.items():
+            os.makedirs(os.path.dirname(self._path(day)), exist_ok=True)
+            os.replace(path, self._path(day))
+        for day in old_days:
+            if day not in staged:
+                os.remove(self._path(day))
+                try:
+                    os.rmdir(os.path.dirname(self._path(day)))
+                except OSError:
+                    pass
+        shutil.rmtree(staging, ignore_errors=True)
+
+    def mtime(self):
+        days = self.days()
+        return os.path.getmtime(self._path(days[-1])) if days else 0
+
+
+# -----------------------------------------
+# ✅ SQLITE (fallback when pyarrow is missing)
+# -----------------------------------------
+class SQLiteStore:
+    name = "sqlite"
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+        self.path = os.path.join(root, "snapshots.sqlite")
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS snapshots (timestamp TEXT NOT NULL)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS snapshots_ts ON snapshots(timestamp)")
+        self.conn.commit()
+
+    def columns(self):
+        return [row[1] for row in self.conn.execute("PRAGMA table_info(snapshots)")]
+
+    def is_empty(self):
+        return self.conn.execute("SELECT 1 FROM snapshots LIMIT 1").fetchone() is None
+
+    def days(self):
+        rows = self.conn.execute("SELECT DISTINCT substr(timestamp, 1, 10) FROM snapshots ORDER BY 1")
+        return [row[0] for row in rows]
+
+    @staticmethod
+    def _sql_type(col):
+        if col.endswith(TEXT_SUFFIXES):
+            return "TEXT"
+        if col.endswith(INT_SUFFIXES):
+            return "INTEGER"
+        return "REAL"
+
+    def _ensure_columns(self, cols):
+        existing = set(self.columns())
+        for col in cols:
+            if col not in existing:
+                self.conn.execute(f'ALTER TABLE snapshots ADD COLUMN "{col}" {self._sql_type(col)}')
+
+    def _insert(self, rows):
+        # No commit: append and replace_all decide the transaction.
+        df = typed_frame(pd.DataFrame(rows))
+        df["timestamp"] = df["timestamp"].dt.strftime(TIMESTAMP_FORMAT)
+        self._ensure_columns(df.columns)
+        cols = ", ".join(f'"{c}"' for c in df.columns)
+        marks = ", ".join("?" for _ in df.columns)
+        values = [tuple(None if pd.isna(v) else (v.item() if hasattr(v, "item") else v) for v in row)
+                  for row in df.itertuples(index=False, name=None)]
+        self.conn.executemany(f"INSERT INTO snapshots ({cols}) VALUES ({marks})", values)
+
+    def append(self, rows):
+        with self.conn:
+            self._insert(rows)
+
+    def read(self, start=None, end=None, columns=None):
+        available = self.columns()
+        wanted = available if columns is None else [c for c in dict.fromkeys(["timestamp"] + list(columns)) if c in available]
+        where, params = [], []
+        if start is not None:
+            where.append("timestamp >= ?")
+            params.append(pd.Timestamp(start).strftime(TIMESTAMP_FORMAT))
+        if end is not None:
+            where.append("timestamp <= ?")
+            params.append(pd.Timestamp(end).strftime(TIMESTAMP_FORMAT))
+        select = ", ".join(f'"{c}"' for c in wanted)
+        sql = f"SELECT {select} FROM snapshots"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY rowid"
+        df = typed_frame(pd.read_sql_query(sql, self.conn, params=params))
+        return _project(df, columns)
+
+    def replace_all(self, df):
+        # One transaction: an error or Ctrl-C mid-insert rolls the DELETE back too.
+        with self.conn:
+            self.conn.execute("DELETE FROM snapshots")
+            self._insert(df.to_dict("records"))
+
+    def mtime(self):
+        # WAL mode: commits land in snapshots.sqlite-wal and reach the main
+        # file only at a checkpoint, so either file may hold the newest row.
+        wal = f"{self.path}-wal"
+        return max(os.path.getmtime(self.path), os.path.getmtime(wal) if os.path.exists(wal) else 0)
+
+
+# -----------------------------------------
+# ✅ CSV (legacy wide file / dashboard export)
+# -----------------------------------------
+class CSVStore:
+    name = "csv"
+
+    def __init__(self, path):
+        self.path = path
+        self.header = None
+
+    def is_empty(self):
+        return not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+
+    def days(self):
+        if self.is_empty():
+            return []
+        timestamps = pd.read_csv(self.path, usecols=["timestamp"])["timestamp"].dropna().astype(str)
+        return sorted(timestamps.str[:10].unique())
+
+    def _header(self):
+        if self.header is None:
+            self.header = list(pd.read_csv(self.path, nrows=0).columns) if not self.is_empty() else []
+        return self.header
+
+    def read(self, start=None, end=None, columns=None):
+        if self.is_empty():
+            return pd.DataFrame(columns=["timestamp"] + list(columns or []))
+        usecols = None
+        if columns is not None:
+            usecols = [c for c in dict.fromkeys(["timestamp"] + list(columns)) if c in self._header()]
+        df = typed_frame(pd.read_csv(self.path, usecols=usecols))
+        start, end = _bounds(start, end)
+        return _project(_filter_range(df, start, end), columns).reset_index(drop=True)
+
+    def append(self, rows):
+        header = self._header()
+        new_columns = [c for row in rows for c in row if c not in header]
+        new_columns = list(dict.fromkeys(new_columns))
+        if not header or new_columns:
+            # A changed header means one full rewrite; later rows append again.
+            existing = pd.read_csv(self.path) if header else pd.DataFrame()
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)  # static/ in a fresh checkout or replay dir
+            self.header = header + new_columns
+            frames = [f for f in (existing, pd.DataFrame(rows)) if not f.empty]
+            pd.concat(frames, ignore_index=True).reindex(columns=self.header).to_csv(self.path, index=False)
+            return
+        lines = pd.DataFrame(rows).reindex(columns=header).to_csv(index=False, header=False)
+        with open(self.path, "rb+") as f:
+            end = f.seek(0, os.SEEK_END)
+            prefix = b""
+            if end:
+                f.seek(end - 1)
+                if f.read(1) != b"\n":
+                    prefix = b"\n"
+            f.write(prefix + lines.encode())
+
+    def replace_all(self, df):
+        df = df.copy()
+        if "timestamp" in df.columns and pd.api.types.is_datetime64_any_dtype(df["timestamp"]):
+            df["timestamp"] = df["timestamp"].dt.strftime(TIMESTAMP_FORMAT)
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        df.to_csv(tmp_path, index=False)
+        os.replace(tmp_path, self.path)
+        self.header = list(df.columns)
+
+    def mtime(self):
+        return os.path.getmtime(self.path) if os.path.exists(self.path) else 0
+
+
+# -----------------------------------------
+# ✅ FACTORY + ONE-TIME MIGRATION
+# -----------------------------------------
+def open_store(backend, root):
+    if backend == "parquet" and not HAVE_PYARROW:
+        print("⚠️ pyarrow not installed, falling back to the SQLite snapshot store")
+        backend = "sqlite"
+    if backend == "parquet":
+        return ParquetStore(root)
+    if backend == "sqlite":
+        return SQLiteStore(root)
+    if backend == "csv":
+        return CSVStore(root if root.endswith(".csv") else os.path.join(root, "snapshots.csv"))
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+
+def migrate_csv(csv_path, store):
+    df = pd.read_csv(csv_path)
+    df = df.dropna(subset=["timestamp"])
+    store.replace_all(df)
+    print(f"✅ Migrated {len(df)} rows from {csv_path} into the {store.name} store")
+    return len(df)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Snapshot storage tools")
+    parser.add_argument("--backend", default=STORAGE_BACKEND)
+    parser.add_argument("--root", default=STORE_DIR)
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("migrate", help="load the legacy wide CSV into the store (replaces store contents)")
+    p.add_argument("--csv", default=CSV_FILENAME)
+    p = sub.add_parser("export-csv", help="write the whole store as one wide CSV")
+    p.add_argument("--out", default=CSV_FILENAME)
+    args = parser.parse_args()
+
+    store = open_store(args.backend, args.root)
+    if args.command == "migrate":
+        migrate_csv(args.csv, store)
+    elif args.command == "export-csv":
+        df = store.read()
+        CSVStore(args.out).replace_all(df)
+        print(f"✅ Exported {len(df)} rows to {args.out}")
@@ -0,0 +1,129 @@
+# symbols.py
+# Declarative registry of the underlyings the monitor follows. Each entry
+# picks the NSE option-chain endpoint (indices or equities), how many expiries
+# get a column set (curr, next, far, exp4, ...) and, optionally, its own alert
+# thresholds; anything left out comes from DEFAULTS / config.py.
+#
+# Symbols are written in groups. A group is one snapshot table with its own
+# store, CSV export and VWAP/IVP engine: NIFTY and BANKNIFTY share the
+# original "main" table behind static/atm_straddle_combined.csv, every other
+# symbol gets a narrow table of its own under data/symbols/<group>, so a new
+# underlying never widens an existing table.
+#
+#   NSE_SYMBOLS=NIFTY,BANKNIFTY,RELIANCE python nifty_master_runner.py
+#   NSE_SYMBOLS=all python nifty_master_runner.py   # every registered symbol
+#
+# The registry itself is pure Python; the storage/pandas side is imported by
+# SymbolGroup, so the fetch-only path can resolve specs without pandas.
+
+import os
+import re
+from config import (STATIC_DIR, CSV_FILENAME, STORE_DIR, SYMBOL_STORE_DIR, STORAGE_BACKEND, EXPORT_CSV,
+                    IVP_WINDOWS, IVP_HIGH, IVP_LOW, VWAP_FACTOR_HIGH, VWAP_FACTOR_LOW)
+
+MAIN_GROUP = "main"
+EXPIRY_SLOTS = ("curr", "next", "far")
+
+DEFAULTS = {
+    "endpoint": "indices",  # /api/option-chain-indices | /api/option-chain-equities
+    "expiries": 2,
+    "group": None,  # None: a table of its own, named after the symbol
+    "enabled": True,  # monitored when NSE_SYMBOLS is not set
+    "ivp_high": IVP_HIGH,
+    "ivp_low": IVP_LOW,
+    "vwap_factor_high": VWAP_FACTOR_HIGH,
+    "vwap_factor_low": VWAP_FACTOR_LOW,
+}
+
+SYMBOLS = {
+    "NIFTY": {"group": MAIN_GROUP},
+    "BANKNIFTY": {"group": MAIN_GROUP},
+    # Opt in (NSE_SYMBOLS=NIFTY,BANKNIFTY,FINNIFTY,MIDCPNIFTY): each one adds a
+    # fetch, a table, a plot and committed files to every scheduled run.
+    "FINNIFTY": {"enabled": False},
+    "MIDCPNIFTY": {"enabled": False},
+}
+
+# Single-stock options: monthly expiries only, jumpier IV around results.
+STOCK_DEFAULTS = {"endpoint": "equities", "enabled": False, "ivp_high": 95, "ivp_low": 5}
+FNO_STOCKS = [
+    "RELIANCE", "HDFCBANK", "ICICIBANK", "INFY", "TCS", "SBIN", "BHARTIARTL", "ITC", "LT", "KOTAKBANK",
+    "AXISBANK", "HINDUNILVR", "BAJFINANCE", "MARUTI", "M&M", "SUNPHARMA", "TATAMOTORS", "TATASTEEL", "NTPC",
+    "POWERGRID", "ULTRACEMCO", "TITAN", "ASIANPAINT", "HCLTECH", "WIPRO", "ADANIENT", "ADANIPORTS", "ONGC",
+    "COALINDIA", "JSWSTEEL", "BAJAJFINSV", "NESTLEIND", "TECHM", "HINDALCO", "GRASIM", "INDUSINDBK", "CIPLA",
+    "DRREDDY", "EICHERMOT", "HEROMOTOCO", "BAJAJ-AUTO", "BPCL", "BRITANNIA", "APOLLOHOSP", "DIVISLAB",
+    "SBILIFE", "HDFCLIFE", "TATACONSUM", "SHRIRAMFIN", "TRENT", "BEL", "DLF",
+]
+SYMBOLS.update({name: dict(STOCK_DEFAULTS) for name in FNO_STOCKS})
+
+
+# -----------------------------------------
+# ✅ RESOLVED SPECS
+# -----------------------------------------
+def symbol_prefix(name):
+    # Column prefix: "NIFTY" -> "nifty", "M&M" -> "m_m", "BAJAJ-AUTO" -> "bajaj_auto".
+    return re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
+
+
+def expiry_labels(prefix, count):
+    return [f"{prefix}_{EXPIRY_SLOTS[i] if i < len(EXPIRY_SLOTS) else f'exp{i + 1}'}" for i in range(count)]
+
+
+def symbol_spec(name):
+    if name not in SYMBOLS:
+        raise ValueError(f"Unknown symbol {name!r}, add it to SYMBOLS in symbols.py")
+    spec = {**DEFAULTS, **SYMBOLS[name], "name": name, "prefix": symbol_prefix(name)}
+    spec["group"] = spec["group"] or spec["prefix"]
+    spec["labels"] = expiry_labels(spec["prefix"], spec["expiries"])
+    spec["png_path"] = os.path.join(STATIC_DIR, f"{spec['prefix']}_ivp_live_plot.png")
+    return spec
+
+
+def active_symbols(selection=None):
+    # selection: "NIFTY,RELIANCE", "all", or None for the enabled entries.
+    selection = (selection if selection is not None else os.getenv("NSE_SYMBOLS", "")).strip()
+    if selection.lower() == "all":
+        names = list(SYMBOLS)
+    elif selection:
+        names = [name.strip().upper() for name in selection.split(",") if name.strip()]
+    else:
+        names = [name for name, entry in SYMBOLS.items() if entry.get("enabled", DEFAULTS["enabled"])]
+    return [symbol_spec(name) for name in dict.fromkeys(names)]
+
+
+def group_paths(group):
+    # (store root, CSV export) of a group's snapshot table.
+    if group == MAIN_GROUP:
+        return STORE_DIR, CSV_FILENAME
+    return os.path.join(SYMBOL_STORE_DIR, group), os.path.join(STATIC_DIR, f"{group}_atm_straddle.csv")
+
+
+# -----------------------------------------
+# ✅ SNAPSHOT GROUPS
+# -----------------------------------------
+class SymbolGroup:
+    # One snapshot table: its symbols, history (store + CSV export) and
+    # VWAP/IVP engine, all kept warm across daemon ticks.
+    def __init__(self, name, specs, backend=STORAGE_BACKEND, windows=IVP_WINDOWS, export_csv=EXPORT_CSV):
+        from storage import open_store, CSVStore
+        from history_store import HistoryStore
+        from ivp_engine import IVPEngine
+        self.name = name
+        self.specs = specs
+        self.store_root, self.csv_path = group_paths(name)
+        self.store = open_store(backend, self.store_root)
+        self.history = HistoryStore(self.store, export=CSVStore(self.csv_path) if export_csv else None,
+                                    legacy_csv=self.csv_path, windows=windows)
+        self.engine = IVPEngine(windows)
+        self.last_samples = {}  # prefix -> the symbol's columns in the last row it was written in (row_stage.py)
+
+    @property
+    def symbols(self):
+        return [spec["name"] for spec in self.specs]
+
+
+def build_groups(specs, **kwargs):
+    members = {}
+    for spec in specs:
+        members.setdefault(spec["group"], []).append(spec)
+    return {name: SymbolGroup(name, group_specs, **kwargs) for name, group_specs in members.items()}
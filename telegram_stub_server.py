@@ -0,0 +1,109 @@
+# telegram_stub_server.py
+# Local stand-in for the Telegram Bot API sendMessage endpoint, so the alert
+# dispatcher can be exercised without a real bot:
+#
+#   python telegram_stub_server.py --port 8766 --rate-limit-first 1
+#   TELEGRAM_API_URL=http://127.0.0.1:8766 TELEGRAM_TOKEN=x TELEGRAM_CHAT_ID=1 python nifty_master_runner.py
+#
+# Every accepted message is kept in server.messages and printed.
+
+import json
+import time
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+
+class StubTelegramHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+    def _send(self, status, body):
+        body = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _form(self):
+        raw = self.rfile.read(int(self.headers.get("Content-Length", 0) or 0)).decode()
+        if "json" in self.headers.get("Content-Type", ""):
+            return json.loads(raw or "{}")
+        return {key: values[0] for key, values in parse_qs(raw).items()}
+
+    def do_POST(self):
+        path = urlparse(self.path).path
+        stub = self.server
+        if not (path.startswith("/bot") and path.endswith("/sendMessage")):
+            self._send(404, {"ok": False, "error_code": 404, "description": "Not Found"})
+            return
+        form = self._form()
+
+        with stub.lock:
+            stub.requests_seen += 1
+            if stub.rate_limit_first > 0:
+                stub.rate_limit_first -= 1
+                limited = True
+            else:
+                limited = False
+        if limited:
+            self._send(429, {"ok": False, "error_code": 429, "description": "Too Many Requests: retry later",
+                             "parameters": {"retry_after": stub.retry_after}})
+            return
+        if not form.get("chat_id") or not form.get("text"):
+            self._send(400, {"ok": False, "error_code": 400, "description": "Bad Request: message text is empty"})
+            return
+
+        with stub.lock:
+            message = {"message_id": len(stub.messages) + 1, "chat": {"id": form["chat_id"]},
+                       "date": int(time.time()), "text": form["text"]}
+            stub.messages.append(message)
+        if stub.verbose:
+            print(f"📨 [{form['chat_id']}] {form['text']}")
+        self._send(200, {"ok": True, "result": message})
+
+
+class StubTelegramServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, rate_limit_first=0, retry_after=1, verbose=False):
+        super().__init__(address, StubTelegramHandler)
+        self.rate_limit_first = rate_limit_first
+        self.retry_after = retry_after
+        self.verbose = verbose
+        self.requests_seen = 0
+        self.messages = []
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def serve_in_thread(port=0, **kwargs):
+    server = StubTelegramServer(("127.0.0.1", port), **kwargs)
+    thread = threading.Thread(target=server.serve_forever, name="telegram-stub", daemon=True)
+    thread.start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stub of the Telegram sendMessage endpoint")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--rate-limit-first", type=int, default=0, help="answer 429 to this many requests first")
+    parser.add_argument("--retry-after", type=int, default=1)
+    args = parser.parse_args()
+
+    server = StubTelegramServer(("127.0.0.1", args.port), rate_limit_first=args.rate_limit_first,
+                                retry_after=args.retry_after, verbose=True)
+    print(f"✅ Telegram stub listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("👋 Telegram stub stopped.")
@@ -0,0 +1,8 @@
+# tests/conftest.py
+# The monitor is flat top-level modules run from the repo root; make them
+# importable however pytest is started.
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,23 @@
+# tests/test_benchmarks.py
+# The suite's baseline check scales timings by the calibration ratio: a run
+# on a machine twice as slow is not a regression, a stage that got slower
+# than the machine did is, and memory is compared unscaled.
+
+from benchmarks import suite_regressions
+
+
+def summary(ms, rss=300.0):
+    return {"ticks_per_sec": 1000 / ms, "tick_ms": {"p50": ms}, "stages": {"plots": {"p50": ms / 2}},
+            "peak_rss_mb": rss, "peak_rss_workers_mb": 200.0}
+
+
+def test_slower_machine_is_not_a_regression():
+    assert suite_regressions("f", summary(200), summary(100), 0.25, speed=2.0) == {}
+    assert suite_regressions("f", summary(200), summary(100), 0.25) != {}
+
+
+def test_real_regressions_still_show():
+    slower_stage = summary(200)
+    slower_stage["stages"]["plots"]["p50"] = 200
+    assert list(suite_regressions("f", slower_stage, summary(100), 0.25, speed=2.0)) == ["plots p50 ms"]
+    assert list(suite_regressions("f", summary(200, rss=400.0), summary(100), 0.25, speed=2.0)) == ["peak RSS MB"]
@@ -0,0 +1,42 @@
+# tests/test_change_detector.py
+# The fingerprint only covers the fields the row stage reads: a change there
+# (or in the expiry labels) is new data, a bid/ask-only change is not.
+
+import copy
+from datetime import datetime
+
+from change_detector import ChangeDetector, chain_fingerprint
+from nse_stub_server import synthetic_option_chain
+
+
+def chain():
+    return synthetic_option_chain("NIFTY", now=datetime(2025, 7, 24, 10, 0), strikes_per_side=20, n_expiries=4, seed=7)
+
+
+def test_used_fields_change_the_fingerprint():
+    base = chain()
+    for edit in (lambda d: d["records"]["data"][30]["PE"].update(lastPrice=d["records"]["data"][30]["PE"]["lastPrice"] + 0.05),
+                 lambda d: d["records"]["data"][3]["CE"].update(openInterest=1),
+                 lambda d: d["records"].update(underlyingValue=d["records"]["underlyingValue"] + 1),
+                 lambda d: d["records"]["data"][0].update(expiryDate="01-Jan-2030")):
+        edited = copy.deepcopy(base)
+        edit(edited)
+        assert chain_fingerprint(edited) != chain_fingerprint(base)
+
+
+def test_unused_fields_and_odd_values():
+    base = chain()
+    quotes = copy.deepcopy(base)
+    quotes["records"]["data"][5]["CE"]["bidprice"] = 1.0
+    assert chain_fingerprint(quotes) == chain_fingerprint(base)
+    dashed = copy.deepcopy(base)
+    dashed["records"]["data"][5]["CE"]["lastPrice"] = "-"
+    assert chain_fingerprint(dashed) != chain_fingerprint(base)
+
+
+def test_unchanged_tick_is_skipped(tmp_path):
+    detector = ChangeDetector(str(tmp_path / "state.json"))
+    changed, fingerprints = detector.check({"NIFTY": chain()})
+    assert changed
+    detector.commit(fingerprints)
+    assert not ChangeDetector(str(tmp_path / "state.json")).check({"NIFTY": chain()})[0]
@@ -0,0 +1,53 @@
+# tests/test_cold_start.py
+# A market-closed run of the entry point must stay a no-op: through the
+# trading-session gate (with the holiday list cached, as the workflow has it)
+# and out, inside the cold-start import budget and without loading any of the
+# heavy stage dependencies or requests.
+
+import os
+import sys
+import json
+import subprocess
+from datetime import datetime, timedelta
+from statistics import median
+
+import pytest
+
+from benchmarks import IMPORT_PATHS, HEAVY_MODULES, import_profile
+from market_hours import IST
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUNNER = os.path.join(REPO, "nifty_master_runner.py")
+BUDGET = IMPORT_PATHS["no-op (market closed)"][1]
+NEVER_IMPORTED = HEAVY_MODULES + ("requests",)
+
+
+@pytest.fixture
+def closed_workdir(tmp_path):
+    # Today is a cached NSE holiday, so the runner is closed whatever the clock says.
+    today = datetime.now(IST).date()
+    years = {str(year): {} for year in (today.year, (today + timedelta(days=40)).year)}
+    years[str(today.year)][today.isoformat()] = "cold-start test"
+    os.makedirs(tmp_path / "data")
+    with open(tmp_path / "data" / "nse_holidays.json", "w") as f:
+        json.dump({"years": years}, f)
+    env = {k: v for k, v in os.environ.items() if k not in ("NSE_DEBUG_MODE", "GITHUB_EVENT_NAME")}
+    env["NSE_BASE_URL"] = "http://127.0.0.1:9"  # nothing listens: any fetch would fail, not hang
+    return tmp_path, env
+
+
+def test_closed_market_run_exits_at_the_gate(closed_workdir):
+    workdir, env = closed_workdir
+    result = subprocess.run([sys.executable, RUNNER], capture_output=True, text=True, cwd=workdir, env=env, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert "Market closed" in result.stdout and "next session opens" in result.stdout
+
+
+def test_closed_market_run_import_budget(closed_workdir):
+    workdir, env = closed_workdir
+    import_profile([RUNNER], cwd=workdir, env=env)  # warm the bytecode cache
+    runs = [import_profile([RUNNER], cwd=workdir, env=env) for _ in range(3)]
+    loaded = {name.split(".")[0] for modules, _ in runs for name in modules}
+    assert not loaded & set(NEVER_IMPORTED), sorted(loaded & set(NEVER_IMPORTED))
+    total = median(seconds for _, seconds in runs)
+    assert total <= BUDGET, f"{total * 1000:.0f} ms of imports, budget {BUDGET * 1000:.0f} ms"
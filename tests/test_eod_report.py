@@ -0,0 +1,32 @@
+# tests/test_eod_report.py
+# The 15:30 workflow step runs on weekday holidays too: a day without rows
+# must exit 0 (so the commit/deploy steps still run), a day whose pages all
+# fail to render must still fail the step.
+
+import os
+import sys
+import subprocess
+
+import pandas as pd
+import pytest
+
+import eod_report
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(REPO, "eod_report.py")
+
+
+def test_day_without_rows_exits_cleanly(tmp_path):
+    result = subprocess.run([sys.executable, SCRIPT, "--date", "2025-12-25"], cwd=tmp_path,
+                            capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "No data for 2025-12-25" in result.stdout
+    assert not (tmp_path / "reports").exists()
+
+
+def test_render_failure_raises(tmp_path, monkeypatch):
+    frame = pd.DataFrame({"timestamp": pd.to_datetime(["2025-07-22 09:15:00"]), "india_vix": [13.0]})
+    monkeypatch.setattr(eod_report, "read_day", lambda day, specs: {spec["prefix"]: frame for spec in specs})
+    monkeypatch.setattr(eod_report, "build_report", lambda *args: 0)
+    with pytest.raises(RuntimeError, match="no pages rendered"):
+        eod_report.build_day_report("2025-07-22", "NIFTY", reports_dir=str(tmp_path))
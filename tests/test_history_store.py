@@ -0,0 +1,49 @@
+# tests/test_history_store.py
+# HistoryStore loads only the recent sessions the IVP windows need, yet warms
+# the engine to the same state as the whole store would, and trims sessions
+# past the retained ones as rows are appended.
+
+import pandas as pd
+import pytest
+
+from history_store import HistoryStore
+from ivp_engine import IVPEngine
+from storage import open_store
+from test_recompute import synthetic_history
+
+WINDOWS = {"": 50, "1d": "1d"}  # 50 ticks > one 40-tick session: the load has to widen
+LABELS = ("nifty_curr", "nifty_next")
+
+
+@pytest.fixture(params=["parquet", "sqlite", "csv"])
+def store(request, tmp_path):
+    store = open_store(request.param, str(tmp_path / "store"))
+    store.replace_all(synthetic_history(sessions=6))
+    return store
+
+
+def sessions(df):
+    return sorted(df["timestamp"].dt.strftime("%Y-%m-%d").unique())
+
+
+def next_stats(df):
+    engine = IVPEngine(WINDOWS, log_rollovers=False)
+    engine.warm(df)
+    return {label: engine.observe(label, "2025-01-14 09:15:00", "16-Jan-2025" if label == "nifty_curr" else "23-Jan-2025",
+                                  260.0, 1000, 15.0) for label in LABELS}
+
+
+def test_load_is_bounded_and_warms_like_the_full_store(store):
+    history = HistoryStore(store, windows=WINDOWS, sessions=1)
+    df = history.frame()
+    assert sessions(df) == store.days()[-2:]
+    assert next_stats(df) == next_stats(store.read())
+
+
+def test_append_trims_old_sessions(store):
+    history = HistoryStore(store, windows=WINDOWS, sessions=3)
+    assert len(sessions(history.frame())) == 3
+    history.append({"timestamp": "2025-01-14 09:15:00", "nifty_curr_expiry": "16-Jan-2025", "nifty_curr_straddle": 260.0})
+    df = history.frame()
+    assert sessions(df) == store.days()[-3:] and sessions(df)[-1] == "2025-01-14"
+    assert df["timestamp"].iloc[-1] == pd.Timestamp("2025-01-14 09:15:00")
@@ -0,0 +1,47 @@
+# tests/test_market_hours.py
+# The session gate: NSE's close minute is in session, so the 15:30 IST cron
+# (which always fires a little late) still takes the closing snapshot.
+
+from datetime import datetime, timedelta
+
+import pytest
+
+import market_hours
+from market_hours import IST, is_trading_session, next_tick_time
+
+
+@pytest.fixture(autouse=True)
+def cached_calendar(monkeypatch):
+    # No network: 2025's holiday list as if already cached.
+    monkeypatch.setattr(market_hours, "DEBUG_MODE", False)
+    monkeypatch.setattr(market_hours.calendar, "cache", {"years": {"2025": {"2025-02-26": "Mahashivratri"}}})
+
+
+def ist(*args):
+    return IST.localize(datetime(*args))
+
+
+@pytest.mark.parametrize("moment, expected", [
+    (ist(2025, 7, 22, 9, 14, 59), False),
+    (ist(2025, 7, 22, 9, 15, 0), True),
+    (ist(2025, 7, 22, 15, 30, 0), True),
+    (ist(2025, 7, 22, 15, 30, 20), True),   # the closing cron, a few seconds late
+    (ist(2025, 7, 22, 15, 30, 59), True),
+    (ist(2025, 7, 22, 15, 31, 0), False),
+    (ist(2025, 7, 26, 12, 0, 0), False),    # Saturday
+    (ist(2025, 2, 26, 12, 0, 0), False),    # holiday
+])
+def test_session_gate(moment, expected):
+    assert is_trading_session(moment) is expected
+
+
+def test_scheduled_run_grace():
+    late = ist(2025, 7, 22, 15, 38, 0)
+    assert not is_trading_session(late)
+    assert is_trading_session(late, grace=timedelta(minutes=10))
+    assert not is_trading_session(ist(2025, 7, 22, 8, 0, 0), grace=timedelta(minutes=10))
+
+
+def test_daemon_grid_keeps_the_close_tick():
+    assert next_tick_time(ist(2025, 7, 22, 15, 29, 0), 900) == ist(2025, 7, 22, 15, 30, 0)
+    assert next_tick_time(ist(2025, 7, 22, 15, 30, 1), 900) == ist(2025, 7, 23, 9, 15, 0)
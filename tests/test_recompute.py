@@ -0,0 +1,79 @@
+# tests/test_recompute.py
+# recompute() must write exactly what the live path (IVPEngine fed one tick
+# at a time, see replay_live) would have written, cell for cell, including
+# the rows that carried an unchanged chain's last sample.
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from recompute import recompute, replay_live
+
+WINDOWS = {"": 5, "w12": 12, "1d": "1d", "2d": "2d"}
+
+
+def synthetic_history(sessions=4, ticks_per_session=40, seed=11):
+    # Two labels over several sessions with a weekly expiry roll in the
+    # middle, missing chains (no expiry), NaN IVs and a NaN straddle.
+    rng = np.random.default_rng(seed)
+    days = pd.bdate_range("2025-01-06", periods=sessions)
+    minutes = pd.timedelta_range("09:15:00", periods=ticks_per_session, freq="1min")
+    timestamps = (days.values[:, None] + minutes.values[None, :]).ravel()
+    n = len(timestamps)
+    df = pd.DataFrame({"timestamp": pd.to_datetime(timestamps).strftime("%Y-%m-%d %H:%M:%S")})
+    roll = n // 2 + 7  # mid-session, so tick and session windows both cross it
+    for label, premium in (("nifty_curr", 250.0), ("nifty_next", 400.0)):
+        first, second = ("09-Jan-2025", "16-Jan-2025") if label == "nifty_curr" else ("16-Jan-2025", "23-Jan-2025")
+        expiry = np.where(np.arange(n) < roll, first, second).astype(object)
+        expiry[rng.random(n) < 0.05] = None
+        df[f"{label}_expiry"] = expiry
+        df[f"{label}_straddle"] = np.round(premium * np.exp(rng.normal(0, 0.003, n).cumsum()), 2)
+        df.loc[rng.random(n) < 0.02, f"{label}_straddle"] = np.nan
+        df[f"{label}_total_vol"] = rng.integers(0, 500_000, n).astype(float)
+        iv = np.round(rng.uniform(9, 25, n), 2)
+        iv[rng.random(n) < 0.08] = np.nan
+        iv[::17] = iv[3]  # repeated IVs exercise ties in the percentile
+        df[f"{label}_straddle_iv"] = iv
+        # rows where the chain was unchanged: the previous sample, marked as a repeat (row_stage.py)
+        repeat = np.flatnonzero(rng.random(n) < 0.06)
+        repeat = repeat[repeat > 0]
+        for column in ("expiry", "straddle", "total_vol", "straddle_iv"):
+            df.loc[repeat, f"{label}_{column}"] = df[f"{label}_{column}"].to_numpy()[repeat - 1]
+        df[f"{label}_repeat"] = np.where(np.isin(np.arange(n), repeat), 1.0, np.nan)
+    return df
+
+
+@pytest.fixture(scope="module")
+def history():
+    return synthetic_history()
+
+
+def test_history_covers_the_edge_cases(history):
+    assert history["timestamp"].str[:10].nunique() > 2
+    assert history["nifty_curr_expiry"].dropna().nunique() == 2
+    assert history["nifty_curr_expiry"].isna().any()
+    assert history["nifty_curr_straddle_iv"].isna().any()
+    assert (history["nifty_curr_repeat"] == 1).sum() > 3
+
+
+@pytest.mark.parametrize("suffix", list(WINDOWS))
+def test_recompute_matches_live_engine(history, suffix):
+    windows = {suffix: WINDOWS[suffix]}
+    fast = recompute(history, windows)
+    live = replay_live(history, windows)
+    assert live
+    for column, expected in live.items():
+        actual = fast[column].to_numpy(dtype=float)
+        np.testing.assert_array_equal(actual, expected, err_msg=column)
+        assert not np.isnan(expected).all(), column
+
+
+def test_recompute_all_windows_at_once(history):
+    fast = recompute(history, WINDOWS)
+    live = replay_live(history, WINDOWS)
+    for column, expected in live.items():
+        np.testing.assert_array_equal(fast[column].to_numpy(dtype=float), expected, err_msg=column)
+    # Derived columns sit right after each label's straddle IV, like the live row.
+    columns = list(fast.columns)
+    at = columns.index("nifty_curr_straddle_iv")
+    assert columns[at + 1:at + 3] == ["nifty_curr_vwap", "nifty_curr_ivp"]
@@ -0,0 +1,61 @@
+# tests/test_row_stage.py
+# A group row is written when any of its symbols has a new chain; the
+# symbols whose chains did not change carry their last sample and must not
+# feed the VWAP/IVP engine again. recompute.py and IVPEngine.warm() have to
+# agree with what the live path wrote.
+
+import importlib
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from ivp_engine import IVPEngine
+from nse_stub_server import synthetic_option_chain
+from recompute import recompute
+
+
+@pytest.fixture
+def row_stage(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # stores, CSV export and run state land here
+    monkeypatch.setenv("NSE_SYMBOLS", "NIFTY,BANKNIFTY")
+    for name in ("TELEGRAM_TOKEN", "TELEGRAM_CHAT_ID", "NSE_CAPTURE_CHAINS"):
+        monkeypatch.delenv(name, raising=False)
+    return importlib.import_module("row_stage")
+
+
+def test_unchanged_symbol_carries_its_sample(row_stage):
+    (group,) = row_stage.groups.values()
+    start = datetime(2025, 7, 22, 10, 0)
+    chains = lambda now: {name: synthetic_option_chain(name, now=now) for name in ("NIFTY", "BANKNIFTY")}
+
+    banknifty = chains(start)["BANKNIFTY"]
+    for i in range(6):
+        now = start + timedelta(minutes=i)
+        tick = chains(now)
+        fresh = {"NIFTY", "BANKNIFTY"}
+        if i in (2, 3):  # BANKNIFTY's chain stays what it was at minute 1
+            tick["BANKNIFTY"], fresh = banknifty, {"NIFTY"}
+        banknifty = tick["BANKNIFTY"]
+        row_stage.write_group_row(group, now.strftime("%Y-%m-%d %H:%M:%S"), 13.5, tick, fresh)
+
+    df = group.history.frame()
+    labels = [label for spec in group.specs if spec["name"] == "BANKNIFTY" for label in spec["labels"]]
+    for label in labels:
+        assert df[f"{label}_repeat"].fillna(0).tolist() == [0, 0, 1, 1, 0, 0]
+        # carried rows repeat the last sample, derived values included
+        for column in (f"{label}_straddle", f"{label}_vwap", f"{label}_ivp"):
+            assert df[column].iloc[2] == df[column].iloc[1] or np.isnan(df[column].iloc[1])
+        # one engine sample per NSE sample: 4 of 6 rows
+        assert len(group.engine.slots[label].windows[""].entries) == 4
+    nifty = [label for spec in group.specs if spec["name"] == "NIFTY" for label in spec["labels"]]
+    assert len(group.engine.slots[nifty[0]].windows[""].entries) == 6
+
+    # The store rebuilds to exactly what was written live, and a restart warms the same state.
+    rebuilt = recompute(df, group.engine.windows)
+    for column in (c for c in df.columns if c.endswith(("_vwap", "_ivp"))):
+        np.testing.assert_array_equal(rebuilt[column].to_numpy(dtype=float), df[column].to_numpy(dtype=float),
+                                      err_msg=column)
+    warmed = IVPEngine(group.engine.windows, log_rollovers=False)
+    warmed.warm(df)
+    assert len(warmed.slots[labels[0]].windows[""].entries) == 4
@@ -0,0 +1,49 @@
+# tests/test_server.py
+# server.py's caches: the snapshot cache must notice rows appended to a
+# WAL-mode SQLite store, and a failed response build must not leave its
+# per-key lock behind.
+
+import importlib
+
+import pytest
+
+from storage import SQLiteStore
+from symbols import active_symbols, group_paths
+
+
+def row(timestamp, spot):
+    return {"timestamp": timestamp, "india_vix": 13.0, "nifty_spot": spot}
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    # server.py opens its stores at import time, under relative data/ paths.
+    monkeypatch.chdir(tmp_path)
+    module = importlib.import_module("server")
+    monkeypatch.setattr(module, "MTIME_CHECK_INTERVAL", 0)
+    return module
+
+
+def test_snapshot_cache_sees_sqlite_wal_appends(server, tmp_path):
+    store_root = str(tmp_path / group_paths("main")[0])
+    writer = SQLiteStore(store_root)
+    writer.append([row("2025-07-22 09:15:00", 24000.0)])
+    cache = server.SnapshotCache(active_symbols("NIFTY"), backend="sqlite")
+    assert len(cache.frame("main")[1]) == 1
+
+    writer.append([row("2025-07-22 09:16:00", 24010.0)])
+    frame = cache.frame("main")[1]
+    assert list(frame["nifty_spot"]) == [24000.0, 24010.0]
+
+
+def test_failed_build_releases_its_key(server):
+    responses = server.ResponseCache()
+
+    def broken():
+        raise ValueError("corrupt partition")
+
+    with pytest.raises(ValueError):
+        responses.get("latest", broken, "application/json")
+    assert responses.building == {}
+    body, _, _ = responses.get("latest", lambda: "{}", "application/json")
+    assert body == b"{}"
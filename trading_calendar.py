@@ -0,0 +1,150 @@
+# trading_calendar.py
+# NSE trading calendar: the exchange's trading-holiday list, fetched once per
+# calendar year from /api/holiday-master and cached on disk (HOLIDAY_CACHE_PATH
+# sits in data/, which the workflow commits, so GitHub Actions fetches it once
+# a year too), plus the hand-kept special sessions NSE announces by circular
+# (Muhurat trading). Standard library only until a fetch is due (requests is
+# imported then); market_hours.py answers is_trading_session() and
+# next_session_open() from it.
+#
+#   python trading_calendar.py            # this year's holidays (fetched if not cached)
+#   python trading_calendar.py --refresh  # refetch, e.g. after NSE adds a holiday mid-year
+
+import os
+import json
+import argparse
+from datetime import datetime, timedelta
+
+HOLIDAY_SEGMENT = "FO"  # the monitor follows options; "CM" is the cash market list
+FETCH_TIMEOUT = 10  # seconds
+RETRY_AFTER = timedelta(hours=6)  # after a failed fetch; that year is weekends-only meanwhile
+
+# Sessions outside the regular grid, by IST date: (open, close). They win over
+# the holiday list (Diwali is a holiday with a one-hour evening session).
+SPECIAL_SESSIONS = {
+    "2024-11-01": ((18, 0), (19, 0)),  # Muhurat trading, Diwali
+    "2025-10-21": ((13, 45), (14, 45)),  # Muhurat trading, Diwali
+}
+
+
+class TradingCalendar:
+    def __init__(self, cache_path, base_url, segment=HOLIDAY_SEGMENT, special_sessions=None, cookie_path=None):
+        self.cache_path = cache_path
+        self.base_url = base_url.rstrip("/")
+        self.segment = segment
+        self.special_sessions = SPECIAL_SESSIONS if special_sessions is None else special_sessions
+        self.cookie_path = cookie_path  # the monitor's NSE cookie jar, sent if there is one
+        self.cache = None  # {"years": {"2026": {"2026-01-26": "Republic Day", ...}}, "failed_at": iso}
+
+    # -----------------------------------------
+    # ✅ DISK CACHE
+    # -----------------------------------------
+    def load(self):
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                self.cache = json.load(f)
+        except (OSError, ValueError):
+            self.cache = {}
+        self.cache.setdefault("years", {})
+        return self.cache
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.cache, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.cache_path)
+
+    # -----------------------------------------
+    # ✅ NSE HOLIDAY MASTER (once per year)
+    # -----------------------------------------
+    def cookie_header(self):
+        try:
+            with open(self.cookie_path, "r") as f:
+                jar = json.load(f)
+            return jar["cookie_string"], jar.get("user_agent")
+        except (TypeError, OSError, ValueError, KeyError):
+            return None, None
+
+    def fetch(self):
+        # {year: {ISO date: description}} for every year in NSE's answer
+        # (the current year; the next one once NSE publishes it in December).
+        import requests
+        cookie_string, user_agent = self.cookie_header()
+        headers = {"accept": "application/json", "referer": f"{self.base_url}/",
+                   "user-agent": user_agent or "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko)"}
+        if cookie_string:
+            headers["cookie"] = cookie_string
+        response = requests.get(f"{self.base_url}/api/holiday-master?type=trading", headers=headers,
+                                timeout=FETCH_TIMEOUT)
+        response.raise_for_status()
+        years = {}
+        for item in response.json().get(self.segment, []):
+            day = datetime.strptime(item["tradingDate"], "%d-%b-%Y").date()
+            years.setdefault(str(day.year), {})[day.isoformat()] = item.get("description", "holiday")
+        return years
+
+    def refresh(self, year):
+        try:
+            fetched = self.fetch()
+        except Exception as e:
+            fetched = {}
+            print(f"⚠️ Could not fetch the NSE holiday list: {e}")
+        self.cache["years"].update(fetched)
+        if str(year) in fetched:
+            self.cache.pop("failed_at", None)
+            print(f"📅 NSE {self.segment} holidays for {year} cached in {self.cache_path} ({len(fetched[str(year)])} days)")
+        else:
+            self.cache["failed_at"] = datetime.now().isoformat(timespec="seconds")
+            print(f"⚠️ No NSE holiday list for {year} yet, treating it as weekends-only until a later fetch")
+        try:
+            self.save()
+        except OSError as e:
+            print(f"⚠️ Could not write {self.cache_path}: {e}")
+
+    def holidays(self, year):
+        if self.cache is None:
+            self.load()
+        key = str(year)
+        if key not in self.cache["years"]:
+            failed_at = self.cache.get("failed_at")
+            if not failed_at or datetime.now() - datetime.fromisoformat(failed_at) >= RETRY_AFTER:
+                self.refresh(year)
+        return self.cache["years"].get(key, {})
+
+    # -----------------------------------------
+    # ✅ QUERIES
+    # -----------------------------------------
+    def session_hours(self, day, regular):
+        # ((h, m), (h, m)) of the session on `day`, or None when NSE is shut.
+        special = self.special_sessions.get(day.isoformat())
+        if special:
+            return special
+        if day.weekday() >= 5 or day.isoformat() in self.holidays(day.year):
+            return None
+        return regular
+
+    def closed_reason(self, day):
+        if day.weekday() >= 5:
+            return "weekend"
+        holiday = self.holidays(day.year).get(day.isoformat())
+        return f"holiday: {holiday}" if holiday else None
+
+
+if __name__ == "__main__":
+    from market_hours import IST, calendar
+    parser = argparse.ArgumentParser(description="NSE trading holidays (cached once per year)")
+    parser.add_argument("--year", type=int, default=datetime.now(IST).year)
+    parser.add_argument("--refresh", action="store_true", help="refetch from NSE even if the year is cached")
+    args = parser.parse_args()
+
+    if args.refresh:
+        calendar.load()
+        calendar.refresh(args.year)
+    holidays = calendar.holidays(args.year)
+    for day, description in sorted(holidays.items()):
+        print(f"   {day} {datetime.fromisoformat(day).strftime('%a')}  {description}")
+    specials = {day: hours for day, hours in calendar.special_sessions.items() if day.startswith(str(args.year))}
+    for day, ((oh, om), (ch, cm)) in sorted(specials.items()):
+        print(f"   {day} special session {oh:02d}:{om:02d}–{ch:02d}:{cm:02d} IST")
+    print(f"📅 {len(holidays)} NSE {calendar.segment} holidays in {args.year} ({calendar.cache_path})")